@@ -1,5 +1,11 @@
 # apps/nextcrm/admin.py
+from django import forms
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+from django.utils.text import capfirst
+
+from .cache import reference_cache
 from .models import (
     Cost_Center, Sociedad, Trader, Commodity_Group, Commodity_Type,
     Commodity_Subtype, Commodity, Delivery_Format, Additive,
@@ -7,12 +13,60 @@ from .models import (
     ICOTERM, Trade_Operation_Type, Contract
 )
 
+# ==================== REFERENCE DATA CACHE ====================
+
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    """Choices from reference_cache instead of a query per form render"""
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in reference_cache.rows(self.queryset.model):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(reference_cache.rows(self.queryset.model)) + (self.field.empty_label is not None)
+
+class ReferenceChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField for a reference_cache table, validated against the cache"""
+    iterator = ReferenceChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        model = self.queryset.model
+        if isinstance(value, model):
+            value = value.pk
+        try:
+            obj = reference_cache.get(model, model._meta.pk.to_python(value))
+        except (TypeError, ValueError, ValidationError):
+            obj = None
+        if obj is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value},
+            )
+        return obj
+
+def reference_column(name):
+    """list_display column for a foreign key to a reference_cache table, without a join or query per row"""
+    @admin.display(description=capfirst(name.replace('_', ' ')), ordering=name)
+    def column(obj):
+        field = obj._meta.get_field(name)
+        return reference_cache.get(field.related_model, getattr(obj, field.attname))
+    return column
+
 # Base admin class
 class BaseModelAdmin(admin.ModelAdmin):
     list_display = ['id', 'created_at', 'updated_at', 'is_active']
     list_filter = ['is_active', 'created_at']
     readonly_fields = ['created_at', 'updated_at']
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if reference_cache.is_cached(db_field.related_model) and db_field.name not in (
+            *self.raw_id_fields, *self.autocomplete_fields
+        ) and 'queryset' not in kwargs:
+            kwargs['form_class'] = ReferenceChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 @admin.register(Cost_Center)
 class CostCenterAdmin(BaseModelAdmin):
     list_display = ['id_cost_center', 'cost_center_name', 'is_active']
@@ -45,7 +99,10 @@ class CommoditySubtypeAdmin(BaseModelAdmin):
 
 @admin.register(Commodity)
 class CommodityAdmin(BaseModelAdmin):
-    list_display = ['id_commodity', 'commodity_name_short', 'commodity_group', 'commodity_type', 'is_active']
+    list_display = [
+        'id_commodity', 'commodity_name_short', reference_column('commodity_group'),
+        reference_column('commodity_type'), 'is_active',
+    ]
     search_fields = ['commodity_name_short', 'commodity_name_full']
     list_filter = ['commodity_group', 'commodity_type', 'is_active']
 
@@ -93,7 +150,11 @@ class TradeOperationTypeAdmin(BaseModelAdmin):
 
 @admin.register(Contract)
 class ContractAdmin(BaseModelAdmin):
-    list_display = ['id', 'contract_number', 'trader', 'counterparty', 'commodity', 'status', 'date', 'total_value']
+    list_display = [
+        'id', 'contract_number', reference_column('trader'), 'counterparty',
+        reference_column('commodity'), 'status', 'date', 'total_value',
+    ]
+    list_select_related = ['counterparty']
     search_fields = ['contract_number', 'counterparty__counterparty_name', 'trader__trader_name']
     list_filter = ['status', 'trade_operation_type', 'commodity_group', 'date']
     readonly_fields = ['total_value', 'created_at', 'updated_at']
\ No newline at end of file
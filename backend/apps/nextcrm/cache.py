@@ -0,0 +1,381 @@
+# apps/nextcrm/cache.py
+import hashlib
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+MISSING = object()
+
+# Stripe of in-process locks so concurrent misses in one worker compute once
+_LOCKS = [threading.Lock() for _ in range(64)]
+
+def _lock_for(key):
+    return _LOCKS[zlib.crc32(key.encode()) % len(_LOCKS)]
+
+# ==================== VERSION COUNTERS ====================
+
+def _initial_version():
+    # Counters (re)start from the clock so an evicted counter never
+    # hands out a version that older cached entries were stored under
+    return int(time.time() * 1000)
+
+def get_version(name):
+    """Current value of a version counter"""
+    key = f'nextcrm:version:{name}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+def bump_version(name):
+    key = f'nextcrm:version:{name}'
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+        return cache.get(key)
+
+# ==================== SINGLE-FLIGHT READ-THROUGH ====================
+
+def get_or_compute(key, compute, timeout, lock_timeout=30, wait=10):
+    """
+    Return the cached value for key, computing and storing it on a miss.
+
+    Concurrent misses are collapsed: threads of one process share a lock,
+    and processes race for a short-lived lock key with cache.add(). The
+    losers poll the cache for the winner's result and only compute
+    themselves if it does not show up within `wait` seconds.
+    """
+    value = cache.get(key, MISSING)
+    if value is not MISSING:
+        return value
+
+    with _lock_for(key):
+        value = cache.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        lock_key = f'{key}:lock'
+        if cache.add(lock_key, 1, timeout=lock_timeout):
+            try:
+                value = compute()
+                cache.set(key, value, timeout=timeout)
+            finally:
+                cache.delete(lock_key)
+            return value
+
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = cache.get(key, MISSING)
+            if value is not MISSING:
+                return value
+
+        return compute()
+
+# ==================== DASHBOARD CACHE ====================
+
+def dashboard_scope(trader):
+    """Cache scope for a trader filter; None means the whole book"""
+    return 'all' if trader is None else f'trader:{getattr(trader, "pk", trader)}'
+
+def get_dashboard_stats(trader, compute):
+    """Dashboard payload for a visibility scope, cached until a contract write"""
+    scope = dashboard_scope(trader)
+    version = get_version(f'dashboard:{scope}')
+    key = f'nextcrm:dashboard:{scope}:v{version}:{timezone.now().date().isoformat()}'
+    return get_or_compute(key, compute, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+
+def invalidate_dashboards(trader_ids):
+    """Bump the whole-book scope and each given trader's scope once the write commits"""
+    scopes = {'all'} | {dashboard_scope(trader_id) for trader_id in trader_ids if trader_id}
+
+    def bump():
+        for scope in scopes:
+            bump_version(f'dashboard:{scope}')
+
+    transaction.on_commit(bump)
+
+# ==================== FACET CACHE ====================
+
+def get_contract_facets(trader, params, compute):
+    """
+    Facet counts of a contract list view, cached per visibility scope and
+    normalized filter parameters (`params`, a string) until a contract
+    write. Every write bumps the whole-book dashboard version, so that
+    version keys the counts too.
+    """
+    scope = dashboard_scope(trader)
+    version = get_version('dashboard:all')
+    digest = hashlib.sha1(params.encode()).hexdigest()
+    key = f'nextcrm:facets:{scope}:v{version}:{timezone.now().date().isoformat()}:{digest}'
+    return get_or_compute(key, compute, timeout=settings.FACET_CACHE_TIMEOUT)
+
+# ==================== LEADERBOARD CACHE ====================
+
+def get_trader_leaderboard(start, end, compute):
+    """
+    Trader leaderboard rows for a date window (either end None), cached
+    per window until a contract write, which bumps the whole-book
+    dashboard version
+    """
+    version = get_version('dashboard:all')
+    window = f'{start or ""}:{end or ""}'
+    key = f'nextcrm:leaderboard:v{version}:{window}'
+    return get_or_compute(key, compute, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+
+# ==================== REFERENCE DATA CACHE ====================
+
+def cache_is_shared():
+    """Whether the default cache is seen by every process (not LocMemCache)"""
+    return not isinstance(caches['default'], LocMemCache)
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_reference_cache_backend(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [checks.Warning(
+        'The default cache is process-local, so a worker only sees reference '
+        'data edited in another process once its copy expires.',
+        hint='Set REDIS_URL to share the cache, or lower REFERENCE_CACHE_LOCAL_TIMEOUT.',
+        id='nextcrm.W001',
+    )]
+
+class ReferenceCache:
+    """
+    Whole-table cache for small, rarely edited lookup tables.
+
+    A registered table is read once into a tuple of instances and stored
+    in the shared cache under the table's version counter, and each
+    process keeps the tables it uses in an LRU, so most reads never leave
+    the worker. Saving or deleting a row bumps the version, which retires
+    both copies. Processes re-read a version at most every `version_ttl`
+    seconds, so another worker's edit can take that long to show up.
+    A bump that never reaches a process (the cache is process-local)
+    is covered by `local_timeout`: a worker re-reads its copy of a table
+    after that long regardless, and a process-local cache keeps the
+    shared copy no longer either. Inside a transaction that wrote to a table, that thread reads the
+    table from the database and caches nothing, until the transaction
+    ends.
+    """
+
+    def __init__(self, maxsize=None, version_ttl=None, local_timeout=None):
+        self.maxsize = maxsize
+        self.version_ttl = version_ttl
+        self.local_timeout = local_timeout
+        self.querysets = {}
+        self.dependents = {}          # label -> labels whose rows embed it
+        self.name_fields = {}         # label -> (model, field) kept by register_names()
+        self._tables = OrderedDict()  # label -> (version, rows, {pk: row}, {field: {pk: value}}, monotonic time read)
+        self._names = {}              # label -> (version, OrderedDict {pk: value}, monotonic time created)
+        self._versions = {}           # label -> (version, monotonic time read)
+        self._counters = Counter()    # (label, 'local_hits' | 'shared_hits' | 'misses')
+        self._lock = threading.Lock()
+        self._local = threading.local()  # .pending: {db alias: labels written in its open transaction}
+
+    def register(self, model, queryset=None, depends_on=()):
+        """
+        Cache `model` (rows from `queryset`, pk order by default) and
+        invalidate it on writes to it or to the `depends_on` models its
+        rows carry through select_related().
+        """
+        label = model._meta.label_lower
+        self.querysets[label] = queryset if queryset is not None else model._default_manager.order_by('pk')
+        for related in depends_on:
+            self.dependents.setdefault(related._meta.label_lower, []).append(label)
+        self._connect(model)
+
+    def register_names(self, model, field):
+        """
+        Keep `field` of a table too large to cache whole in an id -> value
+        LRU; ids missing from it are fetched in one query per names() call.
+        """
+        self.name_fields[model._meta.label_lower] = (model, field)
+        self._connect(model)
+
+    def is_cached(self, model):
+        return model._meta.label_lower in self.querysets
+
+    def names(self, model, field, pks):
+        """{pk: value of `field`} for the given pks; pks with no row are left out"""
+        label = model._meta.label_lower
+        if label in self.querysets:
+            return self._table_names(label, field)
+        if self.name_fields.get(label) == (model, field):
+            return self._lookup_names(label, field, pks)
+        return dict(model._default_manager.filter(pk__in=pks).values_list('pk', field))
+
+    def rows(self, model):
+        """Every row of the table, in the registered queryset's order"""
+        return self._table(model._meta.label_lower)[1]
+
+    def get(self, model, pk, default=None):
+        return self._table(model._meta.label_lower)[2].get(pk, default)
+
+    def invalidate(self, model):
+        """
+        Bump the table's version once the write commits. Until then the
+        writing thread reads the table from the database (its own
+        uncommitted rows) without caching them, so a rollback leaves no
+        trace in either copy.
+        """
+        labels = [model._meta.label_lower, *self.dependents.get(model._meta.label_lower, [])]
+        using = router.db_for_write(model)
+
+        def bump():
+            for label in labels:
+                version = bump_version(f'reference:{label}')
+                with self._lock:
+                    self._versions[label] = (version, time.monotonic())
+
+        if connections[using].in_atomic_block:
+            pending = self._local.__dict__.setdefault('pending', {})
+            pending.setdefault(using, set()).update(labels)
+        transaction.on_commit(bump, using=using)
+
+    def stats(self):
+        """Hit counters of this process per table"""
+        with self._lock:
+            counters = self._counters.copy()
+        tables = {}
+        for label in [*self.querysets, *self.name_fields]:
+            counts = {kind: counters[label, kind] for kind in ('local_hits', 'shared_hits', 'misses')}
+            total = sum(counts.values())
+            counts['hit_rate'] = round((counts['local_hits'] + counts['shared_hits']) / total, 4) if total else None
+            tables[label] = counts
+        return tables
+
+    def clear(self):
+        """Forget this process's copies, versions and counters, and this thread's pending writes"""
+        with self._lock:
+            self._tables.clear()
+            self._names.clear()
+            self._versions.clear()
+            self._counters.clear()
+        self._local.__dict__.pop('pending', None)
+
+    def _connect(self, model):
+        for signal in (post_save, post_delete):
+            signal.connect(
+                self._on_write, sender=model, weak=False,
+                dispatch_uid=f'reference_cache:{model._meta.label_lower}',
+            )
+
+    def _on_write(self, sender, **kwargs):
+        self.invalidate(sender)
+
+    def _pending(self, label):
+        """Whether this thread wrote to the table in a transaction that is still open"""
+        pending = getattr(self._local, 'pending', None)
+        if not pending:
+            return False
+        for using in list(pending):
+            # Committed (and bumped) or rolled back since
+            if not connections[using].in_atomic_block:
+                del pending[using]
+        return any(label in labels for labels in pending.values())
+
+    def _version(self, label):
+        ttl = settings.REFERENCE_CACHE_VERSION_TTL if self.version_ttl is None else self.version_ttl
+        now = time.monotonic()
+        known = self._versions.get(label)
+        if known is not None and now - known[1] < ttl:
+            return known[0]
+        version = get_version(f'reference:{label}')
+        with self._lock:
+            self._versions[label] = (version, now)
+        return version
+
+    def _local_timeout(self):
+        return settings.REFERENCE_CACHE_LOCAL_TIMEOUT if self.local_timeout is None else self.local_timeout
+
+    def _expired(self, read_at):
+        return time.monotonic() - read_at >= self._local_timeout()
+
+    def _shared_timeout(self):
+        if cache_is_shared():
+            return settings.REFERENCE_CACHE_TIMEOUT
+        # As blind to other processes' writes as this process's own copy
+        return min(settings.REFERENCE_CACHE_TIMEOUT, self._local_timeout())
+
+    def _table(self, label):
+        if self._pending(label):
+            rows = tuple(self.querysets[label].all())
+            return (None, rows, {row.pk: row for row in rows}, {}, time.monotonic())
+        version = self._version(label)
+        with self._lock:
+            table = self._tables.get(label)
+            if table is not None and table[0] == version and not self._expired(table[4]):
+                self._tables.move_to_end(label)
+                self._counters[label, 'local_hits'] += 1
+                return table
+
+        loaded = []
+
+        def load():
+            loaded.append(True)
+            return tuple(self.querysets[label].all())
+
+        rows = get_or_compute(
+            f'nextcrm:reference:{label}:v{version}', load,
+            timeout=self._shared_timeout(),
+        )
+        table = (version, rows, {row.pk: row for row in rows}, {}, time.monotonic())
+        maxsize = settings.REFERENCE_CACHE_MAX_TABLES if self.maxsize is None else self.maxsize
+        with self._lock:
+            self._counters[label, 'misses' if loaded else 'shared_hits'] += 1
+            self._tables[label] = table
+            self._tables.move_to_end(label)
+            while len(self._tables) > maxsize:
+                self._tables.popitem(last=False)
+        return table
+
+    def _table_names(self, label, field):
+        table = self._table(label)
+        names = table[3].get(field)
+        if names is None:
+            names = table[3][field] = {row.pk: getattr(row, field) for row in table[1]}
+        return names
+
+    def _lookup_names(self, label, field, pks):
+        if self._pending(label):
+            return dict(self.name_fields[label][0]._default_manager.filter(pk__in=pks).values_list('pk', field))
+        version = self._version(label)
+        with self._lock:
+            known = self._names.get(label)
+            if known is None or known[0] != version or self._expired(known[2]):
+                known = self._names[label] = (version, OrderedDict(), time.monotonic())
+            cached = known[1]
+            found, missing = {}, []
+            for pk in set(pks):
+                if pk in cached:
+                    cached.move_to_end(pk)
+                    found[pk] = cached[pk]
+                else:
+                    missing.append(pk)
+            self._counters[label, 'misses' if missing else 'local_hits'] += 1
+        if not missing:
+            return found
+
+        model = self.name_fields[label][0]
+        fetched = dict(model._default_manager.filter(pk__in=missing).values_list('pk', field))
+        found.update(fetched)
+        with self._lock:
+            # Unless a write retired this map while the query ran
+            if self._names.get(label) is known:
+                cached.update(fetched)
+                while len(cached) > settings.REFERENCE_CACHE_MAX_NAMES:
+                    cached.popitem(last=False)
+        return found
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,195 @@
+# apps/nextcrm/compiled.py
+import datetime
+import decimal
+import functools
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.fields import ISO_8601
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .cache import reference_cache
+from .serializers import ReferenceNameField
+
+# ==================== CONVERTERS ====================
+
+# Each returns a function of a non-null column value that gives what the
+# DRF field's to_representation() would; None is passed through as the
+# serializer itself does
+
+def decimal_converter(field):
+    if field.normalize_output or field.localize or field.decimal_places is None:
+        return field.to_representation
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        value = value.quantize(quantum, rounding=rounding, context=context)
+        return f'{value:f}' if coerce_to_string else value
+    return convert
+
+def date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() == ISO_8601:
+        return datetime.date.isoformat
+    return field.to_representation
+
+def choice_converter(field):
+    mapping = field.choice_strings_to_values
+    return lambda value: mapping.get(str(value), value)
+
+def display_converter(model_field):
+    # Model.get_FOO_display(), then CharField's str()
+    choices = dict(model_field.flatchoices)
+    return lambda value: str(choices.get(value, value))
+
+CONVERTERS = [
+    # Order matters: subclasses before their bases
+    (serializers.DecimalField, decimal_converter),
+    (serializers.DateTimeField, lambda field: field.to_representation),
+    (serializers.DateField, date_converter),
+    (serializers.ChoiceField, choice_converter),
+    (serializers.BooleanField, lambda field: bool),
+    (serializers.IntegerField, lambda field: int),
+    (serializers.CharField, lambda field: str),
+    (serializers.ReadOnlyField, lambda field: None),
+    (serializers.PrimaryKeyRelatedField, lambda field: None if field.pk_field is None else field.to_representation),
+]
+
+# ==================== COMPILED SERIALIZER ====================
+
+class CompiledSerializer:
+    """
+    Read-only fast path for a ModelSerializer's many=True output. The
+    serializer's fields are compiled once into values_list() lookups and
+    per-field converters, so rows are rendered from tuples without model
+    instances or per-row field objects. The output equals serializer.data.
+
+    Supported fields: model columns, dotted sources through forward
+    relations, get_FOO_display, ReferenceNameField (names looked up once
+    per page, as ReferenceNameListSerializer does) and
+    SerializerMethodFields whose serializer defines
+    `compute_<field>(*values)` for the Meta.method_sources columns.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer_class.Meta.model
+        self.lookups = []
+        self.plan = []      # (name, column index, converter); index None: converter takes the row
+        self.names = []     # (name, column index, related model, name field) for ReferenceNameFields
+        method_sources = getattr(serializer_class.Meta, 'method_sources', {})
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, ReferenceNameField):
+                relation, attribute = field.source_attrs
+                related = self.model._meta.get_field(relation).related_model
+                self.names.append((name, self.column(relation), related, attribute))
+                self.plan.append((name, self.column(relation), None))
+            elif isinstance(field, serializers.SerializerMethodField):
+                compute = getattr(serializer, f'compute_{name}', None)
+                if compute is None or name not in method_sources:
+                    raise ImproperlyConfigured(
+                        f'{serializer_class.__name__}.{name} needs compute_{name}() and Meta.method_sources'
+                    )
+                indexes = [self.column(path.replace('.', '__')) for path in method_sources[name]]
+                self.plan.append((name, None, self.method(compute, indexes)))
+            elif field.source_attrs and field.source_attrs[-1].startswith('get_') and \
+                    field.source_attrs[-1].endswith('_display'):
+                column = field.source_attrs[-1][len('get_'):-len('_display')]
+                model_field = self.model._meta.get_field(column)
+                self.plan.append((name, self.column(column), display_converter(model_field)))
+            elif isinstance(field, serializers.BaseSerializer) or field.source == '*':
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{name} cannot be compiled')
+            else:
+                self.plan.append((name, self.column('__'.join(field.source_attrs)), self.converter(field)))
+
+    def column(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.lookups.index(lookup)
+
+    @staticmethod
+    def method(compute, indexes):
+        return lambda row: compute(*(row[index] for index in indexes))
+
+    @staticmethod
+    def converter(field):
+        for field_class, make in CONVERTERS:
+            if isinstance(field, field_class):
+                return make(field)
+        return field.to_representation
+
+    def values(self, queryset):
+        """
+        values_list() of the columns to render, plus the ordering columns and
+        primary key so KeysetPagination can read its cursor off the rows
+        """
+        lookups = list(self.lookups)
+        ordering = [name for name in queryset.query.order_by if isinstance(name, str)]
+        for name in [*ordering, self.model._meta.pk.name]:
+            name = name.lstrip('-')
+            if name not in lookups:
+                lookups.append(name)
+        return queryset.prefetch_related(None).values_list(*lookups, named=True)
+
+    def render(self, rows):
+        rows = list(rows)
+        converters = dict(self.name_converters(rows))
+        plan = [(name, index, converters.get(name, convert)) for name, index, convert in self.plan]
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, convert in plan:
+                if index is None:
+                    item[name] = convert(row)
+                    continue
+                value = row[index]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    def name_converters(self, rows):
+        for name, index, related, attribute in self.names:
+            pks = {row[index] for row in rows} - {None}
+            names = reference_cache.names(related, attribute, pks) if pks else {}
+            yield name, names.get
+
+@functools.lru_cache(maxsize=None)
+def compiled_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
+
+class CompiledListMixin:
+    """
+    Serves the list action, and actions that call compiled_response(),
+    through compiled_serializer() instead of instantiating the serializer
+    per row. Set `compiled_list = False` to go through the regular
+    serializer.
+    """
+    compiled_list = True
+
+    def list(self, request, *args, **kwargs):
+        return self.compiled_response(self.filter_queryset(self.get_queryset()))
+
+    def compiled_response(self, queryset, paginate=True):
+        if self.compiled_list:
+            compiled = compiled_serializer(self.get_serializer_class())
+            queryset = compiled.values(queryset)
+            render = compiled.render
+        else:
+            render = lambda rows: self.get_serializer(rows, many=True).data
+        page = self.paginate_queryset(queryset) if paginate else None
+        if page is not None:
+            return self.get_paginated_response(render(page))
+        return Response(render(queryset))
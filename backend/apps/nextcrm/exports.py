@@ -0,0 +1,102 @@
+# apps/nextcrm/exports.py
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from utils.renderers import orjson_dumps
+
+# ==================== RENDERERS ====================
+
+class ExportRenderer(BaseRenderer):
+    """
+    Lets content negotiation (?format=csv or an Accept header) pick an
+    export format. The export body is streamed by the view; only error
+    responses pass through render(), as JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+# ==================== STREAMING ====================
+
+# Exported contract columns and the lookups they are read from, as in ContractListSerializer
+CONTRACT_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('contract_number', 'contract_number'),
+    ('date', 'date'),
+    ('status', 'status'),
+    ('trader_name', 'trader__trader_name'),
+    ('counterparty_name', 'counterparty__counterparty_name'),
+    ('commodity_name', 'commodity__commodity_name_short'),
+    ('trade_operation_type_name', 'trade_operation_type__trade_operation_type_name'),
+    ('price', 'price'),
+    ('quantity', 'quantity'),
+    ('total_value', 'total_value'),
+    ('trade_currency_code', 'trade_currency__currency_code'),
+    ('delivery_period', 'delivery_period'),
+    ('created_at', 'created_at'),
+]
+
+class Echo:
+    """File-like object whose write() returns the text, for csv.writer"""
+    def write(self, value):
+        return value
+
+def csv_lines(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+def ndjson_lines(headers, rows):
+    default = DjangoJSONEncoder().default
+    for row in rows:
+        yield orjson_dumps(dict(zip(headers, row)), default).decode() + '\n'
+
+def batched(lines, size):
+    """Join lines into chunks of `size`; the first line goes out alone, for a fast first byte"""
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is not None:
+        yield first
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+LINE_WRITERS = {'csv': csv_lines, 'ndjson': ndjson_lines}
+
+def stream_export(queryset, columns, renderer, name, chunk_size=2000):
+    """
+    StreamingHttpResponse with every row of the queryset, projected to
+    `columns` [(header, lookup), ...]. Rows are fetched `chunk_size` at a
+    time through QuerySet.iterator() (a server-side cursor on PostgreSQL)
+    and written out as they arrive, so memory does not grow with the
+    number of rows.
+    """
+    headers = [header for header, _ in columns]
+    rows = queryset.values_list(*(lookup for _, lookup in columns)).iterator(chunk_size=chunk_size)
+    response = StreamingHttpResponse(
+        batched(LINE_WRITERS[renderer.format](headers, rows), chunk_size),
+        content_type=f'{renderer.media_type}; charset={renderer.charset}',
+    )
+    filename = f'{name}-{timezone.now():%Y%m%d-%H%M%S}.{renderer.format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
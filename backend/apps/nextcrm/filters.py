@@ -0,0 +1,273 @@
+# apps/nextcrm/filters.py
+import datetime
+import operator
+import re
+from functools import reduce
+
+from django import forms
+from django.db import connections
+from django.db.models import BooleanField, CharField, F, FloatField, Func, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest
+from django.db.models.lookups import IContains
+from django.utils import timezone
+from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter, OrderingFilter
+
+from .models import Contract, ContractQuerySet
+
+# ==================== DATE PERIODS ====================
+
+def period_bounds(year, month=None, day=None):
+    """Half-open [start, end) of a year, month or day; ValueError for an impossible one"""
+    if day is not None:
+        start = datetime.date(year, month, day)
+        return start, start + datetime.timedelta(days=1)
+    if month is not None:
+        start = datetime.date(year, month, 1)
+        return start, datetime.date(year + month // 12, month % 12 + 1, 1)
+    return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+class PeriodField(forms.CharField):
+    """
+    A period as its half-open (start, end) dates: '2024', '2024-03' or
+    '2024-03-15', or with `allow_range` 'from,to' of those, either side
+    optional, to the end of `to` ('2024-01,2024-03' is January to March).
+    `periods` limits the granularities accepted.
+    """
+    PATTERNS = {
+        'year': re.compile(r'(\d{4})'),
+        'month': re.compile(r'(\d{4})-(\d{1,2})'),
+        'day': re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'),
+    }
+
+    def __init__(self, *, periods=('year', 'month', 'day'), allow_range=False, **kwargs):
+        self.periods = periods
+        self.allow_range = allow_range
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        if self.allow_range and ',' in value:
+            since, _, until = value.partition(',')
+            start = self.bounds(since)[0] if since.strip() else None
+            end = self.bounds(until)[1] if until.strip() else None
+            if start and end and start >= end:
+                raise forms.ValidationError('The period ends before it starts.', code='invalid')
+            return start, end
+        return self.bounds(value)
+
+    def bounds(self, value):
+        for period in self.periods:
+            match = self.PATTERNS[period].fullmatch(value.strip())
+            if match:
+                try:
+                    return period_bounds(*map(int, match.groups()))
+                except ValueError:
+                    break
+        expected = ', '.join({'year': 'YYYY', 'month': 'YYYY-MM', 'day': 'YYYY-MM-DD'}[p] for p in self.periods)
+        raise forms.ValidationError(f'Enter a period as {expected}.', code='invalid')
+
+class PeriodFilter(filters.Filter):
+    """Rows whose date falls in a PeriodField period: `field >= start AND field < end`, which an index serves"""
+    field_class = PeriodField
+
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        start, end = value
+        if start is not None:
+            qs = qs.filter(**{f'{self.field_name}__gte': start})
+        if end is not None:
+            qs = qs.filter(**{f'{self.field_name}__lt': end})
+        return qs.distinct() if self.distinct else qs
+
+# ==================== FILTERSETS ====================
+
+class SargableDateFilterSet(filters.FilterSet):
+    """
+    FilterSet that turns `<date>__year` filters, and `<date>__year` with
+    `<date>__month`, into half-open ranges on the column instead of
+    EXTRACT() comparisons, which no index on the column can serve. A month
+    without a year still compares EXTRACT(month).
+    """
+
+    def filter_queryset(self, queryset):
+        values = dict(self.form.cleaned_data)
+        for name, year_filter in self.filters.items():
+            if year_filter.lookup_expr != 'year' or values.get(name) is None:
+                continue
+            month_name = next((
+                other for other, month_filter in self.filters.items()
+                if month_filter.lookup_expr == 'month' and month_filter.field_name == year_filter.field_name
+            ), None)
+            year, month = values.pop(name), values.pop(month_name, None)
+            try:
+                start, end = period_bounds(int(year), None if month is None else int(month))
+            except (ValueError, OverflowError):
+                return queryset.none()
+            queryset = queryset.filter(**{
+                f'{year_filter.field_name}__gte': start, f'{year_filter.field_name}__lt': end,
+            })
+
+        for name, value in values.items():
+            queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+class ContractFilter(SargableDateFilterSet):
+    """Contract list filters; total_value is a generated column, which django-filter cannot introspect"""
+    total_value__gte = filters.NumberFilter(field_name='total_value', lookup_expr='gte')
+    total_value__lte = filters.NumberFilter(field_name='total_value', lookup_expr='lte')
+    is_overdue = filters.BooleanFilter(method='filter_is_overdue')
+    # ?date_range=2024 / 2024-03 / 2024-01-15,2024-02 ; ?delivery_month=2024-03
+    date_range = PeriodFilter(field_name='date', allow_range=True)
+    delivery_month = PeriodFilter(field_name='delivery_period', periods=('month',))
+
+    class Meta:
+        model = Contract
+        fields = {
+            'status': ['exact', 'in'],
+            'trader': ['exact'],
+            'counterparty': ['exact'],
+            'commodity': ['exact'],
+            'commodity_group': ['exact'],
+            'trade_operation_type': ['exact'],
+            'date': ['gte', 'lte', 'year', 'month'],
+            'delivery_period': ['gte', 'lte'],
+            'price': ['gte', 'lte'],
+            'quantity': ['gte', 'lte'],
+        }
+
+    def filter_is_overdue(self, queryset, name, value):
+        # On the columns rather than the annotation, so indexes apply
+        overdue = ContractQuerySet.overdue_condition(timezone.now().date())
+        return queryset.filter(overdue) if value else queryset.exclude(overdue)
+
+# ==================== SEARCH ====================
+
+class WordSimilarity(Func):
+    """pg_trgm word_similarity(term, column): 0..1, how well term matches part of column"""
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+    def __init__(self, term, expression, **extra):
+        super().__init__(Value(term), expression, **extra)
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramContains(IContains):
+    """
+    icontains written as `column ILIKE '%term%'` on PostgreSQL, the form a
+    gin_trgm_ops index on the column serves. Django's icontains there is
+    UPPER(column::text) LIKE UPPER(...), which no such index matches.
+    """
+    lookup_name = 'trigram_icontains'
+
+    def as_sql(self, compiler, connection):
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection):
+        if not self.rhs_is_direct_value():
+            return self.as_sql(compiler, connection)
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs_sql} ILIKE {rhs_sql}', (*params, *rhs_params)
+
+class AnyOf(Func):
+    """
+    column IN (subquery); on PostgreSQL column = ANY(ARRAY(subquery)),
+    which runs the subquery once and probes the column's index with the
+    result. PostgreSQL plans IN (subquery) as a semi-join, which cannot
+    be BitmapOr-ed with the other branches of an OR; this can.
+    """
+    arg_joiner = ' IN '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+    conditional = True
+
+    def __init__(self, column, queryset, **extra):
+        super().__init__(F(column), Subquery(queryset), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='%(expressions)s)', arg_joiner=' = ANY(ARRAY', **extra_context,
+        )
+
+class TrigramSearchFilter(SearchFilter):
+    """
+    SearchFilter that plays to the pg_trgm GIN indexes.
+
+    Terms are matched with ILIKE (TrigramContains), which the trigram
+    indexes serve. Search fields on a related table are matched on the
+    foreign key (`counterparty_id = ANY(ARRAY(SELECT id FROM
+    counterparties WHERE name ILIKE ...))`), so the small reference table
+    is filtered through its own trigram index before it meets the
+    contracts table, instead of joining every contract and filtering
+    afterwards. On PostgreSQL the results
+    are annotated with `search_rank`, the best word similarity across
+    the search fields, which SearchRankOrderingFilter sorts by; related
+    fields are scored in a subquery on the related row's primary key, so
+    ranking adds no join either.
+    """
+    rank_annotation = 'search_rank'
+    default_lookup = 'trigram_icontains'
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        for term in search_terms:
+            queryset = queryset.filter(reduce(operator.or_, (
+                self.term_condition(queryset, str(search_field), term)
+                for search_field in search_fields
+            )))
+
+        if connections[queryset.db].vendor == 'postgresql':
+            queryset = queryset.annotate(**{
+                self.rank_annotation: self.rank(queryset, search_fields, ' '.join(search_terms)),
+            })
+        return queryset
+
+    def rank(self, queryset, search_fields, text):
+        """Greatest word similarity of text across the search fields"""
+        similarities = [
+            self.similarity(queryset, str(search_field).lstrip(''.join(self.lookup_prefixes)), text)
+            for search_field in search_fields
+        ]
+        return Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    def similarity(self, queryset, field_path, text):
+        relation, _, remainder = field_path.partition(LOOKUP_SEP)
+        field = queryset.model._meta.get_field(relation)
+
+        if field.many_to_one and remainder:
+            # Score the one related row by its primary key rather than joining it
+            related = field.related_model._default_manager.filter(pk=OuterRef(relation))
+            return Subquery(related.values(similarity=WordSimilarity(text, F(remainder)))[:1])
+        return WordSimilarity(text, F(field_path))
+
+    def term_condition(self, queryset, search_field, term):
+        lookup = self.construct_search(search_field, queryset)
+        relation, _, remainder = lookup.partition(LOOKUP_SEP)
+        field = queryset.model._meta.get_field(relation)
+
+        if field.many_to_one and LOOKUP_SEP in remainder:
+            # Filter the related table first and match the foreign key against its primary keys
+            related = field.related_model._default_manager.filter(**{remainder: term})
+            return Q(AnyOf(relation, related.values('pk')))
+        return Q(**{lookup: term})
+
+class SearchRankOrderingFilter(OrderingFilter):
+    """OrderingFilter that puts the best search matches first when no ?ordering is given"""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        explicit = request.query_params.get(self.ordering_param)
+        if not explicit and TrigramSearchFilter.rank_annotation in queryset.query.annotations:
+            return [f'-{TrigramSearchFilter.rank_annotation}', *(ordering or [])]
+        return ordering
@@ -0,0 +1,259 @@
+# apps/nextcrm/importers.py
+import codecs
+import csv
+import datetime
+import zipfile
+from decimal import Decimal
+
+from .models import Contract, ContractRollup
+from .serializers import ContractBulkCreateSerializer
+
+# ==================== FILE READERS ====================
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read (unknown format, no header row, ...)"""
+
+def column_name(header):
+    """'Trade Currency ' -> 'trade_currency'"""
+    return '_'.join(str(header or '').strip().lower().split())
+
+def cell_text(value):
+    """Spreadsheet cell value as the text a CSV file would hold"""
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat() if value.time() == datetime.time() else value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    return str(value).strip()
+
+def read_csv(file):
+    """Yield (line number, {column: text}) per data row of a UTF-8 CSV byte stream"""
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    try:
+        header = next(reader, None)
+        if not header:
+            raise ImportFileError('The file has no header row')
+        columns = [column_name(name) for name in header]
+        for values in reader:
+            row = {column: value.strip() for column, value in zip(columns, values) if column and value.strip()}
+            if row:
+                yield reader.line_num, row
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f'Line {reader.line_num + 1}: {exc}')
+
+def read_xlsx(file):
+    """Yield (row number, {column: text}) per data row of the first worksheet"""
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ImportFileError('Reading .xlsx files requires the openpyxl package')
+
+    # read_only streams the sheet instead of loading every cell
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError, OSError) as exc:
+        raise ImportFileError(f'Not a valid .xlsx file: {exc}')
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header or not any(header):
+            raise ImportFileError('The file has no header row')
+        columns = [column_name(name) for name in header]
+        for number, values in enumerate(rows, start=2):
+            cells = ((column, cell_text(value)) for column, value in zip(columns, values) if value is not None)
+            row = {column: text for column, text in cells if column and text}
+            if row:
+                yield number, row
+    finally:
+        workbook.close()
+
+READERS = {'csv': read_csv, 'xlsx': read_xlsx}
+
+def read_rows(file, file_format):
+    if file_format not in READERS:
+        raise ImportFileError(f'Unsupported format "{file_format}"; expected one of {", ".join(READERS)}')
+    return READERS[file_format](file)
+
+# ==================== REFERENCE RESOLUTION ====================
+
+# Contract foreign keys and the columns a file may identify them by, tried
+# in order; a numeric value that matches none of them is taken as the id
+REFERENCE_LOOKUPS = {
+    'trader': ['email', 'trader_name'],
+    'trade_operation_type': ['operation_code', 'trade_operation_type_name'],
+    'sociedad': ['tax_id', 'sociedad_name'],
+    'counterparty': ['counterparty_code', 'counterparty_name'],
+    'commodity': ['commodity_name_short', 'commodity_name_full'],
+    'commodity_group': ['commodity_group_name'],
+    'delivery_format': ['delivery_format_name'],
+    'additive': ['additive_name'],
+    'broker': ['broker_code', 'broker_name'],
+    'icoterm': ['icoterm_code', 'icoterm_name'],
+    'cost_center': ['cost_center_name'],
+    'broker_fee_currency': ['currency_code', 'currency_name'],
+    'trade_currency': ['currency_code', 'currency_name'],
+}
+
+def lookup_key(value):
+    return ' '.join(str(value).split()).casefold()
+
+class ReferenceResolver:
+    """
+    Resolves reference columns to primary keys from dictionaries built
+    once per import with one query per reference table, so rows never
+    query the database for their lookups.
+    """
+    AMBIGUOUS = object()
+
+    def __init__(self, lookups=REFERENCE_LOOKUPS):
+        self.lookups = {}
+        loaded = {}
+        for column, fields in lookups.items():
+            model = Contract._meta.get_field(column).related_model
+            if (model, tuple(fields)) not in loaded:
+                loaded[model, tuple(fields)] = self.load(model, fields)
+            self.lookups[column] = loaded[model, tuple(fields)]
+
+    def load(self, model, fields):
+        """({pk}, [{lookup key: pk} per field])"""
+        pks, maps = set(), [{} for _ in fields]
+        for pk, *values in model._default_manager.values_list('pk', *fields).iterator():
+            pks.add(pk)
+            for mapping, value in zip(maps, values):
+                key = lookup_key(value or '')
+                if key:
+                    mapping[key] = pk if mapping.get(key, pk) == pk else self.AMBIGUOUS
+        return pks, maps
+
+    def resolve(self, column, value):
+        """Primary key for a column value; LookupError if none or several rows match"""
+        pks, maps = self.lookups[column]
+        key = lookup_key(value)
+        for mapping in maps:
+            pk = mapping.get(key)
+            if pk is self.AMBIGUOUS:
+                raise LookupError(f'"{value}" matches more than one {column.replace("_", " ")}.')
+            if pk is not None:
+                return pk
+        if key.isdigit() and int(key) in pks:
+            return int(key)
+        raise LookupError(f'Unknown {column.replace("_", " ")} "{value}".')
+
+# ==================== IMPORTER ====================
+
+def error_messages(detail, prefix=''):
+    """Flatten DRF error detail into (field, message) pairs"""
+    if isinstance(detail, dict):
+        for field, value in detail.items():
+            yield from error_messages(value, f'{prefix}.{field}' if prefix else str(field))
+    elif isinstance(detail, list):
+        for value in detail:
+            yield from error_messages(value, prefix)
+    else:
+        yield prefix or 'non_field_errors', str(detail)
+
+class ContractImporter:
+    """
+    Imports contracts from an iterable of (line number, {column: text})
+    rows, e.g. read_rows(). Rows are validated with the
+    ContractCreateUpdateSerializer rules and written in bulk_create
+    batches of `batch_size`, each in its own transaction, so memory stays
+    flat however long the file is. Invalid rows are skipped and passed to
+    `on_error(line, [(field, message), ...])`.
+
+    A `contract_number` column is kept when present, and the per-year
+    counter moves past it; other rows get numbers from that counter. With `defer_rollups` the rollups
+    are rebuilt once at the end instead of per batch, which is faster for
+    very large files.
+    """
+    batch_size = 1000
+
+    def __init__(self, batch_size=None, dry_run=False, defer_rollups=False, on_error=None):
+        self.batch_size = batch_size or self.batch_size
+        self.dry_run = dry_run
+        self.defer_rollups = defer_rollups
+        self.on_error = on_error or (lambda line, errors: None)
+
+    def run(self, rows):
+        """Import every row; returns {'rows', 'created', 'failed'}"""
+        self.resolver = ReferenceResolver()
+        self.totals = {'rows': 0, 'created': 0, 'failed': 0}
+        batch = []
+        for line, row in rows:
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+
+        if self.defer_rollups and self.totals['created'] and not self.dry_run:
+            ContractRollup.objects.rebuild()
+        return self.totals
+
+    def import_batch(self, batch):
+        prepared, row_errors, numbers = [], {}, {}
+        for index, (line, row) in enumerate(batch):
+            data, errors = self.prepare(row)
+            prepared.append(data)
+            if errors:
+                row_errors[index] = errors
+            if row.get('contract_number'):
+                numbers[index] = row['contract_number']
+        self.check_numbers(numbers, row_errors)
+
+        serializer = ContractBulkCreateSerializer(many=True, context={'defer_rollups': self.defer_rollups})
+        valid, invalid = serializer.partition(prepared)
+        for index, detail in invalid.items():
+            # Keep the lookup message over the serializer's "field is required"
+            row_errors[index] = {**detail, **row_errors.get(index, {})}
+
+        for index in sorted(row_errors):
+            valid.pop(index, None)
+            self.on_error(batch[index][0], list(error_messages(row_errors[index])))
+
+        for index, number in numbers.items():
+            if index in valid:
+                valid[index]['contract_number'] = number
+        if valid and not self.dry_run:
+            serializer.create(list(valid.values()))
+
+        self.totals['rows'] += len(batch)
+        self.totals['created'] += len(valid)
+        self.totals['failed'] += len(row_errors)
+
+    def prepare(self, row):
+        """Serializer input for a file row, with reference columns resolved to ids"""
+        data, errors = dict(row), {}
+        data.pop('contract_number', None)
+        for column in REFERENCE_LOOKUPS:
+            if column in data:
+                try:
+                    data[column] = self.resolver.resolve(column, data[column])
+                except LookupError as exc:
+                    errors[column] = [str(exc)]
+                    del data[column]
+        return data, errors
+
+    def check_numbers(self, numbers, row_errors):
+        """Flag contract numbers that are too long, repeated or already taken"""
+        max_length = Contract._meta.get_field('contract_number').max_length
+        taken = set(Contract.objects.filter(
+            contract_number__in=set(numbers.values())
+        ).values_list('contract_number', flat=True)) if numbers else set()
+        seen = set()
+        for index, number in numbers.items():
+            if len(number) > max_length:
+                message = f'Ensure this field has no more than {max_length} characters.'
+            elif number in taken or number in seen:
+                message = f'Contract number "{number}" already exists.'
+            else:
+                seen.add(number)
+                continue
+            row_errors.setdefault(index, {})['contract_number'] = [message]
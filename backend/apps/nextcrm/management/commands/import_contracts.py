@@ -0,0 +1,56 @@
+# apps/nextcrm/management/commands/import_contracts.py
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.nextcrm.importers import ContractImporter, ImportFileError, read_rows
+
+class Command(BaseCommand):
+    help = 'Import contracts from a CSV or XLSX file, streaming it in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with one contract per row')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], help='File format (default: from the extension)')
+        parser.add_argument('--batch-size', type=int, default=ContractImporter.batch_size,
+                            help='Rows validated and inserted per transaction')
+        parser.add_argument('--errors', help='Write a CSV report of rejected rows to this path')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+        parser.add_argument('--defer-rollups', action='store_true',
+                            help='Rebuild the contract rollups once at the end instead of per batch')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        report = open(options['errors'], 'w', newline='', encoding='utf-8') if options['errors'] else None
+        report_writer = csv.writer(report) if report else None
+        if report_writer:
+            report_writer.writerow(['row', 'field', 'message'])
+        shown = 0
+
+        def on_error(line, errors):
+            nonlocal shown
+            if report_writer:
+                report_writer.writerows([line, field, message] for field, message in errors)
+            elif shown < 20:
+                shown += 1
+                for field, message in errors:
+                    self.stderr.write(f'  row {line}: {field}: {message}')
+
+        importer = ContractImporter(
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+            defer_rollups=options['defer_rollups'], on_error=on_error,
+        )
+        try:
+            with open(path, 'rb') as file:
+                totals = importer.run(read_rows(file, file_format))
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if report:
+                report.close()
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['created']} of {totals['rows']} rows ({totals['failed']} rejected)"
+        ))
@@ -0,0 +1,17 @@
+# apps/nextcrm/management/commands/rebuild_contract_rollups.py
+from django.core.management.base import BaseCommand
+
+from apps.nextcrm.models import ContractRollup
+
+class Command(BaseCommand):
+    help = 'Rebuild the contract_rollups and contract_status_rollups summary tables from the contracts table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rollup rows inserted per INSERT statement'
+        )
+
+    def handle(self, *args, **options):
+        groups = ContractRollup.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {groups} contract rollup groups'))
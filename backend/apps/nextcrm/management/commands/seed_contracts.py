@@ -0,0 +1,154 @@
+# apps/nextcrm/management/commands/seed_contracts.py
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import (
+    Contract, Counterparty, Commodity, Trader, Cost_Center,
+    Sociedad, Broker, Currency, ICOTERM, Trade_Operation_Type,
+    Delivery_Format, Additive, Commodity_Group, Commodity_Type,
+    Commodity_Subtype, ContractRollup
+)
+
+WORDS = [
+    'olive', 'sunflower', 'rapeseed', 'palm', 'soy', 'corn', 'wheat', 'barley',
+    'iberian', 'atlantic', 'global', 'southern', 'golden', 'harvest', 'trading',
+    'foods', 'agro', 'mills', 'export', 'logistics', 'refinery', 'partners',
+]
+
+class Command(BaseCommand):
+    help = 'Generate synthetic reference data and contracts for load tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contracts', type=int, default=10000, help='Contracts to create')
+        parser.add_argument('--traders', type=int, default=20)
+        parser.add_argument('--counterparties', type=int, default=2000)
+        parser.add_argument('--commodities', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        refs = self.reference_data(rng, options)
+
+        start_id = (Contract.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        total = options['contracts']
+        batch_size = options['batch_size']
+        statuses = [choice for choice, _ in Contract.STATUS_CHOICES]
+        first_day = date(2015, 1, 1)
+
+        for offset in range(0, total, batch_size):
+            batch = []
+            for number in range(start_id + offset, start_id + min(offset + batch_size, total)):
+                contract_date = first_day + timedelta(days=rng.randrange(4000))
+                batch.append(Contract(
+                    contract_number=f'SEED-{number:09d}',
+                    trader=rng.choice(refs['traders']),
+                    trade_operation_type=rng.choice(refs['operation_types']),
+                    sociedad=refs['sociedad'],
+                    counterparty=rng.choice(refs['counterparties']),
+                    commodity=rng.choice(refs['commodities']),
+                    commodity_group=refs['group'],
+                    delivery_format=refs['delivery_format'],
+                    additive=refs['additive'],
+                    broker=refs['broker'],
+                    icoterm=refs['icoterm'],
+                    cost_center=refs['cost_center'],
+                    broker_fee=Decimal('0.00'),
+                    broker_fee_currency=refs['currency'],
+                    freight_cost=Decimal(rng.randrange(0, 5000)) / 100,
+                    forex=Decimal('1.0000'),
+                    price=Decimal(rng.randrange(10000, 500000)) / 100,
+                    trade_currency=refs['currency'],
+                    payment_days=rng.choice([0, 30, 60, 90]),
+                    quantity=Decimal(rng.randrange(1000, 5000000)) / 1000,
+                    entrega=f'{rng.choice(WORDS).title()} terminal {rng.randrange(100)}',
+                    delivery_period=contract_date + timedelta(days=rng.randrange(10, 365)),
+                    date=contract_date,
+                    status=rng.choice(statuses),
+                    notes=' '.join(rng.choice(WORDS) for _ in range(rng.randrange(0, 8))),
+                ))
+            with transaction.atomic():
+                Contract.objects.bulk_create(batch)
+            self.stdout.write(f'  {min(offset + batch_size, total)}/{total} contracts')
+
+        # bulk_create bypasses Contract.save, so rebuild the rollups once at the end
+        groups = ContractRollup.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total} contracts ({groups} rollup groups)'
+        ))
+
+    def reference_data(self, rng, options):
+        def name(parts=2):
+            return ' '.join(rng.choice(WORDS).title() for _ in range(parts))
+
+        group, _ = Commodity_Group.objects.get_or_create(commodity_group_name='Seed Group')
+        commodity_type, _ = Commodity_Type.objects.get_or_create(commodity_type_name='Seed Type')
+        subtype, _ = Commodity_Subtype.objects.get_or_create(commodity_subtype_name='Seed Subtype')
+        currency, _ = Currency.objects.get_or_create(
+            currency_code='EUR', defaults={'currency_name': 'Euro', 'currency_symbol': '€'}
+        )
+
+        traders = list(Trader.objects.filter(email__endswith='@seed.example.com'))
+        traders += Trader.objects.bulk_create([
+            Trader(trader_name=name(), email=f'trader{i}@seed.example.com')
+            for i in range(len(traders), options['traders'])
+        ])
+
+        counterparties = list(Counterparty.objects.filter(counterparty_code__startswith='SEED'))
+        counterparties += Counterparty.objects.bulk_create([
+            Counterparty(
+                counterparty_name=f'{name(3)} {i}', counterparty_code=f'SEED{i:06d}',
+                country=rng.choice(['Spain', 'Portugal', 'France', 'Italy']),
+            )
+            for i in range(len(counterparties), options['counterparties'])
+        ])
+
+        commodities = list(Commodity.objects.filter(commodity_group=group))
+        commodities += Commodity.objects.bulk_create([
+            Commodity(
+                commodity_name_short=f'{name(1)} {i}', commodity_group=group,
+                commodity_type=commodity_type, commodity_subtype=subtype,
+            )
+            for i in range(len(commodities), options['commodities'])
+        ])
+
+        operation_types = [
+            Trade_Operation_Type.objects.get_or_create(
+                operation_code=code, defaults={'trade_operation_type_name': label}
+            )[0]
+            for code, label in (('BUY', 'Purchase'), ('SELL', 'Sale'))
+        ]
+
+        # bulk_create sends no post_save, so the cached tables are retired here
+        reference_cache.invalidate(Trader)
+        reference_cache.invalidate(Commodity)
+
+        # Creating via bulk_create leaves pks unset on some backends
+        if any(obj.pk is None for obj in traders + counterparties + commodities):
+            traders = list(Trader.objects.filter(email__endswith='@seed.example.com'))
+            counterparties = list(Counterparty.objects.filter(counterparty_code__startswith='SEED'))
+            commodities = list(Commodity.objects.filter(commodity_group=group))
+
+        return {
+            'traders': traders,
+            'counterparties': counterparties,
+            'commodities': commodities,
+            'operation_types': operation_types,
+            'group': group,
+            'currency': currency,
+            'sociedad': Sociedad.objects.get_or_create(sociedad_name='Seed Sociedad', defaults={'tax_id': 'SEED'})[0],
+            'delivery_format': Delivery_Format.objects.get_or_create(
+                delivery_format_name='Seed Bulk', defaults={'delivery_format_cost': Decimal('0.00')}
+            )[0],
+            'additive': Additive.objects.get_or_create(
+                additive_name='Seed None', defaults={'additive_cost': Decimal('0.00')}
+            )[0],
+            'broker': Broker.objects.get_or_create(broker_code='SEED', defaults={'broker_name': 'Seed Broker'})[0],
+            'icoterm': ICOTERM.objects.get_or_create(icoterm_code='SEED', defaults={'icoterm_name': 'Seed'})[0],
+            'cost_center': Cost_Center.objects.get_or_create(cost_center_name='Seed Cost Center')[0],
+        }
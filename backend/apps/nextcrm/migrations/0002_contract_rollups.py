@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    Contract = apps.get_model('nextcrm', 'Contract')
+    ContractRollup = apps.get_model('nextcrm', 'ContractRollup')
+    groups = Contract.objects.order_by().values(
+        'date', 'trader_id', 'counterparty_id', 'commodity_id', 'status', 'trade_currency_id'
+    ).annotate(
+        contract_count=Count('id'),
+        quantity_sum=Sum('quantity'),
+        price_sum=Sum('price'),
+        notional_sum=Sum(
+            F('price') * F('quantity'),
+            output_field=models.DecimalField(max_digits=36, decimal_places=5),
+        ),
+    )
+    ContractRollup.objects.bulk_create(
+        [
+            ContractRollup(
+                day=group.pop('date'),
+                **group,
+            )
+            for group in groups
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('approved', 'Approved'), ('executed', 'Executed'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('contract_count', models.IntegerField(default=0)),
+                ('quantity_sum', models.DecimalField(decimal_places=3, default=0, max_digits=24)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=24)),
+                ('notional_sum', models.DecimalField(decimal_places=5, default=0, max_digits=36)),
+                ('commodity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_rollups', to='nextcrm.commodity')),
+                ('counterparty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_rollups', to='nextcrm.counterparty')),
+                ('trade_currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_rollups', to='nextcrm.currency')),
+                ('trader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_rollups', to='nextcrm.trader')),
+            ],
+            options={
+                'verbose_name': 'Contract Rollup',
+                'verbose_name_plural': 'Contract Rollups',
+                'db_table': 'contract_rollups',
+                'constraints': [models.UniqueConstraint(fields=('day', 'trader', 'counterparty', 'commodity', 'status', 'trade_currency'), name='contract_rollups_group_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# GIN trigram indexes backing TrigramSearchFilter (PostgreSQL only)
+
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('contracts', 'contract_number'),
+    ('contracts', 'notes'),
+    ('contracts', 'entrega'),
+    ('counterparties', 'counterparty_name'),
+    ('counterparties', 'counterparty_code'),
+    ('counterparties', 'contact_person'),
+    ('counterparties', 'email'),
+    ('commodities', 'commodity_name_short'),
+    ('traders', 'trader_name'),
+]
+
+
+def index_name(table, column):
+    return f'{table}_{column}_trgm'[:63]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name(table, column)} '
+            f'ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name(table, column)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0002_contract_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:39
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0003_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='total_value',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('price'), '*', models.F('quantity')), output_field=models.DecimalField(decimal_places=5, max_digits=30)),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['total_value'], name='contracts_total_value_idx'),
+        ),
+    ]
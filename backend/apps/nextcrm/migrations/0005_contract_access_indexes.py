@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0004_contract_total_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['-date', '-id'], name='contracts_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['trader', '-date', '-id'], name='contracts_trader_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status__in', ['approved', 'executed'])), fields=['delivery_period'], name='contracts_open_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status__in', ['approved', 'executed'])), fields=['trader', 'delivery_period'], name='contracts_trader_delivery_idx'),
+        ),
+    ]
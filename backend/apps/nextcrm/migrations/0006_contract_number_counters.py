@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0005_contract_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractNumberCounter',
+            fields=[
+                ('year', models.IntegerField(primary_key=True, serialize=False)),
+                ('last_number', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contract Number Counter',
+                'verbose_name_plural': 'Contract Number Counters',
+                'db_table': 'contract_number_counters',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0006_contract_number_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contract',
+            name='contracts_open_delivery_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contract',
+            name='contracts_trader_delivery_idx',
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status__in', ['approved', 'executed'])), fields=['delivery_period', 'id'], name='contracts_open_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status__in', ['approved', 'executed'])), fields=['trader', 'delivery_period', 'id'], name='contracts_trader_delivery_idx'),
+        ),
+    ]
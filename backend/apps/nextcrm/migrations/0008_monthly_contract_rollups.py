@@ -0,0 +1,107 @@
+# Contract rollups keyed by contract month instead of day, plus per month,
+# trader and status totals for the dashboard and leaderboard
+
+import datetime
+
+import django.db.models.deletion
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth
+
+GROUP_FIELDS = ['trader_id', 'counterparty_id', 'commodity_id', 'status', 'trade_currency_id']
+
+
+def group_totals(contracts, key, fields=GROUP_FIELDS, **extra):
+    return contracts.order_by().values(key, *fields).annotate(
+        contract_count=Count('id'),
+        quantity_sum=Sum('quantity'),
+        price_sum=Sum('price'),
+        notional_sum=Sum(
+            F('price') * F('quantity'),
+            output_field=models.DecimalField(max_digits=36, decimal_places=5),
+        ),
+        **extra,
+    )
+
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model('nextcrm', 'ContractRollup').objects.all().delete()
+
+
+def populate_monthly_rollups(apps, schema_editor):
+    Contract = apps.get_model('nextcrm', 'Contract')
+    ContractRollup = apps.get_model('nextcrm', 'ContractRollup')
+    groups = group_totals(Contract.objects.annotate(month=TruncMonth('date')), 'month', last_date=Max('date'))
+    ContractRollup.objects.bulk_create([ContractRollup(**group) for group in groups], batch_size=1000)
+
+
+def populate_status_rollups(apps, schema_editor):
+    Contract = apps.get_model('nextcrm', 'Contract')
+    ContractStatusRollup = apps.get_model('nextcrm', 'ContractStatusRollup')
+    groups = group_totals(
+        Contract.objects.annotate(month=TruncMonth('date')), 'month', ['trader_id', 'status'], last_date=Max('date'),
+    )
+    ContractStatusRollup.objects.bulk_create([ContractStatusRollup(**group) for group in groups], batch_size=1000)
+
+
+def populate_daily_rollups(apps, schema_editor):
+    Contract = apps.get_model('nextcrm', 'Contract')
+    ContractRollup = apps.get_model('nextcrm', 'ContractRollup')
+    groups = group_totals(Contract.objects, 'date')
+    ContractRollup.objects.bulk_create(
+        [ContractRollup(day=group.pop('date'), **group) for group in groups],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nextcrm', '0007_contract_open_delivery_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='contractrollup',
+            name='contract_rollups_group_uniq',
+        ),
+        migrations.RunPython(clear_rollups, populate_daily_rollups),
+        migrations.RenameField(
+            model_name='contractrollup',
+            old_name='day',
+            new_name='month',
+        ),
+        migrations.AddField(
+            model_name='contractrollup',
+            name='last_date',
+            field=models.DateField(default=datetime.date(1970, 1, 1)),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name='contractrollup',
+            constraint=models.UniqueConstraint(fields=('month', 'trader', 'counterparty', 'commodity', 'status', 'trade_currency'), name='contract_rollups_group_uniq'),
+        ),
+        migrations.RunPython(populate_monthly_rollups, clear_rollups),
+        migrations.CreateModel(
+            name='ContractStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('last_date', models.DateField()),
+                ('contract_count', models.IntegerField(default=0)),
+                ('quantity_sum', models.DecimalField(decimal_places=3, default=0, max_digits=24)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=24)),
+                ('notional_sum', models.DecimalField(decimal_places=5, default=0, max_digits=36)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('approved', 'Approved'), ('executed', 'Executed'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('trader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_status_rollups', to='nextcrm.trader')),
+            ],
+            options={
+                'verbose_name': 'Contract Status Rollup',
+                'verbose_name_plural': 'Contract Status Rollups',
+                'db_table': 'contract_status_rollups',
+                'constraints': [models.UniqueConstraint(fields=('month', 'trader', 'status'), name='contract_status_rollups_group_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_status_rollups, migrations.RunPython.noop),
+    ]
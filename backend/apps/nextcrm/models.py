@@ -1,8 +1,18 @@
 # apps/nextcrm/models.py
-from django.db import models
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, Count, Max, Sum, F, Func, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .cache import invalidate_dashboards, reference_cache
+
 # Base model for audit trails
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -41,12 +51,28 @@ class Sociedad(BaseModel):
     def __str__(self):
         return f"{self.id_sociedad} - {self.sociedad_name}"
 
+class TraderQuerySet(models.QuerySet):
+    def with_contract_counts(self):
+        """
+        Annotate contract_count and active_contract_count, summed from the
+        trader's contract_rollups rows in one grouped join
+        """
+        return self.annotate(
+            contract_count=Coalesce(Sum('contract_rollups__contract_count'), 0),
+            active_contract_count=Coalesce(Sum(
+                'contract_rollups__contract_count',
+                filter=Q(contract_rollups__status__in=Contract.ACTIVE_STATUSES),
+            ), 0),
+        )
+
 class Trader(BaseModel):
     id_trader = models.AutoField(primary_key=True)
     trader_name = models.CharField(max_length=50)
     email = models.EmailField(unique=True, blank=True)
     phone = models.CharField(max_length=20, blank=True)
     
+    objects = TraderQuerySet.as_manager()
+    
     class Meta:
         db_table = 'traders'
         verbose_name = 'Trader'
@@ -144,6 +170,29 @@ class Additive(BaseModel):
 
 # ==================== COUNTERPARTY MODELS ====================
 
+class CounterpartyQuerySet(models.QuerySet):
+    # Annotation name: (aggregate over the counterparty's contracts, value without contracts)
+    CONTRACT_TOTALS = {
+        'contract_count': (lambda: Count('pk'), 0),
+        # total_value is the stored price * quantity
+        'contract_value': (lambda: Sum('total_value'), Decimal('0')),
+        'last_contract_date': (lambda: Max('date'), None),
+    }
+    
+    def with_contract_totals(self, *names):
+        """
+        Annotate the CONTRACT_TOTALS named (all by default), each as a
+        correlated subquery over contracts_counterparty_id, so a page of
+        counterparties costs the same whatever the size of the contract table
+        """
+        contracts = Contract.objects.filter(counterparty=OuterRef('pk')).order_by().values('counterparty')
+        annotations = {}
+        for name in names or self.CONTRACT_TOTALS:
+            aggregate, empty = self.CONTRACT_TOTALS[name]
+            value = Subquery(contracts.annotate(value=aggregate()).values('value'))
+            annotations[name] = value if empty is None else Coalesce(value, Value(empty))
+        return self.annotate(**annotations)
+
 class Counterparty(BaseModel):
     id_counterparty = models.AutoField(primary_key=True)
     counterparty_name = models.CharField(max_length=100)
@@ -158,6 +207,8 @@ class Counterparty(BaseModel):
     is_supplier = models.BooleanField(default=False)
     is_customer = models.BooleanField(default=True)
     
+    objects = CounterpartyQuerySet.as_manager()
+    
     class Meta:
         db_table = 'counterparties'
         verbose_name = 'Counterparty'
@@ -247,6 +298,46 @@ class Trade_Operation_Type(BaseModel):
 
 # ==================== CONTRACT MODEL ====================
 
+class DaysSince(Func):
+    """Whole days from `since` (a date) to the date expression: date - since"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, since, **extra):
+        super().__init__(expression, Value(since, output_field=models.DateField()), **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='CAST(JULIANDAY(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - JULIANDAY(', **extra_context,
+        )
+
+class ContractQuerySet(models.QuerySet):
+    """
+    Contract queries with the computed contract values as SQL expressions,
+    so they can be filtered and ordered on in the database.
+    (total_value is a generated column already.)
+    """
+    # Statuses a contract can no longer be overdue in
+    CLOSED_STATUSES = ['completed', 'cancelled']
+    
+    @classmethod
+    def overdue_condition(cls, today):
+        """Q for contracts past their delivery period and not yet closed; plain column comparisons"""
+        return Q(delivery_period__lt=today) & ~Q(status__in=cls.CLOSED_STATUSES)
+    
+    def with_computed(self, today=None):
+        """Annotate `is_overdue` and `days_until_delivery` (negative once past) as of `today`"""
+        today = today or timezone.now().date()
+        return self.annotate(
+            is_overdue=Case(
+                When(self.overdue_condition(today), then=Value(True)),
+                default=Value(False), output_field=models.BooleanField(),
+            ),
+            days_until_delivery=DaysSince(F('delivery_period'), today),
+        )
+
 class Contract(BaseModel):
     id = models.AutoField(primary_key=True)
     contract_number = models.CharField(max_length=50, unique=True, blank=True)
@@ -275,6 +366,12 @@ class Contract(BaseModel):
     # Contract terms
     payment_days = models.IntegerField()
     quantity = models.DecimalField(max_digits=15, decimal_places=3, default=0)
+    # Notional value, maintained by the database so it can be filtered, ordered and indexed
+    total_value = models.GeneratedField(
+        expression=F('price') * F('quantity'),
+        output_field=models.DecimalField(max_digits=30, decimal_places=5),
+        db_persist=True,
+    )
     unit_of_measure = models.CharField(max_length=20, default='MT')
     
     # Delivery information
@@ -292,42 +389,469 @@ class Contract(BaseModel):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     ]
+    ACTIVE_STATUSES = ['approved', 'executed']
+    NUMBER_PREFIX = 'CONT'
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     
     # Additional information
     notes = models.TextField(blank=True)
     
+    objects = ContractQuerySet.as_manager()
+    
     class Meta:
         db_table = 'contracts'
         verbose_name = 'Contract'
         verbose_name_plural = 'Contracts'
         ordering = ['-date', '-id']
+        indexes = [
+            # List ordering, unscoped and per trader (non-staff users only see their own)
+            models.Index(fields=['-date', '-id'], name='contracts_date_idx'),
+            models.Index(fields=['trader', '-date', '-id'], name='contracts_trader_date_idx'),
+            # Overdue and upcoming deliveries only look at open contracts, and
+            # page through them by cursor in (delivery_period, id) order
+            models.Index(
+                fields=['delivery_period', 'id'], name='contracts_open_delivery_idx',
+                condition=models.Q(status__in=['approved', 'executed']),
+            ),
+            models.Index(
+                fields=['trader', 'delivery_period', 'id'], name='contracts_trader_delivery_idx',
+                condition=models.Q(status__in=['approved', 'executed']),
+            ),
+            models.Index(fields=['total_value'], name='contracts_total_value_idx'),
+        ]
     
     def __str__(self):
         return f"{self.contract_number or self.id} - {self.counterparty.counterparty_name}"
     
-    @property
-    def total_value(self):
-        """Calculate total contract value"""
-        return self.price * self.quantity
-    
     def save(self, *args, **kwargs):
-        # Auto-generate contract number if not provided
-        if not self.contract_number:
-            year = timezone.now().year
-            last_contract = Contract.objects.filter(
-                contract_number__startswith=f"CONT-{year}"
-            ).order_by('-id').first()
-            
-            if last_contract and last_contract.contract_number:
+        with transaction.atomic():
+            # What the row contributes to the rollups, read under a row lock:
+            # an instance loaded earlier may be stale, and a concurrent save
+            # of the same contract waits here until this one commits
+            old_state = None
+            if not self._state.adding:
+                old_state = ContractRollup.objects.contract_state(self.pk, lock=True)
+            # Auto-generate contract number if not provided; a rolled back
+            # save rolls the counter back too, so numbers stay gapless
+            if not self.contract_number:
+                self.contract_number = Contract.allocate_numbers(1)[0]
+            elif self._state.adding:
+                Contract.claim_numbers([self.contract_number])
+            super().save(*args, **kwargs)
+            new_state = self.rollup_state() or ContractRollup.objects.contract_state(self.pk)
+            ContractRollup.objects.record(old_state, new_state)
+            old_trader_id = old_state[1] if old_state else None
+            invalidate_dashboards({old_trader_id, self.trader_id})
+    
+    @classmethod
+    def allocate_numbers(cls, count, year=None):
+        """Reserve `count` consecutive contract numbers (CONT-<year>-000001, ...)"""
+        year = year or timezone.now().year
+        return [
+            cls.format_number(year, number)
+            for number in ContractNumberCounter.objects.reserve(year, count)
+        ]
+    
+    @classmethod
+    def claim_numbers(cls, numbers):
+        """
+        Advance the per-year counters past numbers given rather than
+        allocated (e.g. imported history), so allocate_numbers never hands
+        them out again. Numbers outside the CONT-<year>-NNNNNN pattern
+        are ignored.
+        """
+        highest = {}
+        for year, number in filter(None, map(cls.parse_number, numbers)):
+            highest[year] = max(highest.get(year, 0), number)
+        for year, number in sorted(highest.items()):
+            ContractNumberCounter.objects.advance(year, number)
+    
+    @staticmethod
+    def format_number(year, number):
+        return f"{Contract.NUMBER_PREFIX}-{year}-{number:06d}"
+    
+    @staticmethod
+    def parse_number(contract_number):
+        """(year, number) of a number in the format_number() pattern, or None"""
+        prefix, _, rest = contract_number.partition('-')
+        year, _, suffix = rest.partition('-')
+        if prefix != Contract.NUMBER_PREFIX or not all(
+            part.isascii() and part.isdigit() for part in (year, suffix)
+        ):
+            return None
+        return int(year), int(suffix)
+    
+    def rollup_state(self):
+        """Rollup group and measures of this contract, or None if not fully loaded"""
+        deferred = self.get_deferred_fields()
+        if any(name in deferred for name in ROLLUP_CONTRACT_FIELDS):
+            return None
+        return tuple(
+            self._meta.get_field(name).to_python(getattr(self, name))
+            for name in ROLLUP_CONTRACT_FIELDS
+        )
+
+# ==================== CONTRACT NUMBERING ====================
+
+class ContractNumberCounterManager(models.Manager):
+    """Hands out contract numbers from a per-year counter row"""
+    
+    def reserve(self, year, count=1):
+        """
+        Reserve `count` consecutive numbers for `year` and return them as a
+        range. The increment is a single UPDATE, so concurrent callers queue
+        on the counter row's lock instead of reading the same maximum; the
+        lock is held until the surrounding transaction commits.
+        """
+        if count < 1:
+            raise ValueError('count must be at least 1')
+        with transaction.atomic(using=self.db, savepoint=False):
+            counter = self.filter(year=year)
+            if not counter.update(last_number=F('last_number') + count):
                 try:
-                    last_number = int(last_contract.contract_number.split('-')[-1])
-                    new_number = last_number + 1
-                except (ValueError, IndexError):
-                    new_number = 1
-            else:
-                new_number = 1
-                
-            self.contract_number = f"CONT-{year}-{new_number:06d}"
+                    with transaction.atomic(using=self.db):
+                        self.create(year=year, last_number=self.highest_issued(year) + count)
+                except IntegrityError:
+                    # Another transaction created the row first; queue behind it
+                    counter.update(last_number=F('last_number') + count)
+            last_number = counter.values_list('last_number', flat=True).get()
+        return range(last_number - count + 1, last_number + 1)
+    
+    def advance(self, year, number):
+        """Raise `year`'s counter to at least `number`, in the caller's transaction"""
+        with transaction.atomic(using=self.db, savepoint=False):
+            counter = self.filter(year=year)
+            if not counter.update(last_number=Greatest(F('last_number'), Value(number))):
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(year=year, last_number=max(self.highest_issued(year), number))
+                except IntegrityError:
+                    counter.update(last_number=Greatest(F('last_number'), Value(number)))
+    
+    def highest_issued(self, year):
+        """Highest number already used for `year`, to seed a new counter"""
+        prefix = Contract.format_number(year, 0)[:-6]
+        numbers = Contract.objects.filter(
+            contract_number__startswith=prefix
+        ).values_list('contract_number', flat=True)
+        highest = 0
+        for number in numbers.iterator():
+            suffix = number[len(prefix):]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        return highest
+
+class ContractNumberCounter(models.Model):
+    """Last contract number issued per year"""
+    year = models.IntegerField(primary_key=True)
+    last_number = models.IntegerField(default=0)
+    
+    objects = ContractNumberCounterManager()
+    
+    class Meta:
+        db_table = 'contract_number_counters'
+        verbose_name = 'Contract Number Counter'
+        verbose_name_plural = 'Contract Number Counters'
+    
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+# ==================== ROLLUP MODELS ====================
+
+# Contract columns the rollup tables are keyed by (date by its month), followed by the summed measures
+ROLLUP_CONTRACT_FIELDS = [
+    'date', 'trader_id', 'counterparty_id', 'commodity_id', 'status',
+    'trade_currency_id', 'quantity', 'price',
+]
+
+class ContractRollupManager(models.Manager):
+    """
+    Keeps the rollup tables in step with writes to the contracts table:
+    contract_rollups and the coarser contract_status_rollups
+    """
+    
+    def rollup_models(self):
+        return [ContractRollup, ContractStatusRollup]
+    
+    def contract_state(self, contract_id, lock=False):
+        """The contract's rollup state as stored, or None; `lock` takes its row lock (inside a transaction)"""
+        contracts = Contract.objects.filter(pk=contract_id)
+        if lock:
+            contracts = contracts.select_for_update()
+        row = contracts.values_list(*ROLLUP_CONTRACT_FIELDS).first()
+        return tuple(row) if row else None
+    
+    def record(self, old_state, new_state):
+        """Move one contract from its old rollup groups to its new ones"""
+        if old_state == new_state:
+            return
+        deltas = {model: {} for model in self.rollup_models()}
+        for model, model_deltas in deltas.items():
+            if old_state is not None:
+                quantity, price = old_state[6:]
+                self._add_delta(
+                    model_deltas, model.group_key(old_state), -1, -quantity, -price, -price * quantity, removed=True,
+                )
+            if new_state is not None:
+                quantity, price = new_state[6:]
+                self._add_delta(
+                    model_deltas, model.group_key(new_state), 1, quantity, price, price * quantity, added=new_state[0],
+                )
+        self.apply(deltas)
+    
+    def record_created(self, contracts):
+        """Add freshly inserted contracts (e.g. from bulk_create) to their groups"""
+        deltas = {model: {} for model in self.rollup_models()}
+        for contract in contracts:
+            state = contract.rollup_state()
+            quantity, price = state[6:]
+            for model, model_deltas in deltas.items():
+                self._add_delta(
+                    model_deltas, model.group_key(state), 1, quantity, price, price * quantity, added=state[0],
+                )
+        self.apply(deltas)
+    
+    @contextmanager
+    def track(self, contracts):
+        """
+        Re-sync the rollups around a bulk write (e.g. QuerySet.update) to
+        the given contracts. Must run inside a transaction.
+        """
+        ids = list(
+            contracts.select_related(None).order_by().select_for_update().values_list('id', flat=True)
+        )
+        tracked = Contract.objects.filter(pk__in=ids)
+        before = {model: model.group_totals(tracked) for model in self.rollup_models()}
+        yield
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        deltas = {}
+        for model, model_before in before.items():
+            model_after = model.group_totals(tracked)
+            model_deltas = deltas[model] = {}
+            for key in set(model_before) | set(model_after):
+                old = model_before.get(key, (0, 0, 0, 0, None))
+                new = model_after.get(key, (0, 0, 0, 0, None))
+                if old != new:
+                    self._add_delta(
+                        model_deltas, key, new[0] - old[0], new[1] - old[1], new[2] - old[2], new[3] - old[3],
+                        added=new[4], removed=key in model_before,
+                    )
+        self.apply(deltas)
+    
+    def apply(self, deltas):
+        """
+        Add {rollup model: {group key: [count, quantity, price, notional,
+        latest date added, whether contracts left]}} deltas to the rollup
+        rows, table by table in key order, so concurrent writers lock
+        shared groups in the same order. A group contracts left is deleted
+        once empty, or otherwise has its latest date re-read, since the
+        contract that left may have set it.
+        """
+        for model in self.rollup_models():
+            rollups = model._default_manager
+            for key, (count, quantity, price, notional, added, removed) in sorted(deltas.get(model, {}).items()):
+                if not (count or quantity or price or notional or added or removed):
+                    continue
+                group = dict(zip(model.key_fields(), key))
+                changes = {
+                    'contract_count': F('contract_count') + count,
+                    'quantity_sum': F('quantity_sum') + quantity,
+                    'price_sum': F('price_sum') + price,
+                    'notional_sum': F('notional_sum') + notional,
+                }
+                if added is not None:
+                    changes['last_date'] = Greatest(F('last_date'), Value(added))
+                if not rollups.filter(**group).update(**changes):
+                    try:
+                        with transaction.atomic():
+                            rollups.create(
+                                contract_count=count, quantity_sum=quantity,
+                                price_sum=price, notional_sum=notional, last_date=added, **group
+                            )
+                    except IntegrityError:
+                        # Created concurrently by another writer
+                        rollups.filter(**group).update(**changes)
+                
+                # By the group's unique key, not a scan for every empty row
+                if removed and not rollups.filter(contract_count__lte=0, **group).delete()[0]:
+                    # A bulk delete removes the group's rows before its signals
+                    # run; the stored date lasts until the group empties then
+                    latest = model.group_contracts(key).order_by('-date').values('date')[:1]
+                    rollups.filter(**group).update(last_date=Coalesce(Subquery(latest), F('last_date')))
+    
+    def rebuild(self, batch_size=1000):
+        """Recompute every rollup row from the contracts table; returns the contract_rollups row count"""
+        counts = []
+        with transaction.atomic():
+            for model in self.rollup_models():
+                model._default_manager.all().delete()
+                rows = [
+                    model(
+                        contract_count=count, quantity_sum=quantity,
+                        price_sum=price, notional_sum=notional, last_date=last_date,
+                        **dict(zip(model.key_fields(), key))
+                    )
+                    for key, (count, quantity, price, notional, last_date)
+                    in model.group_totals(Contract.objects.all()).items()
+                ]
+                model._default_manager.bulk_create(rows, batch_size=batch_size)
+                counts.append(len(rows))
+        return counts[0]
+    
+    @staticmethod
+    def _add_delta(deltas, key, count, quantity, price, notional, added=None, removed=False):
+        totals = deltas.setdefault(tuple(key), [0, Decimal('0'), Decimal('0'), Decimal('0'), None, False])
+        totals[0] += count
+        totals[1] += quantity
+        totals[2] += price
+        totals[3] += notional
+        if added is not None:
+            totals[4] = added if totals[4] is None else max(totals[4], added)
+        totals[5] = totals[5] or removed
+
+class BaseRollup(models.Model):
+    """
+    Contract count, quantity, price and notional totals of the contracts
+    of one month and the `group_fields` columns, with the group's latest
+    contract date
+    """
+    # Contract columns besides the month the rows are keyed by
+    group_fields = []
+    
+    month = models.DateField()  # first day of the month
+    last_date = models.DateField()
+    
+    contract_count = models.IntegerField(default=0)
+    quantity_sum = models.DecimalField(max_digits=24, decimal_places=3, default=0)
+    price_sum = models.DecimalField(max_digits=24, decimal_places=2, default=0)
+    notional_sum = models.DecimalField(max_digits=36, decimal_places=5, default=0)
+    
+    class Meta:
+        abstract = True
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.contract_count}"
+    
+    @classmethod
+    def key_fields(cls):
+        return ['month', *cls.group_fields]
+    
+    @classmethod
+    def group_key(cls, state):
+        """Group of a contract state (ROLLUP_CONTRACT_FIELDS values)"""
+        values = dict(zip(ROLLUP_CONTRACT_FIELDS, state))
+        return (values['date'].replace(day=1), *(values[field] for field in cls.group_fields))
+    
+    @classmethod
+    def group_contracts(cls, key):
+        """The contracts of a group"""
+        month, *columns = key
+        next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return Contract.objects.filter(date__gte=month, date__lt=next_month, **dict(zip(cls.group_fields, columns)))
+    
+    @classmethod
+    def group_totals(cls, contracts):
+        """Per-group totals and latest contract date of a contract queryset, keyed like the rows"""
+        rows = contracts.order_by().annotate(rollup_month=TruncMonth('date')).values_list(
+            'rollup_month', *cls.group_fields,
+        ).annotate(
+            contract_count=Count('id'),
+            quantity_sum=Sum('quantity'),
+            price_sum=Sum('price'),
+            notional_sum=Sum(
+                F('price') * F('quantity'),
+                output_field=models.DecimalField(max_digits=36, decimal_places=5),
+            ),
+            last_date=Max('date'),
+        )
+        width = len(cls.group_fields) + 1
+        return {
+            tuple(row[:width]): (row[width], row[width + 1] or 0, row[width + 2] or 0, row[width + 3] or 0, row[width + 4])
+            for row in rows
+        }
+
+class ContractRollup(BaseRollup):
+    """
+    Totals per contract month, trader, counterparty, commodity, status and
+    trade currency. ContractRollup.objects maintains every rollup table.
+    """
+    group_fields = ['trader_id', 'counterparty_id', 'commodity_id', 'status', 'trade_currency_id']
+    
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='contract_rollups')
+    counterparty = models.ForeignKey(Counterparty, on_delete=models.CASCADE, related_name='contract_rollups')
+    commodity = models.ForeignKey(Commodity, on_delete=models.CASCADE, related_name='contract_rollups')
+    status = models.CharField(max_length=20, choices=Contract.STATUS_CHOICES)
+    trade_currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name='contract_rollups')
+    
+    objects = ContractRollupManager()
+    
+    class Meta:
+        db_table = 'contract_rollups'
+        verbose_name = 'Contract Rollup'
+        verbose_name_plural = 'Contract Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'trader', 'counterparty', 'commodity', 'status', 'trade_currency'],
+                name='contract_rollups_group_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.status} - {self.contract_count}"
+
+class ContractStatusRollup(BaseRollup):
+    """
+    Totals per contract month, trader and status: at most one row per
+    trader and status a month however many contracts there are, for the
+    dashboard and leaderboard
+    """
+    group_fields = ['trader_id', 'status']
+    
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='contract_status_rollups')
+    status = models.CharField(max_length=20, choices=Contract.STATUS_CHOICES)
+    
+    class Meta:
+        db_table = 'contract_status_rollups'
+        verbose_name = 'Contract Status Rollup'
+        verbose_name_plural = 'Contract Status Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'trader', 'status'], name='contract_status_rollups_group_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.status} - {self.contract_count}"
+
+@receiver(pre_delete, sender=Contract)
+def lock_deleted_contract(sender, instance, **kwargs):
+    # Runs in the deletion's transaction; a concurrent delete of the same
+    # row finds it gone once this one commits, and subtracts nothing
+    instance._rollup_state = ContractRollup.objects.contract_state(instance.pk, lock=True)
+
+@receiver(post_delete, sender=Contract)
+def remove_contract_from_rollups(sender, instance, **kwargs):
+    old_state = instance.__dict__.pop('_rollup_state', None)
+    if old_state is not None:
+        ContractRollup.objects.record(old_state, None)
+    invalidate_dashboards({instance.trader_id})
+
+# ==================== REFERENCE DATA CACHE ====================
+
+# Lookup tables that change a few times a month but are read on every
+# contract form and FK validation; writes through save()/delete() invalidate them
+for reference_model in (
+    Currency, ICOTERM, Trade_Operation_Type, Delivery_Format, Additive,
+    Cost_Center, Sociedad, Broker, Trader, Commodity_Group, Commodity_Type,
+    Commodity_Subtype,
+):
+    reference_cache.register(reference_model)
+
+reference_cache.register(
+    Commodity,
+    Commodity.objects.select_related(
+        'commodity_group', 'commodity_type', 'commodity_subtype'
+    ).order_by('commodity_name_short', 'pk'),
+    depends_on=[Commodity_Group, Commodity_Type, Commodity_Subtype],
+)
+
+# Too many counterparties to hold whole; list views only need their names
+reference_cache.register_names(Counterparty, 'counterparty_name')
@@ -1,11 +1,16 @@
 # apps/nextcrm/serializers.py
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
 from rest_framework import serializers
 from .models import (
     Contract, Counterparty, Commodity, Trader, Cost_Center,
     Sociedad, Broker, Currency, ICOTERM, Trade_Operation_Type,
     Delivery_Format, Additive, Commodity_Group, Commodity_Type,
-    Commodity_Subtype, Counterparty_Facility
+    Commodity_Subtype, Counterparty_Facility, ContractRollup
 )
+from .cache import invalidate_dashboards, reference_cache
 
 # ==================== REFERENCE DATA SERIALIZERS ====================
 
@@ -78,18 +83,13 @@ class CommoditySerializer(serializers.ModelSerializer):
 # ==================== TRADER SERIALIZER ====================
 
 class TraderSerializer(serializers.ModelSerializer):
-    total_contracts = serializers.SerializerMethodField()
-    active_contracts = serializers.SerializerMethodField()
+    # Annotated by TraderViewSet.get_queryset()
+    total_contracts = serializers.IntegerField(source='contract_count', read_only=True)
+    active_contracts = serializers.IntegerField(source='active_contract_count', read_only=True)
     
     class Meta:
         model = Trader
         fields = '__all__'
-    
-    def get_total_contracts(self, obj):
-        return obj.contract_set.count()
-    
-    def get_active_contracts(self, obj):
-        return obj.contract_set.filter(status__in=['approved', 'executed']).count()
 
 # ==================== COUNTERPARTY SERIALIZERS ====================
 
@@ -100,28 +100,19 @@ class CounterpartyFacilitySerializer(serializers.ModelSerializer):
 
 class CounterpartySerializer(serializers.ModelSerializer):
     facilities = CounterpartyFacilitySerializer(many=True, read_only=True)
-    total_contracts = serializers.SerializerMethodField()
-    total_contract_value = serializers.SerializerMethodField()
-    last_contract_date = serializers.SerializerMethodField()
+    # Annotated by CounterpartyViewSet.get_queryset()
+    total_contracts = serializers.IntegerField(source='contract_count', read_only=True)
+    total_contract_value = serializers.ReadOnlyField(source='contract_value')
+    last_contract_date = serializers.DateField(read_only=True)
     
     class Meta:
         model = Counterparty
         fields = '__all__'
-    
-    def get_total_contracts(self, obj):
-        return obj.contract_set.count()
-    
-    def get_total_contract_value(self, obj):
-        contracts = obj.contract_set.all()
-        return sum(contract.total_value for contract in contracts)
-    
-    def get_last_contract_date(self, obj):
-        last_contract = obj.contract_set.order_by('-date').first()
-        return last_contract.date if last_contract else None
 
 class CounterpartyListSerializer(serializers.ModelSerializer):
     """Simplified serializer for list views"""
-    total_contracts = serializers.SerializerMethodField()
+    # Annotated by CounterpartyViewSet.get_queryset()
+    total_contracts = serializers.IntegerField(source='contract_count', read_only=True)
     
     class Meta:
         model = Counterparty
@@ -130,21 +121,80 @@ class CounterpartyListSerializer(serializers.ModelSerializer):
             'city', 'country', 'contact_person', 'email', 'phone',
             'is_supplier', 'is_customer', 'total_contracts'
         ]
-    
-    def get_total_contracts(self, obj):
-        return obj.contract_set.count()
 
 # ==================== CONTRACT SERIALIZERS ====================
 
+class ReferenceNameField(serializers.CharField):
+    """
+    Read-only display name of a foreign key, e.g. source='trader.trader_name'.
+    Under ReferenceNameListSerializer it is read by FK id from the names
+    looked up for the whole page instead of through the relation.
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    @property
+    def model_sources(self):
+        # What utils.shaping loads for it: the FK id, not the joined row
+        return [self.source_attrs[0]]
+    
+    def get_attribute(self, instance):
+        names = self.context.get('reference_names')
+        if names is None:
+            return super().get_attribute(instance)
+        relation = self.source_attrs[0]
+        return names[self.source].get(getattr(instance, f'{relation}_id'))
+
+class AnnotationField(serializers.ReadOnlyField):
+    """
+    Read-only value of a queryset annotation, e.g. from
+    Contract.objects.with_computed(); the view annotates its queryset
+    """
+    # What utils.shaping loads for it: no model columns
+    model_sources = []
+
+class ReferenceNameListSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of rows without joining their reference tables:
+    each ReferenceNameField of the child is filled from an id -> name map, taken from
+    reference_cache (whole tables in memory, counterparty names batch-fetched
+    on a miss). Pass context={'join_names': True} to follow the relations
+    instead, e.g. for a queryset that already select_related() them.
+    """
+    
+    def to_representation(self, data):
+        if self.context.get('join_names'):
+            return super().to_representation(data)
+        instances = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self._context['reference_names'] = self.reference_names(instances)
+        try:
+            return super().to_representation(instances)
+        finally:
+            del self._context['reference_names']
+    
+    def reference_names(self, instances):
+        """{field source: {pk: name}} for the ReferenceNameFields of the child"""
+        names = {}
+        for field in self.child.fields.values():
+            if not isinstance(field, ReferenceNameField):
+                continue
+            relation, attribute = field.source_attrs
+            model = self.child.Meta.model._meta.get_field(relation).related_model
+            pks = {getattr(instance, f'{relation}_id') for instance in instances}
+            names[field.source] = reference_cache.names(model, attribute, pks) if pks else {}
+        return names
+
 class ContractListSerializer(serializers.ModelSerializer):
     """Optimized serializer for contract list views"""
-    trader_name = serializers.CharField(source='trader.trader_name', read_only=True)
-    counterparty_name = serializers.CharField(source='counterparty.counterparty_name', read_only=True)
-    commodity_name = serializers.CharField(source='commodity.commodity_name_short', read_only=True)
-    trade_operation_type_name = serializers.CharField(source='trade_operation_type.trade_operation_type_name', read_only=True)
-    trade_currency_code = serializers.CharField(source='trade_currency.currency_code', read_only=True)
+    trader_name = ReferenceNameField(source='trader.trader_name')
+    counterparty_name = ReferenceNameField(source='counterparty.counterparty_name')
+    commodity_name = ReferenceNameField(source='commodity.commodity_name_short')
+    trade_operation_type_name = ReferenceNameField(source='trade_operation_type.trade_operation_type_name')
+    trade_currency_code = ReferenceNameField(source='trade_currency.currency_code')
     total_value = serializers.ReadOnlyField()
-    is_overdue = serializers.SerializerMethodField()
+    is_overdue = AnnotationField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
@@ -155,12 +205,7 @@ class ContractListSerializer(serializers.ModelSerializer):
             'total_value', 'trade_currency_code', 'delivery_period', 'status',
             'status_display', 'date', 'is_overdue', 'created_at'
         ]
-    
-    def get_is_overdue(self, obj):
-        from django.utils import timezone
-        if obj.delivery_period and obj.status not in ['completed', 'cancelled']:
-            return timezone.now().date() > obj.delivery_period
-        return False
+        list_serializer_class = ReferenceNameListSerializer
 
 class ContractDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for contract detail views"""
@@ -180,28 +225,36 @@ class ContractDetailSerializer(serializers.ModelSerializer):
     
     # Calculated fields
     total_value = serializers.ReadOnlyField()
-    is_overdue = serializers.SerializerMethodField()
-    days_until_delivery = serializers.SerializerMethodField()
+    is_overdue = AnnotationField()
+    days_until_delivery = AnnotationField()
     
     class Meta:
         model = Contract
         fields = '__all__'
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that looks up reference-data tables in reference_cache"""
     
-    def get_is_overdue(self, obj):
-        from django.utils import timezone
-        if obj.delivery_period and obj.status not in ['completed', 'cancelled']:
-            return timezone.now().date() > obj.delivery_period
-        return False
+    def to_pk(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
     
-    def get_days_until_delivery(self, obj):
-        from django.utils import timezone
-        if obj.delivery_period:
-            delta = obj.delivery_period - timezone.now().date()
-            return delta.days
-        return None
+    def to_internal_value(self, data):
+        model = self.get_queryset().model
+        if not reference_cache.is_cached(model):
+            return super().to_internal_value(data)
+        instance = reference_cache.get(model, self.to_pk(data))
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
 
 class ContractCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating contracts"""
+    serializer_related_field = ReferencePrimaryKeyRelatedField
     
     class Meta:
         model = Contract
@@ -246,6 +299,98 @@ class ContractCreateUpdateSerializer(serializers.ModelSerializer):
         contract = Contract.objects.create(**validated_data)
         return contract
 
+# ==================== BULK CREATE SERIALIZERS ====================
+
+class PreloadedPrimaryKeyRelatedField(ReferencePrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that resolves from objects preloaded into context['preloaded']"""
+    
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        pk = self.to_pk(data)
+        if pk not in preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return preloaded[pk]
+
+class ContractBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Validates a list of contracts and inserts the valid list in one
+    transaction. Foreign keys of every row are fetched up front with one
+    query per referenced table, contract numbers are reserved as a block
+    and the rows go in through bulk_create.
+    """
+    batch_size = 500
+    
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._context['preloaded'] = self.preload_related(data)
+        return super().to_internal_value(data)
+    
+    def preload_related(self, rows):
+        """{model: {pk: instance}} for every foreign key value in the rows, bar reference_cache tables"""
+        fields = [
+            field for field in self.child.fields.values()
+            if isinstance(field, PreloadedPrimaryKeyRelatedField) and not field.read_only
+            and not reference_cache.is_cached(field.get_queryset().model)
+        ]
+        wanted = defaultdict(set)
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            for field in fields:
+                model = field.get_queryset().model
+                try:
+                    pk = model._meta.pk.to_python(row.get(field.field_name))
+                except DjangoValidationError:
+                    continue
+                if pk is not None:
+                    wanted[model].add(pk)
+        return {
+            model: model._default_manager.in_bulk(pks)
+            for model, pks in wanted.items()
+        }
+    
+    def partition(self, rows):
+        """
+        Validate rows one at a time instead of all-or-nothing. Returns
+        {row index: validated data} for the good rows and {row index:
+        errors} for the rest.
+        """
+        self._context['preloaded'] = self.preload_related(rows)
+        valid, errors = {}, {}
+        for index, row in enumerate(rows):
+            try:
+                valid[index] = self.child.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+        return valid, errors
+    
+    def create(self, validated_data):
+        contracts = [Contract(**row) for row in validated_data]
+        with transaction.atomic():
+            # Rows may carry their own number (e.g. imported history); the
+            # counters move past those before numbering the rest
+            Contract.claim_numbers(contract.contract_number for contract in contracts if contract.contract_number)
+            unnumbered = [contract for contract in contracts if not contract.contract_number]
+            if unnumbered:
+                numbers = Contract.allocate_numbers(len(unnumbered))
+                for contract, number in zip(unnumbered, numbers):
+                    contract.contract_number = number
+            Contract.objects.bulk_create(contracts, batch_size=self.batch_size)
+            # bulk_create bypasses Contract.save; large imports rebuild the rollups once at the end
+            if not self.context.get('defer_rollups'):
+                ContractRollup.objects.record_created(contracts)
+            invalidate_dashboards({contract.trader_id for contract in contracts})
+        return contracts
+
+class ContractBulkCreateSerializer(ContractCreateUpdateSerializer):
+    """ContractCreateUpdateSerializer rules for each row of a bulk create"""
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    
+    class Meta(ContractCreateUpdateSerializer.Meta):
+        list_serializer_class = ContractBulkCreateListSerializer
+
 # ==================== DASHBOARD SERIALIZERS ====================
 
 class DashboardStatsSerializer(serializers.Serializer):
@@ -261,8 +406,23 @@ class DashboardStatsSerializer(serializers.Serializer):
     top_counterparties = serializers.ListField()
     overdue_contracts = serializers.IntegerField()
 
+class TraderLeaderboardSerializer(serializers.Serializer):
+    """One row of trader_leaderboard(), with the trader's name"""
+    trader = serializers.IntegerField()
+    trader_name = serializers.CharField(allow_null=True)
+    notional = serializers.DecimalField(max_digits=36, decimal_places=5)
+    contract_count = serializers.IntegerField()
+    active_volume = serializers.DecimalField(max_digits=24, decimal_places=3)
+    notional_rank = serializers.IntegerField()
+    contract_count_rank = serializers.IntegerField()
+    active_volume_rank = serializers.IntegerField()
+
 # ==================== BULK OPERATIONS SERIALIZERS ====================
 
+class CounterpartyStatisticsBatchSerializer(serializers.Serializer):
+    """Counterparty ids for CounterpartyViewSet.batch_statistics"""
+    counterparty_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+
 class BulkContractUpdateSerializer(serializers.Serializer):
     """Serializer for bulk contract updates"""
     contract_ids = serializers.ListField(child=serializers.IntegerField())
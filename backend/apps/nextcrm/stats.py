@@ -0,0 +1,281 @@
+# apps/nextcrm/stats.py
+from django.db import connections
+from django.db.models import Count, DecimalField, F, Sum, Max, Q, Value, Window
+from django.db.models.functions import Coalesce, Rank
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+from .cache import reference_cache
+from .models import Contract, ContractRollup, ContractStatusRollup, Counterparty, Commodity, Trader
+
+# ==================== DASHBOARD STATISTICS ====================
+
+def month_starts(start_date, end_date):
+    """List the first day of every month between two dates (inclusive)"""
+    months = []
+    current_date = start_date.replace(day=1)
+    while current_date <= end_date:
+        months.append(current_date)
+        current_date = (current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return months
+
+def compute_dashboard_stats(trader=None):
+    """
+    Build the dashboard payload, optionally restricted to one trader.
+
+    Everything except the overdue count is read from the rollup tables,
+    so the cost follows the number of rollup groups rather than contracts:
+    the totals and trends from contract_status_rollups, a row per month,
+    trader and status, and the top lists from contract_rollups.
+    """
+    today = timezone.now().date()
+    status_rollups = ContractStatusRollup.objects.order_by()
+    rollups = ContractRollup.objects.order_by()
+    contracts = Contract.objects.order_by()
+    if trader is not None:
+        status_rollups = status_rollups.filter(trader=trader)
+        rollups = rollups.filter(trader=trader)
+        contracts = contracts.filter(trader=trader)
+
+    # Counts and value per status
+    status_rows = list(status_rollups.values('status').annotate(
+        count=Sum('contract_count'),
+        value=Sum('notional_sum'),
+    ))
+
+    counts = {row['status']: row['count'] for row in status_rows}
+    total_value = sum((row['value'] or Decimal('0') for row in status_rows), Decimal('0'))
+
+    # Equal counts are ordered by status so the list is stable between calls
+    status_distribution = [
+        {'status': row['status'], 'count': row['count']}
+        for row in sorted(status_rows, key=lambda row: (-row['count'], row['status']))
+    ]
+
+    # Overdue contracts depend on delivery_period, which is not a rollup dimension
+    overdue_contracts = contracts.filter(
+        delivery_period__lt=today,
+        status__in=Contract.ACTIVE_STATUSES
+    ).count()
+
+    # Monthly trends (last 12 months)
+    months = month_starts(today - timedelta(days=365), today)
+    monthly_rows = status_rollups.filter(
+        month__gte=months[0],
+    ).values('month').annotate(
+        count=Sum('contract_count'),
+        value=Sum('notional_sum'),
+    )
+    by_month = {row['month']: row for row in monthly_rows}
+
+    monthly_data = []
+    for month in months:
+        row = by_month.get(month, {})
+        monthly_data.append({
+            'month': month.strftime('%Y-%m'),
+            'count': row.get('count') or 0,
+            'value': float(row.get('value') or 0),
+        })
+
+    # Top commodities by value
+    top_commodities = list(rollups.values(
+        'commodity__commodity_name_short'
+    ).annotate(
+        count=Sum('contract_count'),
+        total_value=Sum('notional_sum')
+    ).order_by('-total_value')[:10])
+
+    # Top counterparties by value
+    top_counterparties = list(rollups.values(
+        'counterparty__counterparty_name'
+    ).annotate(
+        count=Sum('contract_count'),
+        total_value=Sum('notional_sum')
+    ).order_by('-total_value')[:10])
+
+    return {
+        'total_contracts': sum(counts.values()),
+        'active_contracts': sum(counts.get(s, 0) for s in Contract.ACTIVE_STATUSES),
+        'pending_contracts': counts.get('draft', 0),
+        'completed_contracts': counts.get('completed', 0),
+        'total_value': total_value,
+        'overdue_contracts': overdue_contracts,
+        'monthly_trends': monthly_data,
+        'status_distribution': status_distribution,
+        'top_commodities': top_commodities,
+        'top_counterparties': top_counterparties,
+    }
+
+def counterparty_statistics(pks):
+    """
+    {pk: contract statistics} for the counterparties among `pks`, from one
+    grouped join of counterparties to contract_rollups with conditional
+    aggregates; pks with no counterparty are left out
+    """
+    rows = Counterparty.objects.filter(pk__in=pks).order_by().values('pk').annotate(
+        total_contracts=Sum('contract_rollups__contract_count'),
+        active_contracts=Sum(
+            'contract_rollups__contract_count',
+            filter=Q(contract_rollups__status__in=Contract.ACTIVE_STATUSES),
+        ),
+        total_value=Sum('contract_rollups__notional_sum'),
+        last_contract_date=Max('contract_rollups__last_date'),
+    )
+    statistics = {}
+    for row in rows:
+        total_contracts = row['total_contracts'] or 0
+        total_value = row['total_value'] or 0
+        statistics[row['pk']] = {
+            'total_contracts': total_contracts,
+            'active_contracts': row['active_contracts'] or 0,
+            'total_value': total_value,
+            'average_contract_value': total_value / total_contracts if total_contracts else 0,
+            'last_contract_date': row['last_contract_date'],
+        }
+    return statistics
+
+# ==================== DELIVERY BUCKETS ====================
+
+# Bucket: (first, last) day of delivery relative to today, inclusive; None is open-ended
+DELIVERY_BUCKETS = {
+    'overdue': (None, -1),
+    '0-7': (0, 7),
+    '8-30': (8, 30),
+}
+
+def delivery_buckets(queryset, today):
+    """
+    Contract count and notional (total_value) of a contract queryset per
+    DELIVERY_BUCKETS entry, from one conditional aggregate
+    """
+    aggregates = {}
+    for name, (first, last) in DELIVERY_BUCKETS.items():
+        condition = Q()
+        if first is not None:
+            condition &= Q(delivery_period__gte=today + timedelta(days=first))
+        if last is not None:
+            condition &= Q(delivery_period__lte=today + timedelta(days=last))
+        aggregates[f'{name}_count'] = Count('pk', filter=condition)
+        aggregates[f'{name}_notional'] = Sum('total_value', filter=condition)
+
+    last_day = max(last for _, last in DELIVERY_BUCKETS.values())
+    totals = queryset.order_by().filter(delivery_period__lte=today + timedelta(days=last_day)).aggregate(**aggregates)
+    return [
+        {
+            'bucket': name,
+            'count': totals[f'{name}_count'],
+            'notional': totals[f'{name}_notional'] or Decimal('0'),
+        }
+        for name in DELIVERY_BUCKETS
+    ]
+
+# ==================== TRADER LEADERBOARD ====================
+
+# Leaderboard measure: (aggregate over contract_status_rollups rows, aggregate over contracts, empty value)
+LEADERBOARD_MEASURES = {
+    'notional': (
+        Sum('notional_sum'),
+        Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=36, decimal_places=5)),
+        Decimal('0'),
+    ),
+    'contract_count': (Sum('contract_count'), Count('id'), 0),
+    'active_volume': (
+        Sum('quantity_sum', filter=Q(status__in=Contract.ACTIVE_STATUSES)),
+        Sum('quantity', filter=Q(status__in=Contract.ACTIVE_STATUSES)),
+        Decimal('0'),
+    ),
+}
+
+def trader_leaderboard(start, end):
+    """
+    Per-trader notional, contract count and active volume (quantity of
+    approved and executed contracts) for contract days in the half-open
+    [start, end), either end open when None, each with its RANK() among
+    the traders, from one GROUP BY. Windows on month boundaries (every
+    year and month period) read contract_status_rollups; others aggregate
+    the contracts in the window. Ordered by notional rank;
+    traders without contracts in the window are left out.
+    """
+    if all(bound is None or bound.day == 1 for bound in (start, end)):
+        rows, date_field, aggregate_index = ContractStatusRollup.objects.order_by(), 'month', 0
+    else:
+        rows, date_field, aggregate_index = Contract.objects.order_by(), 'date', 1
+    if start is not None:
+        rows = rows.filter(**{f'{date_field}__gte': start})
+    if end is not None:
+        rows = rows.filter(**{f'{date_field}__lt': end})
+
+    measures = {
+        name: Coalesce(aggregates[aggregate_index], Value(empty))
+        for name, (*aggregates, empty) in LEADERBOARD_MEASURES.items()
+    }
+    ranks = {
+        f'{name}_rank': Window(Rank(), order_by=F(name).desc())
+        for name in LEADERBOARD_MEASURES
+    }
+    rows = rows.values('trader').annotate(**measures).annotate(**ranks).order_by('notional_rank', 'trader')
+    return list(rows)
+
+# ==================== FACETS ====================
+
+# Facet name: (Contract lookup, (labelled model, name field) or None for the status choices)
+CONTRACT_FACETS = {
+    'status': ('status', None),
+    'trader': ('trader', (Trader, 'trader_name')),
+    'commodity': ('commodity', (Commodity, 'commodity_name_short')),
+    'counterparty': ('counterparty', (Counterparty, 'counterparty_name')),
+}
+
+def contract_facet_counts(queryset, facets):
+    """
+    {facet: [[value, count], ...]} over the rows of a contract queryset,
+    for the CONTRACT_FACETS names in `facets`, in one query: GROUPING SETS
+    on PostgreSQL, a UNION ALL of GROUP BYs over a CTE elsewhere.
+    """
+    columns = {f'facet_{i}': F(CONTRACT_FACETS[facet][0]) for i, facet in enumerate(facets)}
+    inner, params = queryset.order_by().values(**columns).query.sql_with_params()
+    connection = connections[queryset.db]
+    names = [connection.ops.quote_name(column) for column in columns]
+
+    if connection.vendor == 'postgresql':
+        # GROUPING() has a bit set for each column not grouped by in the row's set
+        sql = (
+            f'WITH filtered AS ({inner}) '
+            f'SELECT {", ".join(names)}, COUNT(*), GROUPING({", ".join(names)}) FROM filtered '
+            f'GROUP BY GROUPING SETS ({", ".join(f"({name})" for name in names)})'
+        )
+        last = len(names) - 1
+        which = lambda mask: next(i for i in range(len(names)) if not mask >> (last - i) & 1)
+    else:
+        sql = f'WITH filtered AS ({inner}) ' + ' UNION ALL '.join(
+            f'SELECT {", ".join(name if j == i else "NULL" for j, name in enumerate(names))}, COUNT(*), {i} '
+            f'FROM filtered GROUP BY {name}'
+            for i, name in enumerate(names)
+        )
+        which = lambda index: index
+
+    counts = {facet: [] for facet in facets}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            index = which(row[-1])
+            counts[facets[index]].append([row[index], row[-2]])
+    return counts
+
+def label_facets(counts):
+    """Facet counts as {facet: [{value, label, count}, ...]}, most frequent first"""
+    choices = dict(Contract._meta.get_field('status').flatchoices)
+    facets = {}
+    for facet, values in counts.items():
+        labelled = CONTRACT_FACETS[facet][1]
+        if labelled is None:
+            labels = {value: str(choices.get(value, value)) for value, _ in values}
+        else:
+            model, field = labelled
+            labels = reference_cache.names(model, field, {value for value, _ in values}) if values else {}
+        facets[facet] = sorted(
+            ({'value': value, 'label': labels.get(value), 'count': count} for value, count in values),
+            key=lambda item: (-item['count'], str(item['label'])),
+        )
+    return facets
@@ -0,0 +1,80 @@
+# apps/nextcrm/tests/factories.py
+from datetime import date
+from decimal import Decimal
+
+from apps.nextcrm.models import (
+    Contract, Counterparty, Commodity, Trader, Cost_Center,
+    Sociedad, Broker, Currency, ICOTERM, Trade_Operation_Type,
+    Delivery_Format, Additive, Commodity_Group, Commodity_Type,
+    Commodity_Subtype
+)
+
+def make_reference_data():
+    """Create one row of every reference table a contract points to"""
+    group = Commodity_Group.objects.create(commodity_group_name='Oils')
+    commodity_type = Commodity_Type.objects.create(commodity_type_name='Vegetable')
+    subtype = Commodity_Subtype.objects.create(commodity_subtype_name='Crude')
+    currency = Currency.objects.create(currency_name='Euro', currency_code='EUR', currency_symbol='€')
+
+    return {
+        'trader': Trader.objects.create(trader_name='Alice', email='alice@example.com'),
+        'trade_operation_type': Trade_Operation_Type.objects.create(
+            trade_operation_type_name='Purchase', operation_code='BUY'
+        ),
+        'sociedad': Sociedad.objects.create(sociedad_name='Sovena', tax_id='ES-1'),
+        'counterparty': Counterparty.objects.create(
+            counterparty_name='Acme Oils', counterparty_code='ACME'
+        ),
+        'commodity': Commodity.objects.create(
+            commodity_name_short='Olive Oil', commodity_group=group,
+            commodity_type=commodity_type, commodity_subtype=subtype
+        ),
+        'commodity_group': group,
+        'delivery_format': Delivery_Format.objects.create(
+            delivery_format_name='Bulk', delivery_format_cost=Decimal('10.00')
+        ),
+        'additive': Additive.objects.create(additive_name='None', additive_cost=Decimal('0.00')),
+        'broker': Broker.objects.create(broker_name='Direct', broker_code='DIR'),
+        'icoterm': ICOTERM.objects.create(icoterm_name='Free On Board', icoterm_code='FOB'),
+        'cost_center': Cost_Center.objects.create(cost_center_name='Madrid'),
+        'broker_fee_currency': currency,
+        'trade_currency': currency,
+    }
+
+def make_trader(name):
+    return Trader.objects.create(trader_name=name, email=f'{name.lower()}@example.com')
+
+def make_counterparty(name):
+    return Counterparty.objects.create(counterparty_name=name, counterparty_code=name.upper()[:20])
+
+def contract_values(refs, **overrides):
+    """Field values for an unsaved contract built on the given reference data"""
+    values = dict(refs)
+    values.update({
+        'broker_fee': Decimal('0.00'),
+        'freight_cost': Decimal('0.00'),
+        'forex': Decimal('1.0000'),
+        'price': Decimal('100.00'),
+        'payment_days': 30,
+        'quantity': Decimal('10.000'),
+        'entrega': 'Port of Valencia',
+        'delivery_period': date(2030, 1, 1),
+        'date': date(2024, 1, 1),
+        'status': 'draft',
+    })
+    values.update(overrides)
+    return values
+
+def make_contract(refs, **overrides):
+    return Contract.objects.create(**contract_values(refs, **overrides))
+
+def contract_payload(refs, **overrides):
+    """contract_values as the API receives them: primary keys and strings"""
+    payload = {}
+    for name, value in contract_values(refs, **overrides).items():
+        if hasattr(value, 'pk'):
+            value = value.pk
+        elif isinstance(value, (Decimal, date)):
+            value = str(value)
+        payload[name] = value
+    return payload
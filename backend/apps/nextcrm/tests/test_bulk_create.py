@@ -0,0 +1,80 @@
+# apps/nextcrm/tests/test_bulk_create.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import Contract, ContractRollup
+from .factories import make_reference_data, make_contract, contract_payload
+
+BULK_CREATE_URL = '/api/nextcrm/contracts/bulk_create/'
+
+class BulkCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+
+    def setUp(self):
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, rows):
+        return self.client.post(BULK_CREATE_URL, rows, format='json')
+
+    def test_creates_contracts(self):
+        make_contract(self.refs)
+        rows = [contract_payload(self.refs, price=str(100 + i), status='approved') for i in range(3)]
+        response = self.post(rows)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created_contracts'], 3)
+        year = timezone.now().year
+        self.assertEqual(
+            [row['contract_number'] for row in response.json()['contracts']],
+            [f'CONT-{year}-{n:06d}' for n in (2, 3, 4)]
+        )
+        self.assertEqual(Contract.objects.get(pk=response.json()['contracts'][2]['id']).price, Decimal('102.00'))
+
+        # Rollups match a full rebuild
+        synced = sorted(ContractRollup.objects.values_list('status', 'contract_count', 'notional_sum'))
+        ContractRollup.objects.rebuild()
+        self.assertEqual(synced, sorted(ContractRollup.objects.values_list('status', 'contract_count', 'notional_sum')))
+
+    def test_query_count_independent_of_rows(self):
+        def queries(count):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.post([contract_payload(self.refs)] * count).status_code, 201)
+            # bulk_create splits the INSERT into batches, fewer on PostgreSQL than on SQLite
+            return len([q for q in context.captured_queries if not q['sql'].startswith('INSERT INTO "contracts"')])
+
+        queries(1)  # creates the counter and rollup rows
+        self.assertEqual(queries(5), queries(200))
+
+    def test_per_row_errors(self):
+        rows = [
+            contract_payload(self.refs),
+            contract_payload(self.refs, quantity='0'),
+            contract_payload(self.refs, counterparty=999999),
+            contract_payload(self.refs, trader='abc'),
+        ]
+        response = self.post(rows)
+
+        self.assertEqual(response.status_code, 400)
+        # Errors are keyed by the index of each invalid row
+        errors = response.json()
+        self.assertEqual(set(errors), {'1', '2', '3'})
+        self.assertIn('quantity', errors['1'])
+        self.assertIn('does not exist', errors['2']['counterparty'][0])
+        self.assertIn('trader', errors['3'])
+        self.assertFalse(Contract.objects.exists())
+
+    def test_rejects_empty_and_non_list(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post(contract_payload(self.refs)).status_code, 400)
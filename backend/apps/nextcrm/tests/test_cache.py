@@ -0,0 +1,98 @@
+# apps/nextcrm/tests/test_cache.py
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import get_dashboard_stats, get_or_compute, invalidate_dashboards
+from .factories import make_reference_data, make_contract
+
+DASHBOARD_URL = '/api/nextcrm/contracts/dashboard_stats/'
+
+class DashboardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.contract = make_contract(cls.refs)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_call_is_served_from_cache(self):
+        self.client.get(DASHBOARD_URL)
+        with self.assertNumQueries(0):
+            response = self.client.get(DASHBOARD_URL)
+        self.assertEqual(response.json()['total_contracts'], 1)
+
+    def test_save_invalidates(self):
+        self.client.get(DASHBOARD_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_contract(self.refs)
+
+        self.assertEqual(self.client.get(DASHBOARD_URL).json()['total_contracts'], 2)
+
+    def test_bulk_update_invalidates(self):
+        self.client.get(DASHBOARD_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/nextcrm/contracts/bulk_update/', {
+                'contract_ids': [self.contract.pk], 'status': 'approved',
+            }, format='json')
+
+        self.assertEqual(self.client.get(DASHBOARD_URL).json()['active_contracts'], 1)
+
+    def test_scopes_are_invalidated_independently(self):
+        calls = []
+
+        def compute(scope):
+            def inner():
+                calls.append(scope)
+                return scope
+            return inner
+
+        for trader in (None, 1, 2):
+            get_dashboard_stats(trader, compute(trader))
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_dashboards({1})
+        for trader in (None, 1, 2):
+            get_dashboard_stats(trader, compute(trader))
+
+        # Trader 1 and the whole-book scope recompute, trader 2 stays cached
+        self.assertEqual(calls, [None, 1, 2, None, 1])
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'payload'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute('k', compute, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['payload'] * 8)
+
+    def test_waits_for_other_process(self):
+        # Another process holds the lock and publishes the value shortly
+        cache.add('k:lock', 1)
+        threading.Timer(0.1, lambda: cache.set('k', 'theirs')).start()
+
+        self.assertEqual(get_or_compute('k', lambda: 'ours', 60), 'theirs')
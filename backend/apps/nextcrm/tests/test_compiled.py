@@ -0,0 +1,116 @@
+# apps/nextcrm/tests/test_compiled.py
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.compiled import CompiledSerializer, decimal_converter
+from apps.nextcrm.models import Contract
+from apps.nextcrm.views import ContractViewSet, CounterpartyViewSet
+from .factories import make_reference_data, make_contract, make_counterparty, make_trader
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+COUNTERPARTIES_URL = '/api/nextcrm/counterparties/'
+
+class ConverterTests(TestCase):
+    def test_decimal_matches_field(self):
+        for kwargs in [
+            {'max_digits': 15, 'decimal_places': 2},
+            {'max_digits': 6, 'decimal_places': 3, 'rounding': 'ROUND_DOWN'},
+            {'max_digits': 30, 'decimal_places': 5, 'coerce_to_string': False},
+            {'max_digits': 10, 'decimal_places': 2, 'normalize_output': True},
+        ]:
+            field = serializers.DecimalField(**kwargs)
+            convert = decimal_converter(field)
+            for value in [Decimal('1.005'), Decimal('-12.3456'), Decimal('0'), 7, 2.5]:
+                self.assertEqual(convert(value), field.to_representation(value), (kwargs, value))
+
+    def test_unsupported_field_is_rejected(self):
+        class Unsupported(serializers.ModelSerializer):
+            guess = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Contract
+                fields = ['id', 'guess']
+
+        with self.assertRaises(ImproperlyConfigured):
+            CompiledSerializer(Unsupported)
+
+class CompiledListParityTests(TestCase):
+    """The compiled path renders the same bytes as the serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        today = timezone.now().date()
+        traders = [cls.refs['trader'], make_trader('Bob')]
+        counterparties = [make_counterparty(f'Counterparty {i}') for i in range(5)]
+        for i in range(12):
+            make_contract(
+                cls.refs, trader=traders[i % 2],
+                counterparty=counterparties[i % 5] if i % 3 else cls.refs['counterparty'],
+                price=Decimal('99.99') + i, quantity=Decimal('0.125') * (i + 1),
+                status=['draft', 'approved', 'executed', 'completed'][i % 4],
+                delivery_period=today + timedelta(days=i * 7 - 30),
+                date=date(2024, 1, 1) + timedelta(days=i),
+            )
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertSameBytes(self, viewset, url, params=None):
+        compiled = self.client.get(url, params)
+        with mock.patch.object(viewset, 'compiled_list', False):
+            regular = self.client.get(url, params)
+        self.assertEqual(compiled.status_code, 200)
+        self.assertEqual(compiled.content, regular.content)
+        return compiled
+
+    def test_contract_list(self):
+        response = self.assertSameBytes(ContractViewSet, CONTRACTS_URL)
+        self.assertEqual(len(response.json()['results']), 12)
+
+    def test_contract_list_filtered_and_ordered(self):
+        for params in [
+            {'status': 'approved'},
+            {'ordering': 'total_value'},
+            {'ordering': '-price'},
+            {'search': 'counterparty 3'},
+        ]:
+            with self.subTest(**params):
+                self.assertSameBytes(ContractViewSet, CONTRACTS_URL, params)
+
+    def test_contract_cursor_pages(self):
+        params = {'pagination': 'cursor', 'ordering': 'date', 'page_size': 5}
+        response = self.assertSameBytes(ContractViewSet, CONTRACTS_URL, params)
+        cursor = response.json()['next']
+        self.assertIsNotNone(cursor)
+        self.assertSameBytes(ContractViewSet, cursor)
+
+    def test_overdue_and_upcoming(self):
+        self.assertTrue(self.assertSameBytes(ContractViewSet, f'{CONTRACTS_URL}overdue/').json()['results'])
+        self.assertTrue(self.assertSameBytes(ContractViewSet, f'{CONTRACTS_URL}upcoming_deliveries/').json()['results'])
+
+    def test_counterparty_list(self):
+        response = self.assertSameBytes(CounterpartyViewSet, COUNTERPARTIES_URL)
+        totals = {row['counterparty_name']: row['total_contracts'] for row in response.json()['results']}
+        self.assertEqual(totals['Acme Oils'], 4)
+        self.assertEqual(sum(totals.values()), 12)
+
+    def test_counterparty_list_query_count(self):
+        self.client.get(COUNTERPARTIES_URL)
+        # count and page, with contract totals in the page query
+        with self.assertNumQueries(2):
+            self.client.get(COUNTERPARTIES_URL)
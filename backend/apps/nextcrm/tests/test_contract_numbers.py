@@ -0,0 +1,81 @@
+# apps/nextcrm/tests/test_contract_numbers.py
+import threading
+
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.nextcrm.models import Contract, ContractNumberCounter
+from .factories import make_reference_data, make_contract
+
+class ContractNumberTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.refs = make_reference_data()
+        cls.year = timezone.now().year
+
+    def test_sequential_numbers(self):
+        first = make_contract(self.refs)
+        second = make_contract(self.refs)
+        self.assertEqual(first.contract_number, f'CONT-{self.year}-000001')
+        self.assertEqual(second.contract_number, f'CONT-{self.year}-000002')
+
+    def test_counter_seeded_from_existing_numbers(self):
+        make_contract(self.refs, contract_number=f'CONT-{self.year}-000041')
+        make_contract(self.refs, contract_number=f'CONT-{self.year - 1}-000900')
+        self.assertEqual(make_contract(self.refs).contract_number, f'CONT-{self.year}-000042')
+
+    def test_reserve_block(self):
+        self.assertEqual(list(ContractNumberCounter.objects.reserve(2030, 3)), [1, 2, 3])
+        self.assertEqual(list(ContractNumberCounter.objects.reserve(2030, 2)), [4, 5])
+        self.assertEqual(Contract.allocate_numbers(1, year=2030), ['CONT-2030-000006'])
+
+    def test_no_scan_of_existing_numbers(self):
+        make_contract(self.refs)
+        # Allocation is one UPDATE and one SELECT of the counter row
+        with self.assertNumQueries(2):
+            Contract.allocate_numbers(5)
+
+    def test_rolled_back_save_releases_number(self):
+        make_contract(self.refs)
+        with self.assertRaises(IntegrityError):
+            make_contract(self.refs, price=None)
+        self.assertEqual(make_contract(self.refs).contract_number, f'CONT-{self.year}-000002')
+
+class ConcurrentNumberingTests(TransactionTestCase):
+    workers = 8
+    per_worker = 10
+
+    def setUp(self):
+        # Threads need their own connections to one database, which an
+        # in-memory SQLite test database cannot give them
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('needs a test database that accepts concurrent connections')
+
+    def test_parallel_creates_get_unique_numbers(self):
+        refs = make_reference_data()
+        errors = []
+        barrier = threading.Barrier(self.workers)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.per_worker):
+                    make_contract(refs)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        numbers = sorted(Contract.objects.values_list('contract_number', flat=True))
+        year = timezone.now().year
+        self.assertEqual(numbers, [
+            f'CONT-{year}-{n:06d}' for n in range(1, self.workers * self.per_worker + 1)
+        ])
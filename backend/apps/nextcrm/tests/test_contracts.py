@@ -0,0 +1,173 @@
+# apps/nextcrm/tests/test_contracts.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import Contract
+from .factories import make_reference_data, make_contract
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+
+class TotalValueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        cls.small = make_contract(refs, price=Decimal('10.00'), quantity=Decimal('2.000'))
+        cls.medium = make_contract(refs, price=Decimal('5.00'), quantity=Decimal('40.000'))
+        cls.large = make_contract(refs, price=Decimal('300.00'), quantity=Decimal('1.500'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, params):
+        return [row['id'] for row in self.client.get(CONTRACTS_URL, params).json()['results']]
+
+    def test_computed_by_database(self):
+        self.assertEqual(Contract.objects.get(pk=self.large.pk).total_value, Decimal('450.00000'))
+
+        # Stays in sync through queryset updates, which bypass save()
+        Contract.objects.filter(pk=self.small.pk).update(price=Decimal('100.00'))
+        self.assertEqual(Contract.objects.get(pk=self.small.pk).total_value, Decimal('200.00000'))
+
+    def test_filter_and_order(self):
+        self.assertEqual(
+            self.ids({'ordering': 'total_value'}),
+            [self.small.pk, self.medium.pk, self.large.pk]
+        )
+        self.assertEqual(
+            self.ids({'total_value__gte': '100', 'total_value__lte': '300', 'ordering': '-total_value'}),
+            [self.medium.pk]
+        )
+
+    def test_counterparty_total_contract_value(self):
+        counterparty = self.small.counterparty
+        data = self.client.get(f'/api/nextcrm/counterparties/{counterparty.pk}/').json()
+        self.assertEqual(data['total_contract_value'], 20.0 + 200.0 + 450.0)
+
+class ComputedFieldTests(TestCase):
+    """is_overdue and days_until_delivery, annotated by Contract.objects.with_computed()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        today = timezone.now().date()
+        cls.late_draft = make_contract(refs, status='draft', delivery_period=today - timedelta(days=3))
+        cls.late_done = make_contract(refs, status='completed', delivery_period=today - timedelta(days=10))
+        cls.due_today = make_contract(refs, status='approved', delivery_period=today)
+        cls.next_week = make_contract(refs, status='executed', delivery_period=today + timedelta(days=7))
+
+    def setUp(self):
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rows(self, params=None):
+        return self.client.get(CONTRACTS_URL, params).json()['results']
+
+    def test_values(self):
+        rows = {row['id']: row['is_overdue'] for row in self.rows()}
+        self.assertEqual(rows, {
+            self.late_draft.pk: True, self.late_done.pk: False,
+            self.due_today.pk: False, self.next_week.pk: False,
+        })
+
+        detail = self.client.get(f'{CONTRACTS_URL}{self.late_done.pk}/').json()
+        self.assertEqual((detail['is_overdue'], detail['days_until_delivery']), (False, -10))
+        detail = self.client.get(f'{CONTRACTS_URL}{self.next_week.pk}/').json()
+        self.assertEqual(detail['days_until_delivery'], 7)
+
+    def test_filter_on_columns(self):
+        self.rows()
+        with self.assertNumQueries(2) as queries:
+            rows = self.rows({'is_overdue': 'true'})
+        self.assertEqual([row['id'] for row in rows], [self.late_draft.pk])
+        where = queries.captured_queries[-1]['sql'].split(' WHERE ')[1]
+        self.assertIn('"delivery_period" <', where)
+        self.assertNotIn('CASE', where)
+
+        self.assertEqual(
+            sorted(row['id'] for row in self.rows({'is_overdue': 'false'})),
+            [self.late_done.pk, self.due_today.pk, self.next_week.pk],
+        )
+
+    def test_order_by_days_until_delivery(self):
+        self.assertEqual(
+            [row['id'] for row in self.rows({'ordering': 'days_until_delivery'})],
+            [self.late_done.pk, self.late_draft.pk, self.due_today.pk, self.next_week.pk],
+        )
+        self.assertEqual(
+            [row['id'] for row in self.rows({'ordering': '-days_until_delivery', 'pagination': 'cursor'})],
+            [self.next_week.pk, self.due_today.pk, self.late_draft.pk, self.late_done.pk],
+        )
+
+class DeliveryListTests(TestCase):
+    """overdue and upcoming_deliveries: open contracts, cursor pages in delivery order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        today = timezone.now().date()
+        day = lambda offset: today + timedelta(days=offset)
+        cls.overdue = [
+            make_contract(cls.refs, status='approved', delivery_period=day(-5), price=Decimal('10.00')),
+            make_contract(cls.refs, status='executed', delivery_period=day(-20), price=Decimal('20.00')),
+            make_contract(cls.refs, status='executed', delivery_period=day(-5), price=Decimal('30.00')),
+        ]
+        cls.this_week = make_contract(cls.refs, status='approved', delivery_period=day(7), price=Decimal('40.00'))
+        cls.this_month = make_contract(cls.refs, status='approved', delivery_period=day(8), price=Decimal('50.00'))
+        # Closed, draft or too far out: in no list or bucket
+        make_contract(cls.refs, status='completed', delivery_period=day(-3))
+        make_contract(cls.refs, status='draft', delivery_period=day(2))
+        make_contract(cls.refs, status='approved', delivery_period=day(31))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, action, params=None):
+        response = self.client.get(f'{CONTRACTS_URL}{action}/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def ids(self, data):
+        return [row['id'] for row in data['results']]
+
+    def test_cursor_pages_in_delivery_order(self):
+        late, oldest, same_day = self.overdue
+        page = self.get('overdue', {'page_size': 2})
+        self.assertNotIn('count', page)
+        self.assertEqual(self.ids(page), [oldest.pk, late.pk])
+        page = self.client.get(page['next']).json()
+        self.assertEqual(self.ids(page), [same_day.pk])
+        self.assertIsNone(page['next'])
+
+        self.assertEqual(self.ids(self.get('upcoming_deliveries')), [self.this_week.pk, self.this_month.pk])
+
+    def test_filters_and_ordering(self):
+        late, oldest, same_day = self.overdue
+        self.assertEqual(self.ids(self.get('overdue', {'status': 'executed'})), [oldest.pk, same_day.pk])
+        self.assertEqual(self.ids(self.get('overdue', {'ordering': '-price'})), [same_day.pk, oldest.pk, late.pk])
+        page = self.get('overdue', {'pagination': 'page'})
+        self.assertEqual((page['count'], self.ids(page)), (3, [oldest.pk, late.pk, same_day.pk]))
+
+    def test_summary(self):
+        expected = [
+            {'bucket': 'overdue', 'count': 3, 'notional': 600.0},
+            {'bucket': '0-7', 'count': 1, 'notional': 400.0},
+            {'bucket': '8-30', 'count': 1, 'notional': 500.0},
+        ]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get('overdue', {'summary': '1'}), {'buckets': expected})
+        self.assertEqual(self.get('upcoming_deliveries', {'summary': '1'}), {'buckets': expected})
+
+        buckets = self.get('overdue', {'summary': '1', 'price__gte': '30'})['buckets']
+        self.assertEqual([bucket['count'] for bucket in buckets], [1, 1, 1])
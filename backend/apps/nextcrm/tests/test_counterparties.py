@@ -0,0 +1,146 @@
+# apps/nextcrm/tests/test_counterparties.py
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import Counterparty
+from .factories import make_reference_data, make_contract, make_counterparty, make_trader
+
+COUNTERPARTIES_URL = '/api/nextcrm/counterparties/'
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+
+class CounterpartyTotalsTests(TestCase):
+    """Contract totals annotated by Counterparty.objects.with_contract_totals()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.counterparty = cls.refs['counterparty']
+        make_contract(cls.refs, price=Decimal('10.00'), quantity=Decimal('2.000'), date=date(2024, 3, 1))
+        make_contract(cls.refs, price=Decimal('5.00'), quantity=Decimal('40.000'), date=date(2024, 5, 20))
+        cls.idle = make_counterparty('Idle Trading')
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_detail(self):
+        data = self.client.get(f'{COUNTERPARTIES_URL}{self.counterparty.pk}/').json()
+        self.assertEqual(data['total_contracts'], 2)
+        self.assertEqual(data['total_contract_value'], 220.0)
+        self.assertEqual(data['last_contract_date'], '2024-05-20')
+
+    def test_without_contracts(self):
+        data = self.client.get(f'{COUNTERPARTIES_URL}{self.idle.pk}/').json()
+        self.assertEqual(data['total_contracts'], 0)
+        self.assertEqual(data['total_contract_value'], 0)
+        self.assertIsNone(data['last_contract_date'])
+
+    def test_write_responses(self):
+        response = self.client.post(COUNTERPARTIES_URL, {'counterparty_name': 'New', 'counterparty_code': 'NEW'})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['total_contracts'], 0)
+
+        response = self.client.patch(f'{COUNTERPARTIES_URL}{self.counterparty.pk}/', {'city': 'Jaén'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['total_contracts'], 2)
+
+    def test_list(self):
+        rows = {row['id_counterparty']: row for row in self.client.get(COUNTERPARTIES_URL).json()['results']}
+        self.assertEqual(rows[self.counterparty.pk]['total_contracts'], 2)
+        self.assertEqual(rows[self.idle.pk]['total_contracts'], 0)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        url = f'{COUNTERPARTIES_URL}{self.counterparty.pk}/'
+        list_queries, detail_queries = self.count_queries(COUNTERPARTIES_URL), self.count_queries(url)
+        Counterparty.objects.bulk_create(
+            Counterparty(counterparty_name=f'Buyer {i}', counterparty_code=f'B{i}') for i in range(30)
+        )
+        for i in range(5):
+            make_contract(self.refs)
+        self.assertEqual(self.count_queries(COUNTERPARTIES_URL), list_queries)
+        self.assertEqual(self.count_queries(url), detail_queries)
+
+class CounterpartyContractsTests(TestCase):
+    """counterparties/<pk>/contracts/ lists like ContractViewSet"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.counterparty = cls.refs['counterparty']
+        cls.bob = make_trader('Bob')
+        cls.contracts = [
+            make_contract(cls.refs, status='approved', date=date(2024, 1, 10)),
+            make_contract(cls.refs, status='draft', date=date(2024, 2, 10)),
+            make_contract(cls.refs, trader=cls.bob, status='executed', date=date(2024, 3, 10)),
+        ]
+        cls.other = make_contract(cls.refs, counterparty=make_counterparty('Other'))
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def url(self, counterparty=None):
+        return f'{COUNTERPARTIES_URL}{(counterparty or self.counterparty).pk}/contracts/'
+
+    def ids(self, params=None, client=None):
+        response = (client or self.client).get(self.url(), params or {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_matches_the_contract_list(self):
+        params = {'counterparty': self.counterparty.pk}
+        self.assertEqual(
+            self.client.get(self.url()).json()['results'],
+            self.client.get(CONTRACTS_URL, params).json()['results'],
+        )
+
+    def test_filters_search_and_ordering(self):
+        first, second, third = self.contracts
+        self.assertEqual(self.ids(), [third.pk, second.pk, first.pk])
+        self.assertEqual(self.ids({'status': 'draft'}), [second.pk])
+        self.assertEqual(self.ids({'ordering': 'date'}), [first.pk, second.pk, third.pk])
+        self.assertEqual(self.ids({'search': 'Bob'}), [third.pk])
+
+    def test_paginated(self):
+        response = self.client.get(self.url(), {'pagination': 'cursor', 'page_size': 2}).json()
+        self.assertEqual(len(response['results']), 2)
+        self.assertIn(self.url(), response['next'])
+        self.assertEqual(self.client.get(self.url()).json()['count'], 3)
+
+    def test_trader_scoping(self):
+        user = User.objects.create_user('bob', password='x')
+        user.trader = self.bob
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(self.ids(client=client), [self.contracts[2].pk])
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.ids()  # reference tables
+        with CaptureQueriesContext(connection) as queries:
+            self.ids()
+        for trader in [self.bob] * 5 + [self.refs['trader']] * 5:
+            make_contract(self.refs, trader=trader)
+        with self.assertNumQueries(len(queries)):
+            self.ids()
+
+    def test_missing_counterparty(self):
+        self.assertEqual(self.client.get(f'{COUNTERPARTIES_URL}0/contracts/').status_code, 404)
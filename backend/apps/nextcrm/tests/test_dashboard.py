@@ -0,0 +1,101 @@
+# apps/nextcrm/tests/test_dashboard.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.nextcrm.models import Contract
+from apps.nextcrm.serializers import DashboardStatsSerializer
+from .factories import make_reference_data, make_contract, make_counterparty
+
+DASHBOARD_URL = '/api/nextcrm/contracts/dashboard_stats/'
+
+def top_by_value(queryset, field):
+    # total_value is a model field, so the annotation needs another name
+    rows = queryset.values(field).annotate(
+        count=Count('id'), value=Sum('total_value')
+    ).order_by('-value')[:10]
+    return [{field: row[field], 'count': row['count'], 'total_value': row['value']} for row in rows]
+
+def legacy_dashboard_stats(queryset):
+    """The original per-month implementation, valued at notional, kept as the reference output"""
+    today = timezone.now().date()
+    monthly_data = []
+    current_date = (today - timedelta(days=365)).replace(day=1)
+    while current_date <= today:
+        next_month = (current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+        month_contracts = queryset.filter(date__gte=current_date, date__lt=next_month)
+        monthly_data.append({
+            'month': current_date.strftime('%Y-%m'),
+            'count': month_contracts.count(),
+            'value': float(month_contracts.aggregate(Sum('total_value'))['total_value__sum'] or 0)
+        })
+        current_date = next_month
+
+    return {
+        'total_contracts': queryset.count(),
+        'active_contracts': queryset.filter(status__in=['approved', 'executed']).count(),
+        'pending_contracts': queryset.filter(status='draft').count(),
+        'completed_contracts': queryset.filter(status='completed').count(),
+        'total_value': queryset.aggregate(total=Sum('total_value'))['total'] or Decimal('0'),
+        'overdue_contracts': queryset.filter(
+            delivery_period__lt=today, status__in=['approved', 'executed']
+        ).count(),
+        'monthly_trends': monthly_data,
+        'status_distribution': list(queryset.values('status').annotate(
+            count=Count('id')
+        ).order_by('-count', 'status')),
+        'top_commodities': top_by_value(queryset, 'commodity__commodity_name_short'),
+        'top_counterparties': top_by_value(queryset, 'counterparty__counterparty_name'),
+    }
+
+class DashboardStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        other = make_counterparty('Beta Trading')
+        today = timezone.now().date()
+
+        statuses = ['draft', 'approved', 'approved', 'executed', 'completed', 'cancelled']
+        for i in range(30):
+            make_contract(
+                cls.refs,
+                status=statuses[i % len(statuses)],
+                date=today - timedelta(days=17 * i),
+                delivery_period=today + timedelta(days=(i % 5 - 2) * 20),
+                price=Decimal('100.00') + i,
+                counterparty=other if i % 3 else cls.refs['counterparty'],
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_matches_legacy_output(self):
+        response = self.client.get(DASHBOARD_URL)
+        self.assertEqual(response.status_code, 200)
+
+        expected = DashboardStatsSerializer(legacy_dashboard_stats(Contract.objects.all())).data
+        self.assertEqual(response.json(), expected)
+        self.assertEqual(len(response.json()['monthly_trends']), 13)
+
+    def test_empty_book(self):
+        Contract.objects.all().delete()
+        response = self.client.get(DASHBOARD_URL)
+
+        data = response.json()
+        self.assertEqual(data['total_contracts'], 0)
+        self.assertEqual(data['total_value'], '0.00')
+        self.assertTrue(all(month['count'] == 0 for month in data['monthly_trends']))
+
+    def test_query_count(self):
+        # status breakdown, overdue, monthly trends, top commodities, top counterparties
+        with self.assertNumQueries(5):
+            self.client.get(DASHBOARD_URL)
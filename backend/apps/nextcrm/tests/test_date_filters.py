@@ -0,0 +1,79 @@
+# apps/nextcrm/tests/test_date_filters.py
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.nextcrm.filters import ContractFilter
+from apps.nextcrm.models import Contract
+from .factories import make_reference_data, make_contract
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+
+DATES = [
+    date(2023, 12, 31), date(2024, 1, 1), date(2024, 2, 29), date(2024, 3, 1),
+    date(2024, 3, 31), date(2024, 12, 31), date(2025, 1, 1),
+]
+
+class SargableDateFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        for day in DATES:
+            make_contract(refs, date=day, delivery_period=day)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def dates(self, params):
+        response = self.client.get(CONTRACTS_URL, {**params, 'ordering': 'date'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [date.fromisoformat(row['date']) for row in response.json()['results']]
+
+    def sql(self, params):
+        filterset = ContractFilter(params, queryset=Contract.objects.all())
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return str(filterset.qs.query)
+
+    def test_year_and_month(self):
+        self.assertEqual(self.dates({'date__year': 2024}), DATES[1:6])
+        self.assertEqual(self.dates({'date__year': 2024, 'date__month': 3}), DATES[3:5])
+        self.assertEqual(self.dates({'date__year': 2024, 'date__month': 12}), [DATES[5]])
+        self.assertEqual(self.dates({'date__year': 2024, 'date__month': 13}), [])
+        # A month on its own is every year's
+        self.assertEqual(self.dates({'date__month': 12}), [DATES[0], DATES[5]])
+
+    def test_sql_is_sargable(self):
+        sql = self.sql({'date__year': '2024', 'date__month': '3'})
+        self.assertIn('"contracts"."date" >= 2024-03-01', sql)
+        self.assertIn('"contracts"."date" < 2024-04-01', sql)
+        self.assertNotIn('extract', sql.lower())
+
+        sql = self.sql({'date_range': '2024-01,2024-02', 'delivery_month': '2024-02'})
+        self.assertIn('"contracts"."date" < 2024-03-01', sql)
+        self.assertIn('"contracts"."delivery_period" >= 2024-02-01', sql)
+        self.assertNotIn('extract', sql.lower())
+
+    def test_date_range(self):
+        self.assertEqual(self.dates({'date_range': '2024'}), DATES[1:6])
+        self.assertEqual(self.dates({'date_range': '2024-02'}), [DATES[2]])
+        self.assertEqual(self.dates({'date_range': '2024-02-29'}), [DATES[2]])
+        self.assertEqual(self.dates({'date_range': '2024-01-01,2024-03'}), DATES[1:5])
+        self.assertEqual(self.dates({'date_range': '2024-12-31,'}), DATES[5:])
+        self.assertEqual(self.dates({'date_range': ',2023'}), DATES[:1])
+
+    def test_delivery_month(self):
+        self.assertEqual(self.dates({'delivery_month': '2024-03'}), DATES[3:5])
+
+    def test_invalid_periods(self):
+        for params in [
+            {'date_range': '2024-02-30'}, {'date_range': '2024-03,2024-01'}, {'date_range': 'soon'},
+            {'delivery_month': '2024'}, {'delivery_month': '2024-13'},
+        ]:
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(CONTRACTS_URL, params).status_code, 400)
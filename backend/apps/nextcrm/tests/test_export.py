@@ -0,0 +1,75 @@
+# apps/nextcrm/tests/test_export.py
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.nextcrm.models import Contract
+from .factories import make_reference_data, make_contract, make_counterparty
+
+EXPORT_URL = '/api/nextcrm/contracts/export/'
+
+class ContractExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        olive = make_counterparty('Olivar del Sur')
+        for i in range(5):
+            make_contract(refs, date=date(2024, 1, 1 + i), price=Decimal('100.00') + i,
+                          delivery_period=date(2024, 6, 1 + (i * 3) % 5), status='approved' if i % 2 else 'draft')
+        make_contract(refs, counterparty=olive, notes='harvest', date=date(2024, 2, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_follows_list_filters_and_ordering(self):
+        response = self.client.get(EXPORT_URL, {'format': 'csv', 'status': 'draft', 'ordering': 'price'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="contracts-', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        expected = Contract.objects.filter(status='draft').order_by('price', 'id')
+        self.assertEqual([int(row['id']) for row in rows], list(expected.values_list('id', flat=True)))
+        self.assertEqual(rows[0]['counterparty_name'], 'Acme Oils')
+        self.assertEqual(rows[0]['total_value'], '1000.00000')
+
+    def test_ndjson_with_search(self):
+        response = self.client.get(EXPORT_URL, {'search': 'harvest'}, HTTP_ACCEPT='application/x-ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['counterparty_name'], 'Olivar del Sur')
+        self.assertEqual(lines[0]['date'], '2024-02-01')
+
+    def test_single_query_without_per_row_joins(self):
+        response = self.client.get(EXPORT_URL)
+        with self.assertNumQueries(1):
+            content = self.content(response)
+        self.assertEqual(len(content.splitlines()), 7)
+
+    def test_ordering_by_computed_field(self):
+        response = self.client.get(EXPORT_URL, {'format': 'csv', 'ordering': '-days_until_delivery'})
+        self.assertEqual(response.status_code, 200)
+
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        expected = Contract.objects.with_computed().order_by('-days_until_delivery', 'id')
+        self.assertEqual([int(row['id']) for row in rows], list(expected.values_list('id', flat=True)))
+
+    def test_invalid_filter(self):
+        response = self.client.get(EXPORT_URL, {'date__gte': 'not-a-date'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date__gte', json.loads(response.content))
@@ -0,0 +1,112 @@
+# apps/nextcrm/tests/test_facets.py
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import Contract
+from apps.nextcrm.stats import contract_facet_counts
+from .factories import make_reference_data, make_contract, make_counterparty, make_trader
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+FACETS = 'status,trader,commodity,counterparty'
+
+def facet_queries(queries):
+    return [query['sql'] for query in queries.captured_queries if query['sql'].startswith('WITH filtered')]
+
+class ContractFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.bob = make_trader('Bob')
+        counterparties = [cls.refs['counterparty'], make_counterparty('Beta Foods')]
+        for i in range(9):
+            make_contract(
+                cls.refs, trader=cls.bob if i % 3 == 0 else cls.refs['trader'],
+                counterparty=counterparties[i % 2], status=['draft', 'approved', 'executed'][i % 3],
+            )
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def facets(self, params=None, client=None):
+        response = (client or self.client).get(CONTRACTS_URL, {'facets': FACETS, **(params or {})})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['facets']
+
+    def expected(self, queryset):
+        counts = {}
+        for facet in ['status', 'trader_id', 'commodity_id', 'counterparty_id']:
+            counts[facet] = Counter(queryset.values_list(facet, flat=True))
+        return counts
+
+    def test_counts_follow_the_filters(self):
+        for params, queryset in [
+            ({}, Contract.objects.all()),
+            ({'status': 'draft'}, Contract.objects.filter(status='draft')),
+            ({'trader': self.bob.pk}, Contract.objects.filter(trader=self.bob)),
+        ]:
+            with self.subTest(**params):
+                facets = self.facets(params)
+                expected = self.expected(queryset)
+                self.assertEqual({item['value']: item['count'] for item in facets['status']}, expected['status'])
+                self.assertEqual({item['value']: item['count'] for item in facets['trader']}, expected['trader_id'])
+                self.assertEqual(
+                    {item['value']: item['count'] for item in facets['counterparty']}, expected['counterparty_id'],
+                )
+
+    def test_labels(self):
+        facets = self.facets()
+        self.assertEqual(facets['trader'], [
+            {'value': self.refs['trader'].pk, 'label': 'Alice', 'count': 6},
+            {'value': self.bob.pk, 'label': 'Bob', 'count': 3},
+        ])
+        self.assertEqual(facets['status'][0]['label'], 'Approved')
+        self.assertEqual(facets['commodity'], [{'value': self.refs['commodity'].pk, 'label': 'Olive Oil', 'count': 9}])
+
+    def test_one_grouped_query_then_cached(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.facets({'status': 'approved'})
+        self.assertEqual(len(facet_queries(queries)), 1)
+
+        # Pagination, ordering and parameter order do not change the cache key
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(CONTRACTS_URL, {'ordering': 'price', 'status': 'approved', 'facets': FACETS})
+            self.client.get(CONTRACTS_URL, {'facets': FACETS, 'status': 'approved', 'pagination': 'cursor'})
+        self.assertEqual(facet_queries(queries), [])
+
+    def test_contract_write_invalidates(self):
+        self.assertNotIn('completed', [item['value'] for item in self.facets()['status']])
+        with self.captureOnCommitCallbacks(execute=True):
+            make_contract(self.refs, status='completed')
+        status = {item['value']: item['count'] for item in self.facets()['status']}
+        self.assertEqual(status['completed'], 1)
+
+    def test_scoped_to_the_users_trader(self):
+        user = User.objects.create_user('bob', password='x')
+        user.trader = self.bob
+        client = APIClient()
+        client.force_authenticate(user)
+        facets = self.facets(client=client)
+        self.assertEqual(facets['trader'], [{'value': self.bob.pk, 'label': 'Bob', 'count': 3}])
+
+    def test_unknown_facet(self):
+        response = self.client.get(CONTRACTS_URL, {'facets': 'status,colour'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('colour', response.json()['facets'][0])
+
+    def test_without_facets(self):
+        self.assertNotIn('facets', self.client.get(CONTRACTS_URL).json())
+
+    def test_single_facet(self):
+        counts = contract_facet_counts(Contract.objects.filter(status='executed'), ['status'])
+        self.assertEqual(counts, {'status': [['executed', 3]]})
@@ -0,0 +1,171 @@
+# apps/nextcrm/tests/test_import.py
+import csv
+import datetime
+import io
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.importers import ContractImporter, read_rows
+from apps.nextcrm.models import Contract, ContractRollup
+from .factories import make_reference_data, make_contract, make_counterparty
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+HEADER = [
+    'Contract Number', 'Trader', 'Trade Operation Type', 'Sociedad', 'Counterparty', 'Commodity',
+    'Commodity Group', 'Delivery Format', 'Additive', 'Broker', 'ICOTERM', 'Cost Center',
+    'Broker Fee', 'Broker Fee Currency', 'Freight Cost', 'Forex', 'Price', 'Trade Currency',
+    'Payment Days', 'Quantity', 'Entrega', 'Delivery Period', 'Date', 'Status',
+]
+
+def file_row(**overrides):
+    """One file row naming every reference by code or name, as a spreadsheet would"""
+    row = {
+        'Contract Number': '', 'Trader': 'alice@example.com', 'Trade Operation Type': 'BUY',
+        'Sociedad': 'Sovena', 'Counterparty': 'ACME', 'Commodity': 'olive oil',
+        'Commodity Group': 'Oils', 'Delivery Format': 'Bulk', 'Additive': 'None',
+        'Broker': 'DIR', 'ICOTERM': 'FOB', 'Cost Center': 'Madrid', 'Broker Fee': '0.00',
+        'Broker Fee Currency': 'EUR', 'Freight Cost': '12.50', 'Forex': '1.0000',
+        'Price': '850.00', 'Trade Currency': 'eur', 'Payment Days': '30', 'Quantity': '20.000',
+        'Entrega': 'Valencia', 'Delivery Period': '2030-06-30', 'Date': '2024-05-02', 'Status': 'approved',
+    }
+    row.update(overrides)
+    return [row[column] for column in HEADER]
+
+def csv_bytes(rows):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(HEADER)
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+class ContractImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        make_contract(cls.refs, contract_number='HIST-0001')
+
+    def setUp(self):
+        reference_cache.clear()
+
+    def run_import(self, data, **options):
+        errors = {}
+        importer = ContractImporter(on_error=lambda line, messages: errors.update({line: messages}), **options)
+        totals = importer.run(read_rows(io.BytesIO(data), 'csv'))
+        return totals, errors
+
+    def test_imports_and_reports_bad_rows(self):
+        make_counterparty('Twin')
+        make_counterparty('twin ')
+        totals, errors = self.run_import(csv_bytes([
+            file_row(),
+            file_row(**{'Contract Number': 'HIST-0002', 'Counterparty': str(self.refs['counterparty'].pk)}),
+            file_row(Quantity='0'),
+            file_row(Counterparty='Nobody Ltd'),
+            file_row(Counterparty='Twin'),
+            file_row(**{'Contract Number': 'HIST-0001'}),
+        ]), batch_size=4)
+
+        self.assertEqual(totals, {'rows': 6, 'created': 2, 'failed': 4})
+        self.assertEqual(set(errors), {4, 5, 6, 7})
+        self.assertEqual(errors[4], [('quantity', 'Quantity must be greater than zero.')])
+        self.assertEqual(errors[5], [('counterparty', 'Unknown counterparty "Nobody Ltd".')])
+        self.assertIn('more than one', errors[6][0][1])
+        self.assertEqual(errors[7], [('contract_number', 'Contract number "HIST-0001" already exists.')])
+
+        imported = Contract.objects.get(contract_number='HIST-0002')
+        self.assertEqual(imported.counterparty, self.refs['counterparty'])
+        self.assertEqual(imported.trade_currency.currency_code, 'EUR')
+        self.assertEqual(ContractRollup.objects.filter(status='approved').get().contract_count, 2)
+
+    def test_queries_do_not_grow_with_rows(self):
+        def queries(count):
+            with CaptureQueriesContext(connection) as context:
+                self.run_import(csv_bytes([file_row() for _ in range(count)]), batch_size=1000)
+            return len([q for q in context.captured_queries if not q['sql'].startswith('INSERT INTO "contracts"')])
+
+        queries(1)  # creates the counter and rollup rows
+        self.assertEqual(queries(10), queries(300))
+
+    def test_imported_numbers_advance_the_counter(self):
+        year = timezone.now().year
+        _, last = Contract.parse_number(make_contract(self.refs).contract_number)  # creates the counter row
+        imported = Contract.format_number(year, last + 5)
+        totals, errors = self.run_import(csv_bytes([file_row(**{'Contract Number': imported}), file_row()]))
+        self.assertEqual((totals['created'], errors), (2, {}))
+        self.assertTrue(Contract.objects.filter(contract_number=Contract.format_number(year, last + 6)).exists())
+        self.assertEqual(make_contract(self.refs).contract_number, Contract.format_number(year, last + 7))
+
+    def test_dry_run_writes_nothing(self):
+        totals, _ = self.run_import(csv_bytes([file_row(), file_row()]), dry_run=True)
+        self.assertEqual(totals['created'], 2)
+        self.assertEqual(Contract.objects.count(), 1)
+
+    def test_command_with_error_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'book.csv')
+            report = os.path.join(directory, 'errors.csv')
+            with open(source, 'wb') as file:
+                file.write(csv_bytes([file_row(), file_row(Price='-1'), file_row()]))
+            out = io.StringIO()
+            call_command('import_contracts', source, errors=report, defer_rollups=True, stdout=out)
+            with open(report, newline='') as file:
+                rows = list(csv.reader(file))
+
+        self.assertIn('Imported 2 of 3 rows (1 rejected)', out.getvalue())
+        self.assertEqual(rows, [['row', 'field', 'message'], ['3', 'price', 'Price must be greater than zero.']])
+        self.assertEqual(ContractRollup.objects.get(status='approved').contract_count, 2)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = io.BytesIO(csv_bytes([file_row(), file_row(Trader='Nobody')]))
+        upload.name = 'book.csv'
+        response = client.post('/api/nextcrm/contracts/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['failed']), (1, 1))
+        self.assertEqual(data['errors'], [
+            {'row': 3, 'errors': [{'field': 'trader', 'message': 'Unknown trader "Nobody".'}]}
+        ])
+
+        upload = io.BytesIO(b'x')
+        upload.name = 'book.pdf'
+        response = client.post('/api/nextcrm/contracts/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(openpyxl, 'openpyxl is not installed')
+    def test_xlsx(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(HEADER)
+        row = file_row()
+        # Typed cells, as spreadsheets store them
+        row[HEADER.index('Price')] = 850.5
+        row[HEADER.index('Payment Days')] = 30.0
+        row[HEADER.index('Date')] = datetime.datetime(2024, 5, 2)
+        sheet.append(row)
+        data = io.BytesIO()
+        workbook.save(data)
+        data.seek(0)
+
+        totals = ContractImporter().run(read_rows(data, 'xlsx'))
+        self.assertEqual(totals['created'], 1)
+        contract = Contract.objects.latest('id')
+        self.assertEqual(str(contract.price), '850.50')
+        self.assertEqual(contract.date.isoformat(), '2024-05-02')
@@ -0,0 +1,158 @@
+# apps/nextcrm/tests/test_pagination.py
+import base64
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import Contract
+from apps.nextcrm.views import ContractViewSet
+from utils.pagination import EstimatedCountPaginator, planner_estimate
+from .factories import make_reference_data, make_contract, make_counterparty
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        # Few distinct values per column, so ties have to be broken by id
+        for i in range(23):
+            make_contract(
+                refs,
+                date=date(2024, 1, 1) + timedelta(days=i % 4),
+                delivery_period=date(2025, 1, 1) + timedelta(days=i % 3),
+                price=Decimal('100.00') + i % 5,
+                quantity=Decimal('10.000') + i % 2,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link='next'):
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            ids += [row['id'] for row in data['results']]
+            url = data[link]
+            pages += 1
+        return ids, pages
+
+    def test_default_ordering(self):
+        ids, pages = self.walk(f'{CONTRACTS_URL}?pagination=cursor&page_size=5')
+
+        expected = list(Contract.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 5)
+
+    def test_every_ordering_field(self):
+        for field in ContractViewSet.ordering_fields:
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    ids, _ = self.walk(f'{CONTRACTS_URL}?pagination=cursor&page_size=4&ordering={ordering}')
+                    expected = list(
+                        Contract.objects.with_computed()
+                        .order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+                        .values_list('id', flat=True)
+                    )
+                    self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back(self):
+        url = f'{CONTRACTS_URL}?pagination=cursor&page_size=5&ordering=price'
+        forward = []
+        while url:
+            data = self.client.get(url).json()
+            forward.append([row['id'] for row in data['results']])
+            last, url = data, data['next']
+
+        backward = []
+        url = last['previous']
+        while url:
+            data = self.client.get(url).json()
+            backward.append([row['id'] for row in data['results']])
+            url = data['previous']
+
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(f'{CONTRACTS_URL}?cursor=garbage').status_code, 404)
+
+        data = self.client.get(f'{CONTRACTS_URL}?pagination=cursor&page_size=5&ordering=price').json()
+        # A cursor issued for one ordering is rejected under another
+        response = self.client.get(data['next'].replace('ordering=price', 'ordering=quantity'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values(self):
+        for values in [['not-a-date', 1], [None, 1], ['2024-01-01', 'x'], [{'a': 1}, 1]]:
+            payload = json.dumps({'o': ['-date', '-id'], 'v': values, 'r': False})
+            token = base64.urlsafe_b64encode(payload.encode()).decode()
+            with self.subTest(values=values):
+                response = self.client.get(CONTRACTS_URL, {'cursor': token})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()['detail'], 'Invalid cursor')
+
+    def test_page_number_mode_is_default(self):
+        data = self.client.get(CONTRACTS_URL).json()
+        self.assertEqual(data['count'], 23)
+        self.assertEqual(len(data['results']), 20)
+
+class EstimatedCountPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        for i in range(23):
+            make_contract(refs)
+            make_counterparty(f'Counterparty {i}')
+
+    def setUp(self):
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_exact_below_threshold(self):
+        data = self.client.get(CONTRACTS_URL).json()
+        self.assertEqual(data['count'], 23)
+        self.assertFalse(data['count_is_estimate'])
+
+    @mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 5)
+    def test_fallback_count_below_cap_is_exact(self):
+        data = self.client.get(CONTRACTS_URL).json()
+        self.assertEqual(data['count'], 23)
+        self.assertFalse(data['count_is_estimate'])
+
+    @mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 5)
+    @mock.patch.object(EstimatedCountPaginator, 'fallback_count_cap', 10)
+    def test_estimate_above_cap(self):
+        # Warm reference_cache, which supplies the names on the page
+        self.client.get(CONTRACTS_URL)
+        # count capped at the threshold, count capped at the fallback cap, the page
+        with self.assertNumQueries(3):
+            data = self.client.get(CONTRACTS_URL).json()
+        self.assertEqual(data['count'], 10)
+        self.assertTrue(data['count_is_estimate'])
+        self.assertEqual(len(data['results']), 20)
+        self.assertIsNotNone(data['next'])
+
+        # Pages past the estimate are still served; next comes from an extra row
+        data = self.client.get(f'{CONTRACTS_URL}?page=2').json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+        self.assertEqual(self.client.get(f'{CONTRACTS_URL}?page=3').status_code, 404)
+
+    def test_planner_estimate_needs_postgres(self):
+        self.assertIsNone(planner_estimate(Contract.objects.all()))
+
+    @mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 5)
+    @mock.patch.object(EstimatedCountPaginator, 'fallback_count_cap', 10)
+    def test_counterparty_list(self):
+        data = self.client.get('/api/nextcrm/counterparties/').json()
+        self.assertTrue(data['count_is_estimate'])
+        self.assertEqual(len(data['results']), 20)
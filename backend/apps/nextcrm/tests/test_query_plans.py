@@ -0,0 +1,111 @@
+# apps/nextcrm/tests/test_query_plans.py
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.nextcrm.models import Contract, Trader
+
+TABLE = Contract._meta.db_table
+
+def full_scans(sql, params):
+    """Describe every full scan of the contracts table in the plan of `sql`"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes, scans = [plan[0]['Plan']], []
+            while nodes:
+                node = nodes.pop()
+                if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == TABLE:
+                    scans.append(f"Seq Scan on {TABLE} (filter: {node.get('Filter')})")
+                nodes += node.get('Plans', [])
+            return scans
+
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        # "SCAN contracts" without "USING ... INDEX" reads the whole table
+        return [
+            row[-1] for row in cursor.fetchall()
+            if row[-1].split(' ')[:2] == ['SCAN', TABLE] and 'INDEX' not in row[-1]
+        ]
+
+class ContractQueryPlanTests(TestCase):
+    """
+    The contract endpoints must be answerable from the indexes. On
+    PostgreSQL sequential scans are disabled for the test, so a plan that
+    still contains one means there is no usable index at all. SQLite
+    cannot match the partial indexes against bound parameters, so there
+    an index-order scan is accepted as well, and queries only a partial
+    index can serve are checked on PostgreSQL alone.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_contracts', contracts=3000, traders=10, counterparties=200,
+                     commodities=20, stdout=StringIO())
+        cls.trader = Trader.objects.filter(email__endswith='@seed.example.com').first()
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.user = User.objects.create_user('trader', password='x')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        cache.clear()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def client_for(self, user, trader=None):
+        # Non-staff users are scoped to the trader attached to them
+        user.trader = trader
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def assertNoFullScans(self, client, url):
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            self.assertEqual(client.get(url).status_code, 200)
+
+        for sql, params in statements:
+            if sql.lstrip().upper().startswith('SELECT') and f'"{TABLE}"' in sql:
+                with self.subTest(sql=sql):
+                    self.assertEqual(full_scans(sql, params), [])
+
+    def test_contract_endpoints_use_indexes(self):
+        staff = self.client_for(self.staff)
+        trader = self.client_for(self.user, self.trader)
+        cases = [
+            (trader, '/api/nextcrm/contracts/'),
+            (trader, '/api/nextcrm/contracts/?pagination=cursor'),
+            (staff, '/api/nextcrm/contracts/?pagination=cursor'),
+            (trader, '/api/nextcrm/contracts/overdue/'),
+            (trader, '/api/nextcrm/contracts/dashboard_stats/'),
+            # Year and month filters are date ranges, not EXTRACT()
+            (staff, '/api/nextcrm/contracts/?date__year=2024&date__month=3'),
+            (trader, '/api/nextcrm/contracts/?date__year=2024'),
+            (staff, '/api/nextcrm/contracts/?date_range=2024-01,2024-03'),
+        ]
+        if connection.vendor != 'sqlite':
+            # Served by contracts_open_delivery_idx / contracts_trader_delivery_idx only
+            cases += [
+                (staff, '/api/nextcrm/contracts/overdue/'),
+                (staff, '/api/nextcrm/contracts/overdue/?summary=1'),
+                (trader, '/api/nextcrm/contracts/upcoming_deliveries/?summary=1'),
+                (staff, '/api/nextcrm/contracts/upcoming_deliveries/'),
+                (trader, '/api/nextcrm/contracts/upcoming_deliveries/'),
+            ]
+        for client, url in cases:
+            with self.subTest(url=url, scoped=client is trader):
+                self.assertNoFullScans(client, url)
@@ -0,0 +1,110 @@
+# apps/nextcrm/tests/test_query_shapes.py
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.serializers import ContractDetailSerializer, ContractListSerializer
+from utils.shaping import serializer_shape
+from .factories import make_reference_data, make_contract, contract_payload
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+
+def contract_selects(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT') and 'FROM "contracts"' in query['sql']
+    ]
+
+class SerializerShapeTests(TestCase):
+    def test_list_serializer_reads_ids_not_rows(self):
+        shape = serializer_shape(ContractListSerializer)
+        self.assertEqual(shape.joins, [])
+        self.assertEqual(shape.columns, sorted([
+            'id', 'contract_number', 'trader', 'counterparty', 'commodity',
+            'trade_operation_type', 'price', 'quantity', 'total_value', 'trade_currency',
+            'delivery_period', 'status', 'date', 'created_at',
+        ]))
+
+    def test_detail_serializer_joins_only_name_columns(self):
+        shape = serializer_shape(ContractDetailSerializer)
+        self.assertEqual(len(shape.joins), 12)
+        self.assertIn('trader__trader_name', shape.columns)
+        self.assertNotIn('trader__email', shape.columns)
+
+@override_settings(QUERY_SHAPE_HEADER=True)
+class ContractActionShapeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.contract = make_contract(cls.refs, notes='Keep dry')
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_loads_listed_columns_without_joins(self):
+        self.client.get(CONTRACTS_URL)
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(CONTRACTS_URL)
+        page = contract_selects(queries)[-1]
+        self.assertNotIn('JOIN', page)
+        self.assertNotIn('"notes"', page)
+        self.assertIn('joins=none', response['X-Query-Shape'])
+
+    def test_retrieve_joins_for_names(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{CONTRACTS_URL}{self.contract.pk}/')
+        self.assertEqual(response.json()['trader_name'], 'Alice')
+        self.assertEqual(response.json()['notes'], 'Keep dry')
+        self.assertIn('trader', response['X-Query-Shape'].split('joins=')[1].split(','))
+
+    def test_change_status_writes_one_row_without_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f'{CONTRACTS_URL}{self.contract.pk}/change_status/', {'status': 'approved'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        select = contract_selects(queries)[0]
+        self.assertNotIn('JOIN', select)
+        self.assertNotIn('"notes"', select)
+        update = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "contracts"')
+        )
+        self.assertNotIn('"notes"', update)
+
+        self.contract.refresh_from_db()
+        self.assertEqual((self.contract.status, self.contract.notes), ('approved', 'Keep dry'))
+
+    def test_update_saves_every_field(self):
+        number = self.contract.contract_number
+        response = self.client.put(
+            f'{CONTRACTS_URL}{self.contract.pk}/',
+            contract_payload(self.refs, price='150.00', notes='Keep dry'), format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.contract.refresh_from_db()
+        self.assertEqual(str(self.contract.price), '150.00')
+        self.assertEqual(self.contract.contract_number, number)
+        self.assertIn('joins=none', response['X-Query-Shape'])
+
+    def test_cursor_reads_ordering_fields_with_the_page(self):
+        make_contract(self.refs)
+        self.client.get(CONTRACTS_URL)
+        # The cursor needs updated_at, which the list does not render
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                CONTRACTS_URL, {'pagination': 'cursor', 'ordering': 'updated_at', 'page_size': 1},
+            )
+        self.assertIsNotNone(response.json()['next'])
+
+    @override_settings(QUERY_SHAPE_HEADER=False)
+    def test_header_off(self):
+        self.assertNotIn('X-Query-Shape', self.client.get(CONTRACTS_URL))
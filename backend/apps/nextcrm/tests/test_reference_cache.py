@@ -0,0 +1,234 @@
+# apps/nextcrm/tests/test_reference_cache.py
+import re
+import time
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.nextcrm.admin import ReferenceChoiceField
+from apps.nextcrm.cache import check_reference_cache_backend, reference_cache
+from apps.nextcrm.models import Commodity, Contract, Counterparty, Currency
+from apps.nextcrm.serializers import ContractCreateUpdateSerializer, ContractListSerializer
+from .factories import make_reference_data, make_contract, make_counterparty, contract_payload
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+CURRENCIES_URL = '/api/nextcrm/currencies/'
+COMMODITIES_URL = '/api/nextcrm/commodities/'
+
+def later(seconds):
+    """Move the clocks the caches read `seconds` ahead"""
+    monotonic, wall = time.monotonic(), time.time()
+    return mock.patch.multiple(time, monotonic=lambda: monotonic + seconds, time=lambda: wall + seconds)
+
+class ReferenceCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_read_is_served_from_memory(self):
+        self.client.get(CURRENCIES_URL)
+        with self.assertNumQueries(0):
+            response = self.client.get(CURRENCIES_URL)
+        self.assertEqual([row['currency_code'] for row in response.json()['results']], ['EUR'])
+
+        stats = reference_cache.stats()['nextcrm.currency']
+        self.assertEqual((stats['misses'], stats['local_hits']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_other_workers_read_the_shared_copy(self):
+        reference_cache.rows(Currency)
+        reference_cache.clear()
+        with self.assertNumQueries(0):
+            reference_cache.rows(Currency)
+        self.assertEqual(reference_cache.stats()['nextcrm.currency']['shared_hits'], 1)
+
+    def test_copies_expire_without_a_version_bump(self):
+        counterparty = self.refs['counterparty']
+        reference_cache.rows(Currency)
+        reference_cache.names(Counterparty, 'counterparty_name', [counterparty.pk])
+        # Edited by another process: with a process-local cache no bump arrives here
+        Currency.objects.update(currency_name='Euro (edited)')
+        Counterparty.objects.filter(pk=counterparty.pk).update(counterparty_name='Renamed')
+        self.assertEqual(reference_cache.rows(Currency)[0].currency_name, 'Euro')
+
+        with later(settings.REFERENCE_CACHE_LOCAL_TIMEOUT):
+            self.assertEqual(reference_cache.rows(Currency)[0].currency_name, 'Euro (edited)')
+            self.assertEqual(
+                reference_cache.names(Counterparty, 'counterparty_name', [counterparty.pk]),
+                {counterparty.pk: 'Renamed'},
+            )
+
+    def test_deploy_check_flags_a_process_local_cache(self):
+        self.assertEqual([warning.id for warning in check_reference_cache_backend(None)], ['nextcrm.W001'])
+
+    def test_save_and_delete_invalidate(self):
+        reference_cache.rows(Currency)
+        usd = Currency.objects.create(currency_name='US Dollar', currency_code='USD')
+        self.assertEqual([c.currency_code for c in reference_cache.rows(Currency)], ['EUR', 'USD'])
+
+        usd.delete()
+        self.assertEqual([c.currency_code for c in reference_cache.rows(Currency)], ['EUR'])
+
+    def test_commodity_follows_its_group(self):
+        self.client.get(COMMODITIES_URL)
+        group = self.refs['commodity_group']
+        group.commodity_group_name = 'Fats'
+        group.save()
+
+        row = self.client.get(COMMODITIES_URL).json()['results'][0]
+        self.assertEqual(row['commodity_group_name'], 'Fats')
+
+    def test_retrieve(self):
+        currency = self.refs['trade_currency']
+        self.client.get(f'{CURRENCIES_URL}{currency.pk}/')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{CURRENCIES_URL}{currency.pk}/')
+        self.assertEqual(response.json()['currency_code'], 'EUR')
+        self.assertEqual(self.client.get(f'{CURRENCIES_URL}999/').status_code, 404)
+        self.assertEqual(self.client.get(f'{CURRENCIES_URL}abc/').status_code, 404)
+
+    def test_filtered_list_reads_the_database(self):
+        other = Commodity.objects.create(
+            commodity_name_short='Sunflower Oil', commodity_group=self.refs['commodity_group'],
+            commodity_type=self.refs['commodity'].commodity_type,
+            commodity_subtype=self.refs['commodity'].commodity_subtype,
+        )
+        response = self.client.get(COMMODITIES_URL, {'search': 'sunflower'})
+        self.assertEqual([row['id_commodity'] for row in response.json()['results']], [other.pk])
+        self.assertEqual(reference_cache.stats()['nextcrm.commodity']['misses'], 0)
+
+    def test_least_recently_used_table_is_dropped(self):
+        with mock.patch.object(reference_cache, 'maxsize', 1):
+            reference_cache.rows(Currency)
+            reference_cache.rows(Commodity)
+            reference_cache.rows(Currency)
+        # Currency was evicted by Commodity, and came back from the shared cache
+        self.assertEqual(reference_cache.stats()['nextcrm.currency']['shared_hits'], 1)
+
+    def test_contract_foreign_keys_validate_from_cache(self):
+        payload = contract_payload(self.refs)
+        ContractCreateUpdateSerializer(data=payload).is_valid(raise_exception=True)
+        # Only the counterparty, which is not a reference table, is queried
+        with self.assertNumQueries(1):
+            serializer = ContractCreateUpdateSerializer(data=payload)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        serializer = ContractCreateUpdateSerializer(data={**payload, 'trade_currency': 999})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['trade_currency'][0].code, 'does_not_exist')
+
+    def test_admin_choices_read_from_cache(self):
+        model_admin = site._registry[Contract]
+        field = model_admin.formfield_for_foreignkey(Contract._meta.get_field('trade_currency'), None)
+        self.assertIsInstance(field, ReferenceChoiceField)
+
+        list(field.choices)
+        with self.assertNumQueries(0):
+            choices = list(field.choices)
+            cleaned = field.clean(str(self.refs['trade_currency'].pk))
+        self.assertEqual(len(choices), 2)
+        self.assertEqual(cleaned, self.refs['trade_currency'])
+
+    def test_stats_endpoint_is_admin_only(self):
+        response = self.client.get('/api/nextcrm/reference-cache/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('nextcrm.currency', response.json()['tables'])
+
+        self.client.force_authenticate(User.objects.create_user('user', password='x'))
+        self.assertEqual(self.client.get('/api/nextcrm/reference-cache/').status_code, 403)
+
+class ContractListNamesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        for i in range(6):
+            make_contract(cls.refs, counterparty=make_counterparty(f'Counterparty {i}'))
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_matches_join_path(self):
+        joined = ContractListSerializer(
+            Contract.objects.select_related(
+                'trader', 'counterparty', 'commodity', 'trade_operation_type', 'trade_currency',
+            ),
+            many=True, context={'join_names': True},
+        ).data
+        self.assertEqual(ContractListSerializer(Contract.objects.all(), many=True).data, joined)
+
+    def test_page_needs_no_joins(self):
+        self.client.get(CONTRACTS_URL)
+        # count and page, with every name read from memory
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(CONTRACTS_URL)
+        self.assertNotIn('JOIN', queries.captured_queries[1]['sql'])
+        self.assertEqual(
+            sorted(row['counterparty_name'] for row in response.json()['results']),
+            [f'Counterparty {i}' for i in range(6)],
+        )
+
+    def test_counterparty_names_batch_fetched_on_miss(self):
+        ContractListSerializer(Contract.objects.all()[:3], many=True).data
+        # The page, then one query for the three names not seen yet
+        with self.assertNumQueries(2) as queries:
+            ContractListSerializer(Contract.objects.all(), many=True).data
+        sql = queries.captured_queries[1]['sql']
+        self.assertIn('"counterparties"', sql)
+        self.assertEqual(len(re.search(r' IN \(([^)]*)\)', sql).group(1).split(',')), 3)
+
+    def test_counterparty_rename_invalidates(self):
+        self.client.get(CONTRACTS_URL)
+        counterparty = Counterparty.objects.get(counterparty_name='Counterparty 0')
+        counterparty.counterparty_name = 'Renamed'
+        counterparty.save()
+
+        names = [row['counterparty_name'] for row in self.client.get(CONTRACTS_URL).json()['results']]
+        self.assertIn('Renamed', names)
+
+class ReferenceCacheTransactionTests(TransactionTestCase):
+    """Writes reach the shared cache only once they commit"""
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        Currency.objects.create(currency_name='Euro', currency_code='EUR')
+
+    def codes(self):
+        return [c.currency_code for c in reference_cache.rows(Currency)]
+
+    def test_rolled_back_write_is_never_cached(self):
+        self.assertEqual(self.codes(), ['EUR'])
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Currency.objects.create(currency_name='Ghost', currency_code='GHO')
+            self.assertEqual(self.codes(), ['EUR', 'GHO'])  # this connection sees its own write
+            raise RuntimeError
+        self.assertEqual(self.codes(), ['EUR'])
+
+        reference_cache.clear()  # another worker, reading the shared copy
+        self.assertEqual(self.codes(), ['EUR'])
+
+    def test_committed_write_retires_both_copies(self):
+        self.assertEqual(self.codes(), ['EUR'])
+        with transaction.atomic():
+            Currency.objects.create(currency_name='US Dollar', currency_code='USD')
+        self.assertEqual(self.codes(), ['EUR', 'USD'])
+
+        reference_cache.clear()
+        self.assertEqual(self.codes(), ['EUR', 'USD'])
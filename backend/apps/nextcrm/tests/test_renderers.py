@@ -0,0 +1,123 @@
+# apps/nextcrm/tests/test_renderers.py
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from apps.nextcrm.cache import reference_cache
+from utils.renderers import ORJSONParser, ORJSONRenderer
+from .factories import make_reference_data, make_contract, contract_payload
+
+CONTRACTS_URL = '/api/nextcrm/contracts/'
+
+SAMPLES = {
+    'decimals': [Decimal('1500.50000'), Decimal('-0.1'), Decimal('0E-5'), Decimal('12345678901234.12345')],
+    'dates': [datetime.date(2024, 2, 29), datetime.time(8, 30, 15, 250)],
+    'datetimes': [
+        datetime.datetime(2024, 1, 1, 12, 0, tzinfo=datetime.timezone.utc),
+        datetime.datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=ZoneInfo('Europe/Madrid')),
+        datetime.datetime(2024, 1, 1, 12, 0, 0, 500),
+    ],
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'text': ['Sociedad Española', 'line\u2028separator\u2029', gettext_lazy('Draft'), ''],
+    'numbers': [0, -1, 2 ** 63 - 1, 2 ** 70, 1.5, 1e16, True, None],
+    'nested': ReturnDict({'rows': ReturnList([{'a': (1, 2)}], serializer=None)}, serializer=None),
+    'keys': {1: 'one', None: 'none', True: 'yes'},
+    'timedelta': datetime.timedelta(days=1, seconds=3),
+}
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertSameRender(self, data, **kwargs):
+        self.assertEqual(
+            ORJSONRenderer().render(data, **kwargs), JSONRenderer().render(data, **kwargs), data,
+        )
+
+    def test_matches_json_renderer(self):
+        for name, value in SAMPLES.items():
+            with self.subTest(name):
+                self.assertSameRender(value)
+        self.assertSameRender(SAMPLES)
+        self.assertSameRender(None)
+
+    def test_indented_output(self):
+        self.assertSameRender(SAMPLES, accepted_media_type='application/json; indent=4')
+        self.assertSameRender(SAMPLES, renderer_context={'indent': 2})
+
+    @override_settings(JSON_DECIMAL_FORMAT='string')
+    def test_decimals_as_strings(self):
+        self.assertEqual(
+            ORJSONRenderer().render({'total': Decimal('1500.50000'), 'price': '100.00'}),
+            b'{"total":"1500.50000","price":"100.00"}',
+        )
+
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(io.BytesIO(body), 'application/json', {'encoding': encoding})
+
+    def test_matches_json_parser(self):
+        for body in [
+            b'{"price": "100.00", "quantity": 10.125, "ids": [1, 2, 3], "notes": null, "ok": true}',
+            '{"name": "Sociedad Española"}'.encode(),
+            b'{"id": 9223372036854775807}',
+            b'[]',
+        ]:
+            with self.subTest(body):
+                self.assertEqual(self.parse(ORJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_other_encodings(self):
+        body = '{"name": "Española"}'.encode('latin-1')
+        self.assertEqual(self.parse(ORJSONParser(), body, 'latin-1'), {'name': 'Española'})
+
+    def test_errors_match_json_parser(self):
+        for body in [b'{"a": ', b'{"a": NaN}', b'']:
+            with self.subTest(body):
+                with self.assertRaises(ParseError) as orjson_error:
+                    self.parse(ORJSONParser(), body)
+                with self.assertRaises(ParseError) as json_error:
+                    self.parse(JSONParser(), body)
+                self.assertEqual(str(orjson_error.exception), str(json_error.exception))
+
+class ORJSONResponseTests(TestCase):
+    """API responses have the bytes JSONRenderer gives them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.contract = make_contract(cls.refs, price=Decimal('1234.56'), quantity=Decimal('0.125'))
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertSameResponse(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_contract_endpoints(self):
+        for url in [
+            CONTRACTS_URL, f'{CONTRACTS_URL}{self.contract.pk}/',
+            f'{CONTRACTS_URL}dashboard_stats/', f'{CONTRACTS_URL}upcoming_deliveries/',
+        ]:
+            with self.subTest(url):
+                self.assertSameResponse(url)
+
+    def test_create_parses_with_orjson(self):
+        response = self.client.post(CONTRACTS_URL, contract_payload(self.refs), format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['price'], '100.00')
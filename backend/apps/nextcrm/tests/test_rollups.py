@@ -0,0 +1,225 @@
+# apps/nextcrm/tests/test_rollups.py
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.nextcrm.models import Contract, ContractRollup, ContractStatusRollup
+from .factories import make_reference_data, make_contract, make_trader, make_counterparty
+
+def rollup_rows():
+    measures = ['contract_count', 'quantity_sum', 'price_sum', 'notional_sum', 'last_date']
+    return [
+        sorted(model.objects.values_list(*model.key_fields(), *measures))
+        for model in ContractRollup.objects.rollup_models()
+    ]
+
+class ContractRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.other_trader = make_trader('Bob')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertRollupsInSync(self):
+        maintained = rollup_rows()
+        ContractRollup.objects.rebuild()
+        self.assertEqual(maintained, rollup_rows())
+
+    def test_create_adds_to_group(self):
+        make_contract(self.refs, price=Decimal('10.00'), quantity=Decimal('2.000'))
+        make_contract(self.refs, price=Decimal('5.00'), quantity=Decimal('4.000'))
+
+        rollup = ContractRollup.objects.get()
+        self.assertEqual(rollup.contract_count, 2)
+        self.assertEqual(rollup.price_sum, Decimal('15.00'))
+        self.assertEqual(rollup.quantity_sum, Decimal('6.000'))
+        self.assertEqual(rollup.notional_sum, Decimal('40.00000'))
+
+    def test_save_moves_contract_between_groups(self):
+        contract = make_contract(self.refs)
+        make_contract(self.refs)
+
+        contract = Contract.objects.get(pk=contract.pk)
+        contract.status = 'approved'
+        contract.date = date(2024, 2, 1)
+        contract.price = Decimal('250.00')
+        contract.save()
+
+        self.assertEqual(ContractRollup.objects.count(), 2)
+        self.assertRollupsInSync()
+
+    def test_stale_copies_are_diffed_against_the_stored_row(self):
+        contract = make_contract(self.refs)
+        first, second = Contract.objects.get(pk=contract.pk), Contract.objects.get(pk=contract.pk)
+        first.status = 'approved'
+        first.save()
+        second.status = 'executed'
+        second.save()
+
+        self.assertEqual(list(ContractRollup.objects.values_list('status', 'contract_count')), [('executed', 1)])
+        self.assertRollupsInSync()
+
+        first.delete()
+        second.delete()
+        self.assertFalse(ContractRollup.objects.exists())
+
+    def test_delete_removes_empty_groups(self):
+        contract = make_contract(self.refs)
+        contract.delete()
+        self.assertFalse(ContractRollup.objects.exists())
+
+        make_contract(self.refs)
+        make_contract(self.refs, status='approved')
+        Contract.objects.filter(status='draft').delete()
+        self.assertEqual(list(ContractRollup.objects.values_list('status', flat=True)), ['approved'])
+
+    def test_emptied_group_deleted_by_its_key(self):
+        contract = make_contract(self.refs)
+        make_contract(self.refs, status='approved')
+
+        contract.status = 'executed'
+        with CaptureQueriesContext(connection) as queries:
+            contract.save()
+        deletes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE FROM')]
+        self.assertEqual(len(deletes), 2)  # contract_rollups, contract_status_rollups
+        for sql in deletes:
+            self.assertIn('"status" = ', sql)
+        for model in (ContractRollup, ContractStatusRollup):
+            self.assertEqual(sorted(model.objects.values_list('status', flat=True)), ['approved', 'executed'])
+
+    def test_month_groups_keep_their_latest_date(self):
+        first = make_contract(self.refs, date=date(2024, 3, 5))
+        last = make_contract(self.refs, date=date(2024, 3, 20))
+        rollup = ContractRollup.objects.get()
+        self.assertEqual((rollup.month, rollup.contract_count, rollup.last_date), (date(2024, 3, 1), 2, date(2024, 3, 20)))
+        self.assertEqual(ContractStatusRollup.objects.get().last_date, date(2024, 3, 20))
+
+        last.delete()
+        self.assertEqual(ContractRollup.objects.get().last_date, date(2024, 3, 5))
+
+        first.date = date(2024, 3, 2)
+        first.save()
+        self.assertEqual(ContractRollup.objects.get().last_date, date(2024, 3, 2))
+        self.assertRollupsInSync()
+
+    def test_status_rollups_group_by_month_trader_and_status(self):
+        for counterparty in (self.refs['counterparty'], make_counterparty('Delta'), make_counterparty('Epsilon')):
+            make_contract(self.refs, counterparty=counterparty, date=date(2024, 3, 5))
+        make_contract(self.refs, date=date(2024, 4, 1))
+        make_contract(self.refs, date=date(2024, 3, 9), status='approved')
+
+        self.assertEqual(ContractRollup.objects.count(), 5)
+        self.assertEqual(sorted(ContractStatusRollup.objects.values_list('month', 'status', 'contract_count')), [
+            (date(2024, 3, 1), 'approved', 1), (date(2024, 3, 1), 'draft', 3), (date(2024, 4, 1), 'draft', 1),
+        ])
+        self.assertRollupsInSync()
+
+    def test_change_status_action(self):
+        contract = make_contract(self.refs)
+
+        response = self.client.post(
+            f'/api/nextcrm/contracts/{contract.pk}/change_status/', {'status': 'executed'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(ContractRollup.objects.values_list('status', flat=True)), ['executed'])
+        self.assertRollupsInSync()
+
+    def test_bulk_update_action(self):
+        contracts = [make_contract(self.refs) for _ in range(3)]
+        make_contract(self.refs)
+
+        response = self.client.post('/api/nextcrm/contracts/bulk_update/', {
+            'contract_ids': [c.pk for c in contracts[:2]],
+            'status': 'approved',
+            'trader': self.other_trader.pk,
+        }, format='json')
+
+        self.assertEqual(response.json()['updated_contracts'], 2)
+        self.assertEqual(ContractRollup.objects.get(trader=self.other_trader).contract_count, 2)
+        self.assertRollupsInSync()
+
+    def test_rebuild_command(self):
+        make_contract(self.refs)
+        make_contract(self.refs, status='approved')
+        ContractRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_contract_rollups', stdout=out)
+
+        self.assertIn('Rebuilt 2 contract rollup groups', out.getvalue())
+        self.assertEqual(ContractRollup.objects.count(), 2)
+
+class RollupReadersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.counterparty = make_counterparty('Gamma')
+        make_contract(cls.refs, counterparty=cls.counterparty, price=Decimal('100.00'), date=date(2024, 3, 1))
+        make_contract(cls.refs, counterparty=cls.counterparty, price=Decimal('50.00'), status='approved')
+        make_contract(cls.refs)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counterparty_statistics(self):
+        url = f'/api/nextcrm/counterparties/{self.counterparty.pk}/statistics/'
+        # counterparties joined to their rollups, grouped
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.json(), {
+            'total_contracts': 2,
+            'active_contracts': 1,
+            'total_value': 1500.0,
+            'average_contract_value': 750.0,
+            'last_contract_date': '2024-03-01',
+        })
+        self.assertEqual(self.client.get('/api/nextcrm/counterparties/0/statistics/').status_code, 404)
+        self.assertEqual(self.client.get('/api/nextcrm/counterparties/x/statistics/').status_code, 404)
+
+    def test_counterparty_batch_statistics(self):
+        idle = make_counterparty('Idle')
+        ids = [idle.pk, self.counterparty.pk, 0, idle.pk]
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                '/api/nextcrm/counterparties/batch_statistics/', {'counterparty_ids': ids}, format='json',
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()['results']
+        self.assertEqual([row['counterparty'] for row in results], [idle.pk, self.counterparty.pk])
+        self.assertEqual(results[0]['total_contracts'], 0)
+        self.assertIsNone(results[0]['last_contract_date'])
+        self.assertEqual(
+            results[1], {'counterparty': self.counterparty.pk, **self.client.get(
+                f'/api/nextcrm/counterparties/{self.counterparty.pk}/statistics/'
+            ).json()},
+        )
+        self.assertEqual(response.json()['not_found'], [0])
+
+    def test_counterparty_batch_statistics_validation(self):
+        url = '/api/nextcrm/counterparties/batch_statistics/'
+        for ids in [[], ['x'], list(range(1001))]:
+            with self.subTest(count=len(ids)):
+                response = self.client.post(url, {'counterparty_ids': ids}, format='json')
+                self.assertEqual(response.status_code, 400)
+
+    def test_trader_counts(self):
+        response = self.client.get(f'/api/nextcrm/traders/{self.refs["trader"].pk}/')
+
+        self.assertEqual(response.json()['total_contracts'], 3)
+        self.assertEqual(response.json()['active_contracts'], 1)
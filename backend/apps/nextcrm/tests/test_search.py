@@ -0,0 +1,127 @@
+# apps/nextcrm/tests/test_search.py
+import json
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.filters import SearchFilter
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+
+from apps.nextcrm.filters import TrigramSearchFilter
+from apps.nextcrm.models import Contract, Counterparty
+from apps.nextcrm.views import ContractViewSet, CounterpartyViewSet
+from .factories import make_reference_data, make_contract, make_counterparty, make_trader
+
+class TrigramSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        refs = make_reference_data()
+        olive = make_counterparty('Olivar del Sur')
+        sun = make_counterparty('Sunflower Mills')
+        bob = make_trader('Bob')
+        make_contract(refs, counterparty=olive, notes='Extra virgin, harvest 2024')
+        make_contract(refs, counterparty=sun, entrega='Olive terminal, Valencia')
+        make_contract(refs, counterparty=sun, trader=bob, notes='Rapeseed')
+        make_contract(refs, counterparty=olive, trader=bob)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, backend, viewset, queryset, term):
+        request = Request(APIRequestFactory().get('/', {'search': term}))
+        return set(backend().filter_queryset(request, queryset, viewset()).values_list('pk', flat=True))
+
+    def test_matches_search_filter(self):
+        cases = [
+            (ContractViewSet, Contract.objects.all(), ['oliv', 'sunflower mills', 'bob', 'harvest', 'CONT-', 'nothing']),
+            (CounterpartyViewSet, Counterparty.objects.all(), ['oliv', 'mills', 'ACME', 'sur sun']),
+        ]
+        for viewset, queryset, terms in cases:
+            for term in terms:
+                with self.subTest(viewset=viewset.__name__, term=term):
+                    self.assertEqual(
+                        self.search(TrigramSearchFilter, viewset, queryset, term),
+                        self.search(SearchFilter, viewset, queryset, term),
+                    )
+
+    def test_related_fields_match_the_foreign_key(self):
+        request = Request(APIRequestFactory().get('/', {'search': 'oliv'}))
+        queryset = TrigramSearchFilter().filter_queryset(request, Contract.objects.all(), ContractViewSet())
+
+        sql = str(queryset.query)
+        if connection.vendor == 'postgresql':
+            self.assertIn('"counterparty_id" = ANY(ARRAY(SELECT', sql)
+            self.assertIn('"counterparty_name" ILIKE', sql)
+        else:
+            self.assertIn('"counterparty_id" IN (SELECT', sql)
+        self.assertNotIn('JOIN "counterparties"', sql)
+
+    def test_rank_needs_no_join(self):
+        search_fields = ContractViewSet.search_fields
+        rank = TrigramSearchFilter().rank(Contract.objects.all(), search_fields, 'oliv')
+        sql = str(Contract.objects.annotate(search_rank=rank).query)
+        self.assertEqual(sql.count('WORD_SIMILARITY'), len(search_fields))
+        self.assertNotIn('JOIN', sql)
+
+    def test_search_endpoint(self):
+        response = self.client.get('/api/nextcrm/contracts/', {'search': 'olivar'})
+        self.assertEqual(response.json()['count'], 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'pg_trgm ranking needs PostgreSQL')
+    def test_results_ranked_by_similarity(self):
+        response = self.client.get('/api/nextcrm/counterparties/', {'search': 'sunflower'})
+        self.assertEqual(response.json()['results'][0]['counterparty_name'], 'Sunflower Mills')
+
+def plan_nodes(queryset):
+    """Every node of the PostgreSQL plan of `queryset`"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, found = [plan[0]['Plan']], []
+    while nodes:
+        node = nodes.pop()
+        found.append(node)
+        nodes += node.get('Plans', [])
+    return found
+
+@skipUnless(connection.vendor == 'postgresql', 'pg_trgm indexes need PostgreSQL')
+class TrigramSearchPlanTests(TestCase):
+    """Searches are answered from the trigram indexes of migration 0003 (sequential scans disabled)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_contracts', contracts=3000, traders=10, counterparties=200,
+                     commodities=20, stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def plan(self, viewset, queryset, term='oliv'):
+        request = Request(APIRequestFactory().get('/', {'search': term}))
+        return plan_nodes(TrigramSearchFilter().filter_queryset(request, queryset, viewset()))
+
+    def test_contract_search_uses_trigram_indexes(self):
+        nodes = self.plan(ContractViewSet, Contract.objects.all())
+        self.assertEqual([node for node in nodes if node['Node Type'] == 'Seq Scan'], [])
+        indexes = {node.get('Index Name') for node in nodes}
+        for index in ('contracts_notes_trgm', 'contracts_contract_number_trgm', 'counterparties_counterparty_name_trgm'):
+            self.assertIn(index, indexes)
+        # The foreign key branches join the column branches in one bitmap
+        self.assertIn('BitmapOr', {node['Node Type'] for node in nodes})
+
+    def test_reference_search_uses_trigram_indexes(self):
+        nodes = self.plan(CounterpartyViewSet, Counterparty.objects.all())
+        self.assertEqual([node for node in nodes if node['Node Type'] == 'Seq Scan'], [])
+        self.assertIn('counterparties_email_trgm', {node.get('Index Name') for node in nodes})
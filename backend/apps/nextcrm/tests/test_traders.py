@@ -0,0 +1,127 @@
+# apps/nextcrm/tests/test_traders.py
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.nextcrm.cache import reference_cache
+from .factories import make_reference_data, make_contract, make_trader
+
+TRADERS_URL = '/api/nextcrm/traders/'
+LEADERBOARD_URL = f'{TRADERS_URL}leaderboard/'
+
+class TraderListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        make_contract(cls.refs, status='approved')
+        make_contract(cls.refs, status='draft')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(TRADERS_URL).status_code, 200)
+        return len(queries)
+
+    def test_counts_without_a_query_per_trader(self):
+        queries = self.count_queries()
+        for i in range(10):
+            make_contract(self.refs, trader=make_trader(f'Trader {i}'))
+        self.assertEqual(self.count_queries(), queries)
+
+        rows = {row['id_trader']: row for row in self.client.get(TRADERS_URL).json()['results']}
+        self.assertEqual(rows[self.refs['trader'].pk]['total_contracts'], 2)
+        self.assertEqual(rows[self.refs['trader'].pk]['active_contracts'], 1)
+
+    def test_create(self):
+        response = self.client.post(TRADERS_URL, {'trader_name': 'Carol', 'email': 'carol@example.com'})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.json()['total_contracts'], response.json()['active_contracts']), (0, 0))
+
+class TraderLeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.refs = make_reference_data()
+        cls.alice = cls.refs['trader']
+        cls.bob = make_trader('Bob')
+        cls.carol = make_trader('Carol')
+        march = date(2024, 3, 10)
+        # Alice: two approved contracts, 1000 + 500 notional, 15 active tonnes
+        make_contract(cls.refs, date=march, status='approved', price=Decimal('100.00'), quantity=Decimal('10.000'))
+        make_contract(cls.refs, date=march, status='approved', price=Decimal('100.00'), quantity=Decimal('5.000'))
+        # Bob: one draft contract, 2000 notional, no active volume
+        make_contract(
+            cls.refs, trader=cls.bob, date=march, status='draft', price=Decimal('200.00'), quantity=Decimal('10.000'),
+        )
+        # Carol: only outside the window
+        make_contract(cls.refs, trader=cls.carol, date=date(2023, 12, 31), status='approved')
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def leaderboard(self, period='2024'):
+        response = self.client.get(LEADERBOARD_URL, {'period': period})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_ranks(self):
+        data = self.leaderboard()
+        self.assertEqual((data['start'], data['end']), ('2024-01-01', '2025-01-01'))
+        self.assertEqual(data['results'], [
+            {
+                'trader': self.bob.pk, 'trader_name': 'Bob', 'notional': '2000.00000', 'contract_count': 1,
+                'active_volume': '0.000', 'notional_rank': 1, 'contract_count_rank': 2, 'active_volume_rank': 2,
+            },
+            {
+                'trader': self.alice.pk, 'trader_name': 'Alice', 'notional': '1500.00000', 'contract_count': 2,
+                'active_volume': '15.000', 'notional_rank': 2, 'contract_count_rank': 1, 'active_volume_rank': 1,
+            },
+        ])
+
+    def test_ties_share_a_rank(self):
+        make_contract(self.refs, trader=self.bob, date=date(2024, 4, 1), status='draft')
+        ranks = [row['contract_count_rank'] for row in self.leaderboard()['results']]
+        self.assertEqual(ranks, [1, 1])
+
+    def test_window(self):
+        results = self.leaderboard('2023-06,2023')['results']
+        self.assertEqual([row['trader'] for row in results], [self.carol.pk])
+        self.assertEqual(self.leaderboard('2025')['results'], [])
+
+    def test_window_within_a_month(self):
+        # Not on month boundaries, so read from the contracts rather than the monthly rollups
+        self.assertEqual(self.leaderboard('2024-03-10')['results'], self.leaderboard('2024')['results'])
+        self.assertEqual(self.leaderboard('2024-03-11,2024-12')['results'], [])
+
+    def test_default_window_is_recent(self):
+        self.assertEqual(self.client.get(LEADERBOARD_URL).json()['results'], [])
+
+    def test_invalid_period(self):
+        response = self.client.get(LEADERBOARD_URL, {'period': '2024-13'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('period', response.json())
+
+    def test_one_query_then_cached_until_a_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.leaderboard()
+        self.assertEqual(len([q for q in queries.captured_queries if 'RANK()' in q['sql']]), 1)
+
+        with self.assertNumQueries(0):
+            self.leaderboard()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_contract(self.refs, trader=self.carol, date=date(2024, 6, 1), status='approved')
+        self.assertIn(self.carol.pk, [row['trader'] for row in self.leaderboard()['results']])
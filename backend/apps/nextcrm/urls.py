@@ -35,4 +35,5 @@ app_name = 'nextcrm'
 urlpatterns = [
     # Include all router URLs
     path('', include(router.urls)),
+    path('reference-cache/', views.ReferenceCacheView.as_view(), name='reference-cache'),
 ]
\ No newline at end of file
@@ -1,19 +1,30 @@
 # apps/nextcrm/views.py
-from rest_framework import viewsets, status, permissions
+import os
+
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count, Sum, Q, Avg
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import Http404
+from django.utils.http import urlencode
 from django.utils import timezone
-from datetime import timedelta, datetime
-from decimal import Decimal
+from datetime import timedelta
+
+from utils.pagination import EstimatedCountPagination, PageNumberOrKeysetPagination
+from utils.shaping import QueryShape, ShapedQuerysetMixin
 
 from .models import (
     Contract, Counterparty, Commodity, Trader, Cost_Center,
     Sociedad, Broker, Currency, ICOTERM, Trade_Operation_Type,
     Delivery_Format, Additive, Commodity_Group, Commodity_Type,
-    Commodity_Subtype, Counterparty_Facility
+    Commodity_Subtype, Counterparty_Facility, ContractRollup, CounterpartyQuerySet, ROLLUP_CONTRACT_FIELDS
 )
 from .serializers import (
     ContractListSerializer, ContractDetailSerializer, ContractCreateUpdateSerializer,
@@ -22,37 +33,51 @@ from .serializers import (
     CurrencySerializer, ICOTERMSerializer, TradeOperationTypeSerializer,
     DeliveryFormatSerializer, AdditiveSerializer, CommodityGroupSerializer,
     CommodityTypeSerializer, CommoditySubtypeSerializer, CounterpartyFacilitySerializer,
-    DashboardStatsSerializer, BulkContractUpdateSerializer
+    DashboardStatsSerializer, BulkContractUpdateSerializer, ContractBulkCreateSerializer,
+    CounterpartyStatisticsBatchSerializer, TraderLeaderboardSerializer,
+)
+from .filters import ContractFilter, PeriodField, TrigramSearchFilter, SearchRankOrderingFilter
+from .stats import (
+    CONTRACT_FACETS, compute_dashboard_stats, contract_facet_counts, counterparty_statistics, delivery_buckets, label_facets,
+    trader_leaderboard,
 )
+from .cache import (
+    get_contract_facets, get_dashboard_stats, get_trader_leaderboard, invalidate_dashboards, reference_cache,
+)
+from .compiled import CompiledListMixin
+from .importers import ContractImporter, ImportFileError, read_rows
+from .exports import CONTRACT_EXPORT_COLUMNS, CSVExportRenderer, NDJSONExportRenderer, stream_export
 
 # ==================== CONTRACT VIEWSET ====================
 
-class ContractViewSet(viewsets.ModelViewSet):
+# Columns Contract.save() and the rollup bookkeeping read besides the edited ones
+CONTRACT_SAVE_SHAPE = QueryShape(['contract_number', 'updated_at', *ROLLUP_CONTRACT_FIELDS])
+
+class ContractViewSet(CompiledListMixin, ShapedQuerysetMixin, viewsets.ModelViewSet):
     """
-    ViewSet for managing contracts with advanced filtering and actions
+    ViewSet for managing contracts with advanced filtering and actions.
+    Each action loads only the columns and joins its serializer reads;
+    lists are rendered from values_list() rows by CompiledListMixin.
     """
-    queryset = Contract.objects.select_related(
-        'trader', 'counterparty', 'commodity', 'trade_operation_type',
-        'sociedad', 'broker', 'icoterm', 'cost_center', 'delivery_format',
-        'additive', 'trade_currency', 'broker_fee_currency'
-    ).all()
+    queryset = Contract.objects.all()
+    action_shapes = {
+        'change_status': CONTRACT_SAVE_SHAPE,
+        'destroy': CONTRACT_SAVE_SHAPE,
+        # Only filtered and updated in the database / projected with values_list
+        'bulk_update': QueryShape(['id']),
+        'export': QueryShape(['id']),
+    }
+    extra_shapes = {
+        'update': CONTRACT_SAVE_SHAPE,
+        'partial_update': CONTRACT_SAVE_SHAPE,
+    }
     
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, SearchRankOrderingFilter]
+    pagination_class = PageNumberOrKeysetPagination
     
     # Filtering options
-    filterset_fields = {
-        'status': ['exact', 'in'],
-        'trader': ['exact'],
-        'counterparty': ['exact'],
-        'commodity': ['exact'],
-        'commodity_group': ['exact'],
-        'trade_operation_type': ['exact'],
-        'date': ['gte', 'lte', 'year', 'month'],
-        'delivery_period': ['gte', 'lte'],
-        'price': ['gte', 'lte'],
-        'quantity': ['gte', 'lte'],
-    }
+    filterset_class = ContractFilter
     
     # Search fields
     search_fields = [
@@ -64,138 +89,186 @@ class ContractViewSet(viewsets.ModelViewSet):
     # Ordering options
     ordering_fields = [
         'date', 'delivery_period', 'price', 'quantity', 'total_value',
-        'created_at', 'updated_at', 'contract_number'
+        'created_at', 'updated_at', 'contract_number', 'days_until_delivery'
     ]
-    ordering = ['-date', '-created_at']
+    # Matches the contracts_date_idx / contracts_trader_date_idx indexes
+    ordering = ['-date', '-id']
+    
+    # Actions whose serializers or ?ordering read Contract.objects.with_computed() annotations
+    computed_actions = {'list', 'retrieve', 'overdue', 'upcoming_deliveries', 'export'}
+    
+    # Largest list accepted by bulk_create
+    bulk_create_max_rows = 5000
+    # Rejected rows listed in an import response
+    import_max_errors = 1000
+    
+    # overdue and upcoming_deliveries: cursor pages in delivery order, which
+    # contracts_open_delivery_idx / contracts_trader_delivery_idx serve
+    delivery_actions = {'overdue', 'upcoming_deliveries'}
+    delivery_ordering = ['delivery_period', 'id']
+    summary_param = 'summary'
+    
+    # ?facets=status,trader,... ; these parameters do not change which rows are counted
+    facets_param = 'facets'
+    facet_ignored_params = {'page', 'page_size', 'cursor', 'pagination', 'ordering', 'format', 'facets'}
+    
+    @property
+    def pagination_mode(self):
+        # Read by PageNumberOrKeysetPagination; ?pagination=page still gives numbered pages
+        return 'cursor' if self.action in self.delivery_actions else 'page'
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
-        if self.action == 'list':
+        if self.action in ['list', 'overdue', 'upcoming_deliveries']:
             return ContractListSerializer
         elif self.action in ['create', 'update', 'partial_update']:
             return ContractCreateUpdateSerializer
         return ContractDetailSerializer
     
+    def list(self, request, *args, **kwargs):
+        facets = self.get_requested_facets()
+        response = super().list(request, *args, **kwargs)
+        if facets and isinstance(response.data, dict):
+            response.data['facets'] = label_facets(self.get_facet_counts(facets))
+        return response
+    
+    def get_requested_facets(self):
+        value = self.request.query_params.get(self.facets_param, '')
+        facets = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in facets if name not in CONTRACT_FACETS]
+        if unknown:
+            raise serializers.ValidationError({self.facets_param: [
+                f'Unknown facet(s): {", ".join(unknown)}. Choose from {", ".join(CONTRACT_FACETS)}.'
+            ]})
+        return facets
+    
+    def get_facet_counts(self, facets):
+        """Counts of the filtered rows, cached by the normalized filter parameters"""
+        params = urlencode(sorted(
+            (key, value) for key, values in self.request.query_params.lists()
+            if key not in self.facet_ignored_params for value in values
+        ))
+        queryset = self.filter_queryset(self.get_queryset())
+        return get_contract_facets(
+            self.get_trader_scope(), f'{",".join(sorted(facets))}?{params}',
+            lambda: contract_facet_counts(queryset, sorted(facets)),
+        )
+    
+    def get_trader_scope(self):
+        """Trader whose contracts the user is limited to, or None for all"""
+        if self.request.user.is_staff:
+            return None
+        return getattr(self.request.user, 'trader', None) or None
+    
     def get_queryset(self):
         """Filter queryset based on user permissions and query params"""
         queryset = super().get_queryset()
         
         # Filter by user's trader if not staff
-        if not self.request.user.is_staff:
-            user_trader = getattr(self.request.user, 'trader', None)
-            if user_trader:
-                queryset = queryset.filter(trader=user_trader)
+        user_trader = self.get_trader_scope()
+        if user_trader:
+            queryset = queryset.filter(trader=user_trader)
+        
+        # is_overdue and days_until_delivery, for the serializers and ?ordering
+        if self.action in self.computed_actions:
+            queryset = queryset.with_computed()
         
         return queryset
     
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """Get comprehensive dashboard statistics"""
-        queryset = self.get_queryset()
-        
-        # Basic counts
-        total_contracts = queryset.count()
-        active_contracts = queryset.filter(status__in=['approved', 'executed']).count()
-        pending_contracts = queryset.filter(status='draft').count()
-        completed_contracts = queryset.filter(status='completed').count()
-        
-        # Financial stats
-        total_value = queryset.aggregate(
-            total=Sum('price')
-        )['total'] or Decimal('0')
-        
-        # Overdue contracts
-        today = timezone.now().date()
-        overdue_contracts = queryset.filter(
-            delivery_period__lt=today,
-            status__in=['approved', 'executed']
-        ).count()
-        
-        # Monthly trends (last 12 months)
-        end_date = today
-        start_date = end_date - timedelta(days=365)
-        
-        monthly_data = []
-        current_date = start_date.replace(day=1)
-        
-        while current_date <= end_date:
-            next_month = (current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-            month_contracts = queryset.filter(
-                date__gte=current_date,
-                date__lt=next_month
-            )
-            
-            monthly_data.append({
-                'month': current_date.strftime('%Y-%m'),
-                'count': month_contracts.count(),
-                'value': float(month_contracts.aggregate(Sum('price'))['price__sum'] or 0)
-            })
-            
-            current_date = next_month
-        
-        # Status distribution
-        status_distribution = list(queryset.values('status').annotate(
-            count=Count('id')
-        ).order_by('-count'))
-        
-        # Top commodities by value
-        top_commodities = list(queryset.values(
-            'commodity__commodity_name_short'
-        ).annotate(
-            count=Count('id'),
-            total_value=Sum('price')
-        ).order_by('-total_value')[:10])
+        trader = self.get_trader_scope()
         
-        # Top counterparties by value
-        top_counterparties = list(queryset.values(
-            'counterparty__counterparty_name'
-        ).annotate(
-            count=Count('id'),
-            total_value=Sum('price')
-        ).order_by('-total_value')[:10])
+        def compute():
+            stats = compute_dashboard_stats(trader=trader)
+            return dict(DashboardStatsSerializer(stats).data)
         
-        stats = {
-            'total_contracts': total_contracts,
-            'active_contracts': active_contracts,
-            'pending_contracts': pending_contracts,
-            'completed_contracts': completed_contracts,
-            'total_value': total_value,
-            'overdue_contracts': overdue_contracts,
-            'monthly_trends': monthly_data,
-            'status_distribution': status_distribution,
-            'top_commodities': top_commodities,
-            'top_counterparties': top_counterparties,
-        }
-        
-        serializer = DashboardStatsSerializer(stats)
-        return Response(serializer.data)
+        return Response(get_dashboard_stats(trader, compute))
     
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Get overdue contracts"""
         today = timezone.now().date()
-        overdue_queryset = self.get_queryset().filter(
-            delivery_period__lt=today,
-            status__in=['approved', 'executed']
-        )
-        
-        serializer = ContractListSerializer(overdue_queryset, many=True)
-        return Response(serializer.data)
+        return self.delivery_response(self.get_queryset().filter(delivery_period__lt=today))
     
     @action(detail=False, methods=['get'])
     def upcoming_deliveries(self, request):
         """Get contracts with deliveries in the next 30 days"""
         today = timezone.now().date()
-        future_date = today + timedelta(days=30)
-        
-        upcoming_queryset = self.get_queryset().filter(
+        return self.delivery_response(self.get_queryset().filter(
             delivery_period__gte=today,
-            delivery_period__lte=future_date,
-            status__in=['approved', 'executed']
-        ).order_by('delivery_period')
+            delivery_period__lte=today + timedelta(days=30),
+        ))
+    
+    def delivery_response(self, queryset):
+        """
+        The open contracts of `queryset` with the list filters, search and
+        ordering (by delivery_period by default), one page at a time; or
+        with ?summary=1 only the count and notional of every delivery
+        bucket, for all open contracts matching the filters
+        """
+        if self.request.query_params.get(self.summary_param) in ('1', 'true'):
+            open_contracts = self.filter_queryset(self.get_queryset()).filter(status__in=Contract.ACTIVE_STATUSES)
+            return Response({'buckets': delivery_buckets(open_contracts, timezone.now().date())})
+        self.ordering = self.delivery_ordering
+        return self.compiled_response(self.filter_queryset(queryset.filter(status__in=Contract.ACTIVE_STATUSES)))
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Create many contracts in one transaction; nothing is created if any row is invalid"""
+        serializer = ContractBulkCreateSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=self.bulk_create_max_rows, context=self.get_serializer_context()
+        )
+        if serializer.is_valid():
+            contracts = serializer.save()
+            return Response({
+                'message': f'Successfully created {len(contracts)} contracts',
+                'created_contracts': len(contracts),
+                'contracts': [
+                    {'id': contract.id, 'contract_number': contract.contract_number}
+                    for contract in contracts
+                ],
+            }, status=status.HTTP_201_CREATED)
+        
+        # Errors keyed by the index of each invalid row
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'], renderer_classes=[CSVExportRenderer, NDJSONExportRenderer])
+    def export(self, request):
+        """Stream every contract matching the list filters, search and ordering (?format=csv|ndjson)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(queryset, CONTRACT_EXPORT_COLUMNS, request.accepted_renderer, 'contracts')
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """Import contracts from an uploaded CSV or XLSX file, reporting rejected rows"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload the file as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        
+        errors = []
+        def on_error(line, messages):
+            # The full report can be millions of rows; return the first ones
+            if len(errors) < self.import_max_errors:
+                errors.append({'row': line, 'errors': [
+                    {'field': field, 'message': message} for field, message in messages
+                ]})
         
-        serializer = ContractListSerializer(upcoming_queryset, many=True)
-        return Response(serializer.data)
+        try:
+            totals = ContractImporter(dry_run=dry_run, on_error=on_error).run(read_rows(upload, file_format))
+        except ImportFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            **totals,
+            'dry_run': dry_run,
+            'errors': errors,
+            'errors_truncated': totals['failed'] > len(errors),
+        })
     
     @action(detail=False, methods=['post'])
     def bulk_update(self, request):
@@ -207,7 +280,15 @@ class ContractViewSet(viewsets.ModelViewSet):
                           if k != 'contract_ids'}
             
             contracts = self.get_queryset().filter(id__in=contract_ids)
-            updated_count = contracts.update(**update_data)
+            with transaction.atomic():
+                # QuerySet.update sends no signals, so invalidate explicitly
+                trader_ids = set(contracts.values_list('trader_id', flat=True))
+                if 'trader' in update_data:
+                    trader_ids.add(update_data['trader'].pk)
+                invalidate_dashboards(trader_ids)
+                
+                with ContractRollup.objects.track(contracts):
+                    updated_count = contracts.update(**update_data)
             
             return Response({
                 'message': f'Successfully updated {updated_count} contracts',
@@ -240,11 +321,12 @@ class ContractViewSet(viewsets.ModelViewSet):
 
 # ==================== COUNTERPARTY VIEWSET ====================
 
-class CounterpartyViewSet(viewsets.ModelViewSet):
+class CounterpartyViewSet(CompiledListMixin, viewsets.ModelViewSet):
     """ViewSet for managing counterparties"""
     queryset = Counterparty.objects.prefetch_related('facilities').all()
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, SearchRankOrderingFilter]
+    pagination_class = EstimatedCountPagination
     
     filterset_fields = ['is_supplier', 'is_customer', 'country', 'city']
     search_fields = ['counterparty_name', 'counterparty_code', 'contact_person', 'email']
@@ -256,41 +338,145 @@ class CounterpartyViewSet(viewsets.ModelViewSet):
             return CounterpartyListSerializer
         return CounterpartySerializer
     
+    # Actions whose serializers read Counterparty.objects.with_contract_totals() annotations
+    contract_totals = {
+        'list': ['contract_count'],
+        'retrieve': [], 'update': [], 'partial_update': [],  # all of them
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'contracts'):
+            queryset = queryset.prefetch_related(None)
+        if self.action in self.contract_totals:
+            queryset = queryset.with_contract_totals(*self.contract_totals[self.action])
+        return queryset
+    
+    def perform_create(self, serializer):
+        # A new counterparty has no contracts
+        serializer.save()
+        for name, (_, empty) in CounterpartyQuerySet.CONTRACT_TOTALS.items():
+            setattr(serializer.instance, name, empty)
+    
     @action(detail=True, methods=['get'])
     def contracts(self, request, pk=None):
-        """Get all contracts for this counterparty"""
-        counterparty = self.get_object()
-        contracts = Contract.objects.filter(counterparty=counterparty)
-        serializer = ContractListSerializer(contracts, many=True)
-        return Response(serializer.data)
+        """
+        This counterparty's contracts, listed by ContractViewSet: the same
+        pagination, filters, search, ordering, trader scoping and query
+        """
+        # Not get_object(): the query parameters are the contract list's, not filters of counterparties
+        counterparty = get_object_or_404(self.get_queryset(), pk=pk)
+        self.check_object_permissions(request, counterparty)
+        contracts = ContractViewSet(
+            request=request, args=(), kwargs={}, action='list', format_kwarg=self.format_kwarg,
+            queryset=Contract.objects.filter(counterparty=counterparty),
+        )
+        return contracts.compiled_response(contracts.filter_queryset(contracts.get_queryset()))
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         """Get statistics for this counterparty"""
-        counterparty = self.get_object()
-        contracts = Contract.objects.filter(counterparty=counterparty)
-        
-        stats = {
-            'total_contracts': contracts.count(),
-            'active_contracts': contracts.filter(status__in=['approved', 'executed']).count(),
-            'total_value': contracts.aggregate(Sum('price'))['price__sum'] or 0,
-            'average_contract_value': contracts.aggregate(Avg('price'))['price__avg'] or 0,
-            'last_contract_date': contracts.order_by('-date').first().date if contracts.exists() else None,
-        }
+        try:
+            pk = Counterparty._meta.pk.to_python(pk)
+        except ValidationError:
+            raise Http404
+        statistics = counterparty_statistics([pk])
+        if pk not in statistics:
+            raise Http404
+        return Response(statistics[pk])
+    
+    @action(detail=False, methods=['post'])
+    def batch_statistics(self, request):
+        """Statistics for many counterparties ({"counterparty_ids": [...]}) from one grouped query"""
+        serializer = CounterpartyStatisticsBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        return Response(stats)
+        pks = list(dict.fromkeys(serializer.validated_data['counterparty_ids']))
+        statistics = counterparty_statistics(pks)
+        return Response({
+            'results': [{'counterparty': pk, **statistics[pk]} for pk in pks if pk in statistics],
+            'not_found': [pk for pk in pks if pk not in statistics],
+        })
 
 # ==================== OTHER VIEWSETS ====================
 
+class ReferenceDataViewSet(viewsets.ModelViewSet):
+    """
+    ModelViewSet for a table held in reference_cache. Unfiltered lists and
+    retrieves are served from the cache, in the order the table was
+    registered with; writes, and lists with filter, search or ordering
+    parameters, go to the database.
+    """
+    cache_query_params = {'page', 'format'}
+    
+    def list(self, request, *args, **kwargs):
+        if not set(request.query_params) <= self.cache_query_params:
+            return super().list(request, *args, **kwargs)
+        rows = reference_cache.rows(self.queryset.model)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(rows, many=True).data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        model = self.queryset.model
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            instance = reference_cache.get(model, model._meta.pk.to_python(lookup))
+        except (TypeError, ValueError, ValidationError):
+            instance = None
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
+
+class ReferenceCacheView(APIView):
+    """Hit counters of the reference data cache in the worker that answers"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response({'pid': os.getpid(), 'tables': reference_cache.stats()})
+
 class TraderViewSet(viewsets.ModelViewSet):
-    queryset = Trader.objects.all()
+    queryset = Trader.objects.with_contract_counts()
     serializer_class = TraderSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ['trader_name', 'email']
     ordering = ['trader_name']
+    
+    # Window of contract dates ranked when ?period= is not given
+    leaderboard_days = 365
+    
+    def perform_create(self, serializer):
+        # A new trader has no contracts
+        trader = serializer.save()
+        trader.contract_count = trader.active_contract_count = 0
+    
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """
+        Traders ranked by notional, contract count and active volume over
+        ?period= (a PeriodField range such as 2024-01,2024-06; the last
+        leaderboard_days days by default)
+        """
+        try:
+            window = PeriodField(allow_range=True, required=False).clean(request.query_params.get('period'))
+        except forms.ValidationError as e:
+            raise serializers.ValidationError({'period': e.messages})
+        if window is None:
+            today = timezone.now().date()
+            window = (today - timedelta(days=self.leaderboard_days), today + timedelta(days=1))
+        start, end = window
+        
+        rows = get_trader_leaderboard(start, end, lambda: trader_leaderboard(start, end))
+        names = reference_cache.names(Trader, 'trader_name', {row['trader'] for row in rows})
+        results = TraderLeaderboardSerializer(
+            [{**row, 'trader_name': names.get(row['trader'])} for row in rows], many=True,
+        ).data
+        return Response({'start': start, 'end': end, 'results': results})
 
-class CommodityViewSet(viewsets.ModelViewSet):
+class CommodityViewSet(ReferenceDataViewSet):
     queryset = Commodity.objects.select_related(
         'commodity_group', 'commodity_type', 'commodity_subtype'
     ).all()
@@ -301,57 +487,57 @@ class CommodityViewSet(viewsets.ModelViewSet):
     search_fields = ['commodity_name_short', 'commodity_name_full']
     ordering = ['commodity_name_short']
 
-class CommodityGroupViewSet(viewsets.ModelViewSet):
+class CommodityGroupViewSet(ReferenceDataViewSet):
     queryset = Commodity_Group.objects.all()
     serializer_class = CommodityGroupSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class CommodityTypeViewSet(viewsets.ModelViewSet):
+class CommodityTypeViewSet(ReferenceDataViewSet):
     queryset = Commodity_Type.objects.all()
     serializer_class = CommodityTypeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class CommoditySubtypeViewSet(viewsets.ModelViewSet):
+class CommoditySubtypeViewSet(ReferenceDataViewSet):
     queryset = Commodity_Subtype.objects.all()
     serializer_class = CommoditySubtypeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class CostCenterViewSet(viewsets.ModelViewSet):
+class CostCenterViewSet(ReferenceDataViewSet):
     queryset = Cost_Center.objects.all()
     serializer_class = CostCenterSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class SociedadViewSet(viewsets.ModelViewSet):
+class SociedadViewSet(ReferenceDataViewSet):
     queryset = Sociedad.objects.all()
     serializer_class = SociedadSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class BrokerViewSet(viewsets.ModelViewSet):
+class BrokerViewSet(ReferenceDataViewSet):
     queryset = Broker.objects.all()
     serializer_class = BrokerSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class CurrencyViewSet(viewsets.ModelViewSet):
+class CurrencyViewSet(ReferenceDataViewSet):
     queryset = Currency.objects.all()
     serializer_class = CurrencySerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ICOTERMViewSet(viewsets.ModelViewSet):
+class ICOTERMViewSet(ReferenceDataViewSet):
     queryset = ICOTERM.objects.all()
     serializer_class = ICOTERMSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class TradeOperationTypeViewSet(viewsets.ModelViewSet):
+class TradeOperationTypeViewSet(ReferenceDataViewSet):
     queryset = Trade_Operation_Type.objects.all()
     serializer_class = TradeOperationTypeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class DeliveryFormatViewSet(viewsets.ModelViewSet):
+class DeliveryFormatViewSet(ReferenceDataViewSet):
     queryset = Delivery_Format.objects.all()
     serializer_class = DeliveryFormatSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class AdditiveViewSet(viewsets.ModelViewSet):
+class AdditiveViewSet(ReferenceDataViewSet):
     queryset = Additive.objects.all()
     serializer_class = AdditiveSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_contract_bulk_create.py
+"""
+One POST per contract versus a single contracts/bulk_create call.
+
+Every run happens in a transaction that is rolled back, so the database
+is left as it was.
+"""
+import argparse
+
+from common import ensure_contracts, benchmark_user, timed, report
+
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.nextcrm.models import Contract
+from apps.nextcrm.views import ContractViewSet
+
+FK_FIELDS = [
+    'trader', 'trade_operation_type', 'sociedad', 'counterparty', 'commodity',
+    'commodity_group', 'delivery_format', 'additive', 'broker', 'icoterm',
+    'cost_center', 'broker_fee_currency', 'trade_currency',
+]
+
+def payload_from(contract):
+    row = {name: getattr(contract, f'{name}_id') for name in FK_FIELDS}
+    row.update({
+        'broker_fee': '0.00', 'freight_cost': '12.50', 'forex': '1.0000',
+        'price': '812.40', 'payment_days': 30, 'quantity': '250.000',
+        'entrega': 'Benchmark terminal', 'delivery_period': '2030-06-30',
+        'date': '2030-01-15', 'status': 'draft',
+    })
+    return row
+
+def post(view, path, user, data):
+    request = APIRequestFactory().post(path, data, format='json', SERVER_NAME='localhost')
+    force_authenticate(request, user=user)
+    response = view(request)
+    assert response.status_code == 201, response.data
+    return response
+
+def rolled_back(fn):
+    def run():
+        with transaction.atomic():
+            fn()
+            transaction.set_rollback(True)
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ensure_contracts(1)
+    user = benchmark_user()
+    template = payload_from(Contract.objects.order_by('id').first())
+    create = ContractViewSet.as_view({'post': 'create'})
+    bulk_create = ContractViewSet.as_view({'post': 'bulk_create'})
+    path = '/api/nextcrm/contracts/'
+
+    rows = []
+    for count in args.rows:
+        data = [dict(template) for _ in range(count)]
+        single_ms, _ = timed(
+            rolled_back(lambda: [post(create, path, user, row) for row in data]),
+            repeat=args.repeat, warmup=0,
+        )
+        bulk_ms, _ = timed(
+            rolled_back(lambda: post(bulk_create, f'{path}bulk_create/', user, data)),
+            repeat=args.repeat, warmup=0,
+        )
+        rows.append([
+            count, f'{single_ms:.0f}', f'{count / single_ms * 1000:.0f}',
+            f'{bulk_ms:.0f}', f'{count / bulk_ms * 1000:.0f}',
+        ])
+
+    print('\nMedian ms per batch, contracts per second')
+    report(rows, ['rows', 'single POSTs', 'per s', 'bulk_create', 'per s'])
+
+if __name__ == '__main__':
+    main()
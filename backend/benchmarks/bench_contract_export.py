@@ -0,0 +1,49 @@
+# backend/benchmarks/bench_contract_export.py
+"""
+contracts/export: time to first byte, total time and peak Python heap
+while streaming the whole book as CSV and NDJSON. Peak memory should not
+depend on the number of contracts. Run with DEBUG off.
+"""
+import argparse
+import time
+import tracemalloc
+
+from common import ensure_contracts, benchmark_user, report
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.nextcrm.models import Contract
+from apps.nextcrm.views import ContractViewSet
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--contracts', type=int, default=1000000)
+    args = parser.parse_args()
+
+    ensure_contracts(args.contracts)
+    user = benchmark_user()
+    # Routers pass the action's renderer_classes to as_view(); do the same here
+    view = ContractViewSet.as_view({'get': 'export'}, **ContractViewSet.export.kwargs)
+
+    rows = []
+    for export_format in ('csv', 'ndjson'):
+        tracemalloc.start()
+        start = time.perf_counter()
+        request = APIRequestFactory().get('/api/nextcrm/contracts/export/', {'format': export_format},
+                                          SERVER_NAME='localhost')
+        force_authenticate(request, user=user)
+        chunks = iter(view(request).streaming_content)
+        size = len(next(chunks))
+        first_byte = time.perf_counter() - start
+        for chunk in chunks:
+            size += len(chunk)
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append([export_format, f'{first_byte * 1000:.0f}', f'{total:.1f}', f'{size / 2**20:.0f}', f'{peak / 2**20:.1f}'])
+
+    print(f'\n{Contract.objects.count()} contracts')
+    report(rows, ['format', 'first byte ms', 'total s', 'MiB out', 'peak MiB'])
+
+if __name__ == '__main__':
+    main()
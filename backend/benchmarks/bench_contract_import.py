@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_contract_import.py
+"""
+Throughput and peak memory of ContractImporter on generated CSV files of
+growing size. Peak Python heap (tracemalloc) should stay flat as the file
+grows; rows are validated and inserted, then rolled back. Run with
+DEBUG off: with DEBUG on, Django keeps a log of the last 9000 queries,
+which shows up as growth. tracemalloc itself slows the import down.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+from common import ensure_contracts, report
+
+from django.db import transaction
+
+from apps.nextcrm.importers import ContractImporter, read_rows
+from apps.nextcrm.models import Contract
+
+def write_file(path, template, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(template.keys())
+        for _ in range(rows):
+            writer.writerow(template.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--batch-size', type=int, default=ContractImporter.batch_size)
+    args = parser.parse_args()
+
+    ensure_contracts(1)
+    contract = Contract.objects.select_related(
+        'trader', 'trade_operation_type', 'sociedad', 'counterparty', 'commodity',
+        'commodity_group', 'delivery_format', 'additive', 'broker', 'icoterm',
+        'cost_center', 'broker_fee_currency', 'trade_currency',
+    ).order_by('id').first()
+    # References by code or name, the way a spreadsheet names them
+    template = {
+        'trader': contract.trader.email, 'trade_operation_type': contract.trade_operation_type.operation_code,
+        'sociedad': contract.sociedad.sociedad_name, 'counterparty': contract.counterparty.counterparty_code,
+        'commodity': contract.commodity.commodity_name_short,
+        'commodity_group': contract.commodity_group.commodity_group_name,
+        'delivery_format': contract.delivery_format.delivery_format_name,
+        'additive': contract.additive.additive_name, 'broker': contract.broker.broker_code,
+        'icoterm': contract.icoterm.icoterm_code, 'cost_center': contract.cost_center.cost_center_name,
+        'broker_fee': '0.00', 'broker_fee_currency': contract.broker_fee_currency.currency_code,
+        'freight_cost': '12.50', 'forex': '1.0000', 'price': '812.40',
+        'trade_currency': contract.trade_currency.currency_code, 'payment_days': '30',
+        'quantity': '250.000', 'entrega': 'Benchmark terminal', 'delivery_period': '2030-06-30',
+        'date': '2030-01-15', 'status': 'draft',
+    }
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.rows:
+            path = os.path.join(directory, f'{count}.csv')
+            write_file(path, template, count)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            with transaction.atomic():
+                with open(path, 'rb') as file:
+                    totals = ContractImporter(batch_size=args.batch_size, defer_rollups=True).run(
+                        read_rows(file, 'csv')
+                    )
+                transaction.set_rollback(True)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rows.append([count, totals['created'], f'{elapsed:.1f}', f'{count / elapsed:.0f}', f'{peak / 2**20:.1f}'])
+
+    print()
+    report(rows, ['rows', 'created', 'seconds', 'rows/s', 'peak MiB'])
+
+if __name__ == '__main__':
+    main()
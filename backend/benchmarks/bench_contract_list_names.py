@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_contract_list_names.py
+"""
+ContractListSerializer with names joined through select_related versus
+names filled from reference_cache id -> name maps, per page size.
+
+"cold" clears this process's copies before every run, so tables come
+back from the shared cache and counterparty names are batch-fetched;
+"warm" reuses them as a long-lived worker does.
+"""
+import argparse
+
+from common import ensure_contracts, timed, report
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from apps.nextcrm.cache import reference_cache
+from apps.nextcrm.models import Contract
+from apps.nextcrm.serializers import ContractListSerializer
+
+# The twelve-table select_related ContractViewSet once applied to every action
+JOINS = [
+    'trader', 'counterparty', 'commodity', 'trade_operation_type',
+    'sociedad', 'broker', 'icoterm', 'cost_center', 'delivery_format',
+    'additive', 'trade_currency', 'broker_fee_currency',
+]
+
+def joined_page(size):
+    page = Contract.objects.select_related(*JOINS).order_by('-date', '-id')[:size]
+    return ContractListSerializer(page, many=True, context={'join_names': True}).data
+
+def mapped_page(size):
+    page = Contract.objects.order_by('-date', '-id')[:size]
+    return ContractListSerializer(page, many=True).data
+
+def cold(fn):
+    def run():
+        reference_cache.clear()
+        return fn()
+    return run
+
+def queries(fn):
+    with CaptureQueriesContext(connection) as captured:
+        fn()
+    return len(captured)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 500, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ensure_contracts(max(args.sizes))
+    rows = []
+    for size in args.sizes:
+        join = lambda: joined_page(size)
+        mapped = lambda: mapped_page(size)
+        assert join() == mapped()
+
+        join_ms, _ = timed(join, repeat=args.repeat)
+        cold_ms, _ = timed(cold(mapped), repeat=args.repeat)
+        warm_ms, _ = timed(mapped, repeat=args.repeat)
+        rows.append([
+            size, f'{join_ms:.1f}', f'{cold_ms:.1f}', f'{warm_ms:.1f}', f'{join_ms / warm_ms:.2f}x',
+            queries(join), queries(cold(mapped)), queries(mapped),
+        ])
+        reset_queries()
+
+    print('\nMedian ms to serialize one page')
+    report(rows, ['rows', 'join', 'maps cold', 'maps warm', 'speedup', 'q join', 'q cold', 'q warm'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_contract_pagination.py
+"""
+Page-number versus keyset pagination on /api/nextcrm/contracts/.
+
+Page-number pagination runs COUNT(*) plus an OFFSET scan, so deep pages
+get slower; keyset pagination seeks from the cursor and stays flat.
+"""
+import argparse
+from urllib.parse import parse_qs, urlsplit
+
+from common import ensure_contracts, benchmark_user, api_get, timed, report
+
+from apps.nextcrm.models import Contract
+from apps.nextcrm.views import ContractViewSet
+from utils.pagination import KeysetPagination
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--contracts', type=int, default=120000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ensure_contracts(args.contracts)
+    user = benchmark_user()
+    view = ContractViewSet.as_view({'get': 'list'})
+    path = '/api/nextcrm/contracts/'
+
+    # The list's default ordering, which its cursors are issued under
+    ordering = list(ContractViewSet.ordering)
+
+    rows = []
+    for page in args.pages:
+        offset = (page - 1) * args.page_size
+        boundary = Contract.objects.order_by(*ordering)[offset - 1:offset].first() if offset else None
+        if offset and boundary is None:
+            print(f'Skipping page {page}: not enough contracts')
+            continue
+
+        # Cursor pointing just past the previous page, as a client walking
+        # the list would have received it
+        params = {'pagination': 'cursor', 'page_size': args.page_size}
+        if boundary:
+            paginator = KeysetPagination()
+            paginator.ordering = ordering
+            paginator.base_url = path
+            link = paginator.encode_cursor(paginator.row_values(boundary), reverse=False)
+            params['cursor'] = parse_qs(urlsplit(link).query)['cursor'][0]
+
+        for params_used in ({'page': page}, params):
+            response = api_get(view, path, user, **params_used)
+            assert response.status_code == 200, (params_used, response.status_code, response.data)
+
+        page_number_ms, _ = timed(lambda: api_get(view, path, user, page=page), repeat=args.repeat)
+        keyset_ms, _ = timed(lambda: api_get(view, path, user, **params), repeat=args.repeat)
+        rows.append([page, f'{page_number_ms:.1f}', f'{keyset_ms:.1f}'])
+
+    print(f'\n{Contract.objects.count()} contracts, page size {args.page_size} (median ms)')
+    report(rows, ['page', 'page-number', 'keyset'])
+
+if __name__ == '__main__':
+    main()
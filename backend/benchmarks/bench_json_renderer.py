@@ -0,0 +1,64 @@
+# backend/benchmarks/bench_json_renderer.py
+"""
+DRF's JSONRenderer against ORJSONRenderer on a contract page (the list
+payload, as ContractViewSet renders it) and on the dashboard payload,
+plus JSONParser against ORJSONParser on a bulk_create body of the same
+number of rows.
+"""
+import argparse
+import io
+
+from common import ensure_contracts, timed, report
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.nextcrm.compiled import compiled_serializer
+from apps.nextcrm.models import Contract
+from apps.nextcrm.serializers import (
+    ContractCreateUpdateSerializer, ContractListSerializer, DashboardStatsSerializer,
+)
+from apps.nextcrm.stats import compute_dashboard_stats
+from utils.renderers import ORJSONParser, ORJSONRenderer
+
+def contract_page(size):
+    compiled = compiled_serializer(ContractListSerializer)
+    return {'count': size, 'next': None, 'previous': None, 'results': compiled.render(
+        compiled.values(Contract.objects.with_computed().order_by('-date', '-id'))[:size]
+    )}
+
+def bulk_body(size):
+    fields = [name for name in ContractCreateUpdateSerializer().fields if name != 'id']
+    rows = Contract.objects.order_by('-date', '-id').values_list(*fields)[:size]
+    return JSONRenderer().render([dict(zip(fields, row)) for row in rows])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    ensure_contracts(args.rows)
+    payloads = {
+        f'contract page ({args.rows} rows)': contract_page(args.rows),
+        'dashboard stats': DashboardStatsSerializer(compute_dashboard_stats()).data,
+    }
+    rows = []
+    for name, data in payloads.items():
+        assert JSONRenderer().render(data) == ORJSONRenderer().render(data)
+        json_ms, _ = timed(lambda: JSONRenderer().render(data), repeat=args.repeat)
+        orjson_ms, _ = timed(lambda: ORJSONRenderer().render(data), repeat=args.repeat)
+        rows.append([f'render {name}', f'{json_ms:.2f}', f'{orjson_ms:.2f}', f'{json_ms / orjson_ms:.1f}x'])
+
+    body = bulk_body(args.rows)
+    parse = lambda parser: parser.parse(io.BytesIO(body), 'application/json', {})
+    assert parse(JSONParser()) == parse(ORJSONParser())
+    json_ms, _ = timed(lambda: parse(JSONParser()), repeat=args.repeat)
+    orjson_ms, _ = timed(lambda: parse(ORJSONParser()), repeat=args.repeat)
+    rows.append([f'parse bulk body ({args.rows} rows)', f'{json_ms:.2f}', f'{orjson_ms:.2f}', f'{json_ms / orjson_ms:.1f}x'])
+
+    print('\nMedian ms')
+    report(rows, ['case', 'json', 'orjson', 'speedup'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# backend/benchmarks/bench_list_serializers.py
+"""
+ContractListSerializer and CounterpartyListSerializer against the
+compiled values_list() path, per page size: the serializer alone on a
+fetched page, and the whole request through the viewset (query, names,
+rendering).
+"""
+import argparse
+
+from common import ensure_contracts, benchmark_user, api_get, timed, report
+
+from apps.nextcrm.compiled import compiled_serializer
+from apps.nextcrm.models import Contract
+from apps.nextcrm.serializers import ContractListSerializer
+from apps.nextcrm.views import ContractViewSet, CounterpartyViewSet
+
+def serializer_page(size):
+    page = list(Contract.objects.with_computed().order_by('-date', '-id')[:size])
+    return lambda: ContractListSerializer(page, many=True).data
+
+def compiled_page(size):
+    compiled = compiled_serializer(ContractListSerializer)
+    rows = list(compiled.values(Contract.objects.with_computed().order_by('-date', '-id'))[:size])
+    return lambda: compiled.render(rows)
+
+def endpoint(viewset, path, user, compiled, **params):
+    view = type(viewset.__name__, (viewset,), {'compiled_list': compiled}).as_view({'get': 'list'})
+    return lambda: api_get(view, path, user, **params)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 500, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ensure_contracts(max(args.sizes))
+    user = benchmark_user()
+    rows = []
+
+    def measure(name, size, regular, fast):
+        regular_ms, _ = timed(regular, repeat=args.repeat)
+        fast_ms, _ = timed(fast, repeat=args.repeat)
+        rows.append([name, size, f'{regular_ms:.1f}', f'{fast_ms:.1f}', f'{regular_ms / fast_ms:.2f}x'])
+
+    for size in args.sizes:
+        serializer, compiled = serializer_page(size), compiled_page(size)
+        assert serializer() == compiled()
+        measure('serializer only', size, serializer, compiled)
+
+        path, cursor = '/api/nextcrm/contracts/', {'pagination': 'cursor', 'page_size': size}
+        regular = endpoint(ContractViewSet, path, user, False, **cursor)
+        fast = endpoint(ContractViewSet, path, user, True, **cursor)
+        assert regular().content == fast().content
+        measure('GET contracts', size, regular, fast)
+
+    # Counterparty pages have the fixed PAGE_SIZE
+    path = '/api/nextcrm/counterparties/'
+    regular = endpoint(CounterpartyViewSet, path, user, False)
+    fast = endpoint(CounterpartyViewSet, path, user, True)
+    assert regular().content == fast().content
+    measure('GET counterparties', 'page', regular, fast)
+
+    print('\nMedian ms')
+    report(rows, ['case', 'rows', 'serializer', 'compiled', 'speedup'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# backend/benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Run a benchmark from the backend directory, e.g.
+
+    python benchmarks/bench_contract_pagination.py --contracts 200000
+
+It uses DJANGO_SETTINGS_MODULE (default: core.settings.development, i.e.
+PostgreSQL) and seeds synthetic contracts with `manage.py seed_contracts`
+when the database holds fewer than requested.
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.development')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+def ensure_contracts(count):
+    """Seed synthetic contracts until the table holds at least `count` rows"""
+    from apps.nextcrm.models import Contract
+
+    existing = Contract.objects.count()
+    if existing < count:
+        print(f'Seeding {count - existing} contracts...')
+        call_command('seed_contracts', contracts=count - existing, verbosity=0)
+    return max(existing, count)
+
+def benchmark_user():
+    user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+    return user
+
+def api_get(view, path, user, **params):
+    """Call a DRF view function directly, skipping URL routing and middleware"""
+    request = APIRequestFactory().get(path, params, SERVER_NAME='localhost')
+    force_authenticate(request, user=user)
+    response = view(request)
+    response.render()
+    return response
+
+def timed(fn, repeat=5, warmup=1):
+    """Median and best wall time of fn() in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+def report(rows, headers):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    for row in [headers] + rows:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
@@ -89,6 +89,44 @@ DATABASES = {
     }
 }
 
+# Cache - Redis when REDIS_URL is set, otherwise per-process memory
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'nextcrm',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'nextcrm',
+        }
+    }
+
+# Seconds a cached dashboard payload may live (writes invalidate it sooner)
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds cached ?facets= counts of a filtered contract list may live
+FACET_CACHE_TIMEOUT = config('FACET_CACHE_TIMEOUT', default=300, cast=int)
+
+# Reference data cache (apps.nextcrm.cache.reference_cache): seconds a table
+# copy may live in the shared cache, seconds a worker trusts the table version
+# it last read, seconds a worker keeps its own copy even if no version bump
+# reaches it (with a process-local cache, none from other processes does),
+# how many tables each worker keeps in memory and how many ids of
+# register_names() tables (counterparty names) it remembers
+REFERENCE_CACHE_TIMEOUT = config('REFERENCE_CACHE_TIMEOUT', default=3600, cast=int)
+REFERENCE_CACHE_VERSION_TTL = config('REFERENCE_CACHE_VERSION_TTL', default=1.0, cast=float)
+REFERENCE_CACHE_LOCAL_TIMEOUT = config('REFERENCE_CACHE_LOCAL_TIMEOUT', default=60, cast=float)
+REFERENCE_CACHE_MAX_TABLES = config('REFERENCE_CACHE_MAX_TABLES', default=32, cast=int)
+REFERENCE_CACHE_MAX_NAMES = config('REFERENCE_CACHE_MAX_NAMES', default=50000, cast=int)
+
+# Report the columns and joins each shaped API queryset loaded (utils.shaping)
+QUERY_SHAPE_HEADER = DEBUG
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -133,8 +171,21 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# How ORJSONRenderer writes Decimal values serializers leave as Decimal
+# (e.g. ReadOnlyField): 'number', as DRF's JSONRenderer does, or 'string'
+JSON_DECIMAL_FORMAT = config('JSON_DECIMAL_FORMAT', default='number')
+
 # CORS settings - Updated for cookie support
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True  # Essential for cookies
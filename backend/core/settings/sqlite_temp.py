@@ -75,6 +75,30 @@ DATABASES = {
     }
 }
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'nextcrm',
+    }
+}
+
+# Seconds a cached dashboard payload may live (writes invalidate it sooner)
+DASHBOARD_CACHE_TIMEOUT = 300
+# Seconds cached ?facets= counts of a filtered contract list may live
+FACET_CACHE_TIMEOUT = 300
+
+# Reference data cache: shared-cache lifetime, version re-check interval,
+# per-worker copy lifetime, tables and names per worker
+REFERENCE_CACHE_TIMEOUT = 3600
+REFERENCE_CACHE_VERSION_TTL = 1.0
+REFERENCE_CACHE_LOCAL_TIMEOUT = 60
+REFERENCE_CACHE_MAX_TABLES = 32
+REFERENCE_CACHE_MAX_NAMES = 50000
+
+# Report the columns and joins each shaped API queryset loaded (utils.shaping)
+QUERY_SHAPE_HEADER = DEBUG
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -120,8 +144,21 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# How ORJSONRenderer writes Decimal values serializers leave as Decimal
+# (e.g. ReadOnlyField): 'number', as DRF's JSONRenderer does, or 'string'
+JSON_DECIMAL_FORMAT = 'number'
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
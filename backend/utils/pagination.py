@@ -0,0 +1,336 @@
+# utils/pagination.py
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator, Page, EmptyPage, PageNotAnInteger
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which keyset comparisons need"""
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks past the last row seen instead of using
+    OFFSET, so every page costs the same. Unlike DRF's CursorPagination it
+    follows whatever ordering the OrderingFilter applied, appending the
+    primary key as a tie-breaker so the order is total. Ordering fields
+    are expected to be non-null.
+
+    The cursor is an opaque base64 token holding the ordering, the
+    boundary row's values and the direction of travel.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        # Fixed ordering for endpoints without an OrderingFilter
+        self.fixed_ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor['reverse'] if cursor else False
+
+        if cursor:
+            values = self.parse_values(queryset, cursor['values'])
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+        queryset = queryset.order_by(*(self.invert(self.ordering) if reverse else self.ordering))
+        queryset = self.load_ordering_fields(queryset)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = bool(cursor) if not reverse else has_more
+        self.first_values = self.row_values(rows[0]) if rows else None
+        self.last_values = self.row_values(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = list(
+            self.fixed_ordering
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+            or ['-pk']
+        )
+        pk_name = queryset.model._meta.pk.name
+        if not any(field.lstrip('-') in ('pk', pk_name) for field in ordering):
+            tie_breaker = pk_name if not ordering[0].startswith('-') else f'-{pk_name}'
+            ordering.append(tie_breaker)
+        return ordering
+
+    @staticmethod
+    def invert(ordering):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+    def keyset_filter(self, values, reverse):
+        """Rows strictly after (or, travelling back, before) the boundary row"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            condition |= equal & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def load_ordering_fields(self, queryset):
+        """Add the ordering fields to a queryset narrowed with only(), as the cursor reads them"""
+        loaded, defer = queryset.query.deferred_loading
+        if not loaded or defer:
+            return queryset
+        names = [field.lstrip('-') for field in self.ordering]
+        return queryset.only(*loaded, *(name for name in names if name not in queryset.query.annotations))
+
+    def row_values(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def parse_values(self, queryset, raw_values):
+        values = []
+        for field, raw in zip(self.ordering, raw_values):
+            name = field.lstrip('-')
+            if name in queryset.query.annotations:
+                model_field = queryset.query.annotations[name].output_field
+            else:
+                model_field = queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+            try:
+                value = model_field.to_python(raw)
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            # Ordering fields are non-null, and a None bound cannot be compared
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps(
+            {'o': self.ordering, 'v': values, 'r': reverse},
+            cls=CursorEncoder, separators=(',', ':')
+        )
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            ordering, values, reverse = payload['o'], payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor only makes sense for the ordering it was issued under
+        if ordering != self.ordering or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'values': values, 'reverse': reverse}
+
+    def get_next_link(self):
+        if not self.has_next or self.last_values is None:
+            return None
+        return self.encode_cursor(self.last_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_values is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_values, reverse=True)
+
+# ==================== ESTIMATED COUNTS ====================
+
+def capped_count(queryset, cap):
+    """COUNT(*) over a LIMIT subquery: stops scanning after `cap` rows"""
+    return queryset.order_by()[:cap].count()
+
+def planner_estimate(queryset):
+    """
+    Row estimate from the PostgreSQL planner: pg_class.reltuples for an
+    unfiltered table, the EXPLAIN row estimate otherwise. None on other
+    databases or when no estimate is available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table has been analyzed
+            if row and row[0] > 0:
+                return int(row[0])
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+class EstimatedPage(Page):
+    """Page whose has_next() comes from fetching one extra row, not from the count"""
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts exactly up to `exact_count_threshold` rows and
+    estimates beyond it, setting `count_is_estimate`. The estimate comes
+    from the PostgreSQL planner; elsewhere (SQLite) it falls back to a
+    count capped at `fallback_count_cap` rows.
+    """
+    exact_count_threshold = 10000
+    fallback_count_cap = 100000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+
+        count = capped_count(self.object_list, self.exact_count_threshold + 1)
+        if count <= self.exact_count_threshold:
+            return count
+
+        estimate = planner_estimate(self.object_list)
+        if estimate is None:
+            estimate = capped_count(self.object_list, self.fallback_count_cap)
+            if estimate < self.fallback_count_cap:
+                return estimate
+        self.count_is_estimate = True
+        # The planner can undershoot; we know at least this many rows exist
+        return max(estimate, count)
+
+    def validate_number(self, number):
+        if not self.count or not self.count_is_estimate:
+            return super().validate_number(number)
+        # With an estimated count the last page is unknown; let page() decide
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimate:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page-number pagination for large tables: the count is exact below
+    EstimatedCountPaginator.exact_count_threshold rows and an estimate
+    above it, flagged by `count_is_estimate` in the response.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_estimate', self.page.paginator.count_is_estimate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_estimate'] = {'type': 'boolean'}
+        return response_schema
+
+class PageNumberOrKeysetPagination(EstimatedCountPagination):
+    """
+    Page-number pagination by default; keyset pagination when the client
+    asks for it with ?pagination=cursor or sends a cursor. A view whose
+    `pagination_mode` is 'cursor' defaults to keyset pagination instead,
+    and ?pagination=page switches it back.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_keyset(request, view):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def wants_keyset(self, request, view=None):
+        mode = request.query_params.get(self.mode_query_param) or getattr(view, 'pagination_mode', 'page')
+        return mode == 'cursor' or self.keyset_class.cursor_query_param in request.query_params
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
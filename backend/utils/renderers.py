@@ -0,0 +1,76 @@
+# utils/renderers.py
+import codecs
+import decimal
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import JSONRenderer
+
+# Dates and times go through the encoder's default() so their format is
+# the stdlib renderer's (e.g. 'Z' for UTC); dataclasses are not JSON to
+# it either. Non-str dict keys are converted as json.dumps() does
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+def orjson_dumps(data, default):
+    """
+    orjson.dumps() of `data`, with anything orjson does not handle itself
+    passed to `default` as json.JSONEncoder.default() would be
+    """
+    return orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson, with the same output for compact rendering.
+    Decimals that reach the renderer as Decimal (DecimalFields render
+    strings already) are numbers, or strings with
+    settings.JSON_DECIMAL_FORMAT = 'string'. Indented output, as the
+    browsable API asks for, and data orjson rejects (integers beyond 64
+    bits) are rendered by JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.compact or self.ensure_ascii or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson_dumps(data, self.get_default())
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped as JSONRenderer does, to stay a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+    def get_default(self):
+        encoder = self.encoder_class()
+        if getattr(settings, 'JSON_DECIMAL_FORMAT', 'number') != 'string':
+            return encoder.default
+
+        def default(obj):
+            if isinstance(obj, decimal.Decimal):
+                return str(obj)
+            return encoder.default(obj)
+        return default
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser on orjson. Bodies orjson rejects, or in an encoding other
+    than UTF-8, are handed to JSONParser, for the same error messages.
+    Unlike JSONParser, integers beyond 64 bits are read as floats (which
+    IntegerFields reject).
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read()
+        if codecs.lookup(get_encoding(parser_context or {})).name == 'utf-8':
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
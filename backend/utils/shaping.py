@@ -0,0 +1,169 @@
+# utils/shaping.py
+import functools
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+DISPLAY_METHOD = re.compile(r'get_(\w+)_display')
+
+class QueryShape:
+    """
+    The columns (only() paths), joins (select_related) and prefetches a
+    queryset needs. `columns` of None means "every column", for sources
+    that cannot be traced to model fields.
+    """
+
+    def __init__(self, columns=(), joins=(), prefetches=()):
+        self.columns = None if columns is None else sorted(set(columns))
+        self.joins = sorted(set(joins))
+        self.prefetches = sorted(set(prefetches))
+
+    def __or__(self, other):
+        columns = None if self.columns is None or other.columns is None else self.columns + other.columns
+        return QueryShape(columns, self.joins + other.joins, self.prefetches + other.prefetches)
+
+    def apply(self, queryset):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.joins:
+            queryset = queryset.select_related(*self.joins)
+        if self.prefetches:
+            queryset = queryset.prefetch_related(*self.prefetches)
+        if self.columns is not None:
+            # A joined relation must be loaded to be traversed
+            queryset = queryset.only(*self.columns, *self.joins)
+        return queryset
+
+    def describe(self):
+        columns = 'all' if self.columns is None else ','.join(self.columns)
+        return f'columns={columns}; joins={",".join(self.joins) or "none"}'
+
+def source_path(model, attrs):
+    """
+    ('column', path), ('prefetch', path) or (None, None) for a dotted
+    serializer source on `model`. Forward relations crossed on the way
+    are joins: every prefix of a 'column' path that names a relation.
+    """
+    path = []
+    for index, attr in enumerate(attrs):
+        last = index == len(attrs) - 1
+        display = DISPLAY_METHOD.fullmatch(attr)
+        if attr == 'pk':
+            attr = model._meta.pk.name
+        elif display and last:
+            attr = display.group(1)
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None, None
+        path.append(field.name)
+        if not field.is_relation:
+            return ('column', '__'.join(path)) if last else (None, None)
+        if field.many_to_many or field.one_to_many or not field.concrete:
+            return 'prefetch', '__'.join(path)
+        if last:
+            return 'column', '__'.join(path)
+        model = field.related_model
+    return None, None
+
+def joins_of(path):
+    """'a__b__c' -> ['a', 'a__b']"""
+    parts = path.split('__')
+    return ['__'.join(parts[:i]) for i in range(1, len(parts))]
+
+@functools.lru_cache(maxsize=None)
+def serializer_shape(serializer_class):
+    """
+    QueryShape of the model fields a ModelSerializer renders, traced
+    through each readable field's `source`. A field may name what it
+    reads itself with a `model_sources` attribute (dotted paths), and
+    SerializerMethodFields are looked up in Meta.method_sources
+    {field name: [dotted paths]}; anything else that does not resolve
+    to a model field makes the shape load every column.
+    """
+    return fields_shape(serializer_class(), serializer_class.Meta.model)
+
+def fields_shape(serializer, model, prefix=''):
+    method_sources = getattr(getattr(serializer, 'Meta', None), 'method_sources', {})
+    columns, joins, prefetches = [], [], []
+    complete = True
+
+    def add(dotted):
+        nonlocal complete
+        kind, path = source_path(model, dotted.split('.'))
+        if kind is None:
+            complete = False
+        elif kind == 'prefetch':
+            prefetches.append(prefix + path)
+        else:
+            columns.append(prefix + path)
+            joins.extend(prefix + join for join in joins_of(path))
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if hasattr(field, 'model_sources'):
+            for dotted in field.model_sources:
+                add(dotted)
+        elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            if name not in method_sources:
+                complete = False
+            for dotted in method_sources.get(name, ()):
+                add(dotted)
+        elif isinstance(field, serializers.ListSerializer):
+            prefetches.append(prefix + field.source.replace('.', '__'))
+        elif isinstance(field, serializers.ModelSerializer):
+            kind, path = source_path(model, field.source_attrs)
+            if kind == 'column':
+                joins.extend([*(prefix + join for join in joins_of(path)), prefix + path])
+                nested = fields_shape(field, field.Meta.model, f'{prefix}{path}__')
+                if nested.columns is None:
+                    complete = False
+                else:
+                    columns.extend(nested.columns)
+                joins.extend(nested.joins)
+                prefetches.extend(nested.prefetches)
+            elif kind == 'prefetch':
+                prefetches.append(prefix + path)
+            else:
+                complete = False
+        else:
+            add(field.source)
+
+    return QueryShape(columns if complete else None, joins, prefetches)
+
+class ShapedQuerysetMixin:
+    """
+    Narrows get_queryset() to what the action's serializer renders: only
+    the columns it reads and the relations it follows, traced by
+    serializer_shape(). `action_shapes` {action: QueryShape} replaces the
+    traced shape for actions that do not render their queryset, and
+    `extra_shapes` {action: QueryShape} adds to it (e.g. columns save()
+    reads). With settings.QUERY_SHAPE_HEADER the shape used is reported
+    in an X-Query-Shape response header.
+    """
+    action_shapes = {}
+    extra_shapes = {}
+    query_shape = None
+
+    def get_query_shape(self):
+        if self.action in self.action_shapes:
+            return self.action_shapes[self.action]
+        shape = serializer_shape(self.get_serializer_class())
+        if self.action in self.extra_shapes:
+            shape = shape | self.extra_shapes[self.action]
+        return shape
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action is None:
+            return queryset
+        self.query_shape = self.get_query_shape()
+        return self.query_shape.apply(queryset)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.query_shape is not None and getattr(settings, 'QUERY_SHAPE_HEADER', False):
+            response['X-Query-Shape'] = self.query_shape.describe()
+        return response